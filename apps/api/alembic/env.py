@@ -17,6 +17,7 @@ from app.models.workout import WorkoutTemplate, WorkoutLog  # Added Workout mode
 from app.models.user_profile import UserProfile  # Added UserProfile model import
 from app.models.user_measurement import UserMeasurement  # Added UserMeasurement model import
 from app.models.chat import ChatSession, ChatMessage, ChatContext  # Add chat models
+from app.models.refresh_token import RefreshToken
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,63 @@
+"""Add performance indexes
+
+Revision ID: 28fbd4cb3aed
+Revises: 77b4e0013bd0
+Create Date: 2026-10-17 10:12:41.308214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '28fbd4cb3aed'
+down_revision: Union[str, None] = '77b4e0013bd0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, options)
+INDEXES = [
+    ('ix_workout_logs_user_id_date', 'workout_logs', ['user_id', 'date', 'log_id'], {}),
+    ('ix_workout_templates_created_by_created_at', 'workout_templates', ['created_by', 'created_at', 'template_id'], {}),
+    ('ix_chat_messages_session_id_created_at', 'chat_messages', ['session_id', 'created_at', 'message_id'], {}),
+    ('ix_chat_context_session_id_context_type', 'chat_context', ['session_id', 'context_type', 'updated_at'], {}),
+    ('ix_chat_sessions_user_id_status', 'chat_sessions', ['user_id', 'status'], {}),
+    # Fails if a profile already has two measurements on the same day;
+    # the API has always rejected those, so existing data should be clean
+    ('ix_user_measurements_profile_id_date', 'user_measurements', ['profile_id', 'date'], {'unique': True}),
+    ('ix_exercises_created_at', 'exercises', ['created_at', 'exercise_id'], {}),
+    ('ix_exercises_muscle_groups', 'exercises', ['muscle_groups'], {'postgresql_using': 'gin'}),
+    ('ix_exercises_equipment', 'exercises', ['equipment'], {'postgresql_using': 'gin'}),
+    ('ix_exercises_name_trgm', 'exercises', ['name'], {
+        'postgresql_using': 'gin',
+        'postgresql_ops': {'name': 'gin_trgm_ops'},
+    }),
+]
+
+
+def upgrade() -> None:
+    # Servers without the contrib extensions skip the trigram index, and the
+    # name search falls back to a sequential scan there
+    trgm_available = op.get_bind().scalar(
+        sa.text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    )
+    if trgm_available:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block. It
+    # doesn't lock the tables against writes while the indexes build.
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            if options.get('postgresql_ops') and not trgm_available:
+                continue
+            # An interrupted concurrent build leaves an INVALID index behind
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            op.create_index(name, table, columns, postgresql_concurrently=True, **options)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,45 @@
+"""Add exercise tombstones
+
+Revision ID: 4c8e2f1b7d3a
+Revises: aea364b2206a
+Create Date: 2026-10-17 15:12:04.338120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e2f1b7d3a'
+down_revision: Union[str, None] = 'aea364b2206a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'exercise_tombstones',
+        sa.Column('exercise_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('exercise_id')
+    )
+    op.create_index('ix_exercise_tombstones_deleted_at', 'exercise_tombstones', ['deleted_at'])
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_exercises_updated_at')
+        op.create_index(
+            'ix_exercises_updated_at', 'exercises', ['updated_at', 'exercise_id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_exercises_updated_at', table_name='exercises',
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_index('ix_exercise_tombstones_deleted_at', table_name='exercise_tombstones')
+    op.drop_table('exercise_tombstones')
@@ -0,0 +1,33 @@
+"""Add exercise catalog version
+
+Revision ID: 7d1e5a9c3f20
+Revises: 4c8e2f1b7d3a
+Create Date: 2026-10-17 16:48:09.217302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1e5a9c3f20'
+down_revision: Union[str, None] = '4c8e2f1b7d3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'exercise_catalog_version',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO exercise_catalog_version (id, version) VALUES (1, 0)')
+
+
+def downgrade() -> None:
+    op.drop_table('exercise_catalog_version')
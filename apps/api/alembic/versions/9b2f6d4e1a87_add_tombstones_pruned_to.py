@@ -0,0 +1,35 @@
+"""Add tombstones_pruned_to to the exercise catalog version
+
+Revision ID: 9b2f6d4e1a87
+Revises: 7d1e5a9c3f20
+Create Date: 2026-10-17 19:32:41.508116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f6d4e1a87'
+down_revision: Union[str, None] = '7d1e5a9c3f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'exercise_catalog_version',
+        sa.Column('tombstones_pruned_to', sa.DateTime(timezone=True), nullable=True)
+    )
+    # Pruned tombstones were all older than those kept. With none kept,
+    # any may have been pruned, so every cursor so far resyncs
+    op.execute(
+        'UPDATE exercise_catalog_version SET tombstones_pruned_to = '
+        'COALESCE((SELECT min(deleted_at) FROM exercise_tombstones), now())'
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('exercise_catalog_version', 'tombstones_pruned_to')
@@ -0,0 +1,52 @@
+"""Add exercise search vector
+
+Revision ID: aea364b2206a
+Revises: 1afc8707aec2
+Create Date: 2026-10-17 13:40:52.118306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aea364b2206a'
+down_revision: Union[str, None] = '1afc8707aec2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match SEARCH_VECTOR in app/models/exercise.py
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(instructions, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    # Adding a stored generated column rewrites the table under an exclusive
+    # lock; the exercise catalog is small enough for that to be brief
+    op.add_column('exercises', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_VECTOR, persisted=True),
+        nullable=True
+    ))
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_exercises_search_vector')
+        op.create_index(
+            'ix_exercises_search_vector', 'exercises', ['search_vector'],
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_exercises_search_vector', table_name='exercises',
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_column('exercises', 'search_vector')
@@ -1,7 +1,7 @@
 from typing import Dict, Any, TypedDict, List, Optional
 from datetime import datetime
 from langgraph.graph import StateGraph
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.nodes.chat.message_parser import MessageParserNode
 from app.agents.nodes.chat.exercise_creator import ExerciseCreatorNode
 from app.agents.nodes.chat.workout_generator import WorkoutGeneratorNode
@@ -106,7 +106,7 @@ class RouterNode(BaseNode):
 class FitnessChatWorkflow:
     """Main workflow for fitness chatbot"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         
         # Initialize nodes
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, exercises, workouts, profiles, measurements, chat
+from app.api.v1.endpoints import auth, exercises, workouts, profiles, measurements, chat, admin
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -8,4 +8,5 @@ api_router.include_router(exercises.router, prefix="/exercises", tags=["Exercise
 api_router.include_router(workouts.router, prefix="/workouts", tags=["Workouts"])
 api_router.include_router(profiles.router, prefix="/profiles", tags=["User Profiles"])
 api_router.include_router(measurements.router, prefix="/measurements", tags=["Body Measurements"])
-api_router.include_router(chat.router, prefix="/chat", tags=["chat"]) 
\ No newline at end of file
+api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"]) 
\ No newline at end of file
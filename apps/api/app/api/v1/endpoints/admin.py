@@ -0,0 +1,91 @@
+from typing import List
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_engine_status, get_pool_status
+from app.core.deps import get_current_active_superuser, get_db
+from app.core.hashing import password_hasher
+from app.core.principal import principal_cache
+from app.core.security import token_cache
+from app.schemas.admin import (
+    CacheStatus,
+    DatabaseEngineStatus,
+    DatabasePoolStatus,
+    ExerciseImportStatus,
+    ExerciseSimilarityStatus,
+    PasswordHasherStatus
+)
+from app.services.exercise_service import active_catalog
+from app.services.exercise_import import ExerciseImport, recent_imports
+
+router = APIRouter()
+
+@router.get("/db/pool", response_model=DatabasePoolStatus)
+async def get_db_pool_status(
+    current_user = Depends(get_current_active_superuser)
+) -> DatabasePoolStatus:
+    """Live connection pool metrics (admin only)"""
+    return DatabasePoolStatus(**get_pool_status())
+
+@router.get("/db/engines", response_model=List[DatabaseEngineStatus])
+async def get_db_engine_status(
+    current_user = Depends(get_current_active_superuser)
+) -> List[DatabaseEngineStatus]:
+    """Query counts and replica routing state per database engine (admin only)"""
+    return [DatabaseEngineStatus(**status) for status in get_engine_status()]
+
+@router.get("/cache/principals", response_model=CacheStatus)
+async def get_principal_cache_status(
+    current_user = Depends(get_current_active_superuser)
+) -> CacheStatus:
+    """Hit and miss counters of the authenticated user cache (admin only)"""
+    return CacheStatus(**principal_cache.stats())
+
+@router.get("/security/password-hasher", response_model=PasswordHasherStatus)
+async def get_password_hasher_status(
+    current_user = Depends(get_current_active_superuser)
+) -> PasswordHasherStatus:
+    """Queue depth and wait times of the bcrypt worker pool (admin only)"""
+    return PasswordHasherStatus(**password_hasher.stats())
+
+@router.get("/cache/tokens", response_model=CacheStatus)
+async def get_token_cache_status(
+    current_user = Depends(get_current_active_superuser)
+) -> CacheStatus:
+    """Hit and miss counters of the decoded access token cache (admin only)"""
+    return CacheStatus(**token_cache.stats())
+
+@router.post("/exercises/import", response_model=ExerciseImportStatus)
+async def import_exercises(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_active_superuser)
+) -> ExerciseImportStatus:
+    """
+    Bulk upsert exercises from a streamed CSV (text/csv) or JSON Lines
+    (application/x-ndjson) body, matched by normalized name (admin only).
+
+    Batches commit as they go; GET /admin/exercises/imports shows progress.
+    """
+    exercise_import = ExerciseImport(request.headers.get("content-type"))
+    recent_imports.append(exercise_import)
+    await exercise_import.run(db, request.stream())
+    return ExerciseImportStatus(**exercise_import.status())
+
+@router.get("/exercises/imports", response_model=List[ExerciseImportStatus])
+async def list_exercise_imports(
+    current_user = Depends(get_current_active_superuser)
+) -> List[ExerciseImportStatus]:
+    """Progress of running and recent bulk exercise imports, newest first (admin only)"""
+    return [ExerciseImportStatus(**exercise_import.status()) for exercise_import in reversed(recent_imports)]
+
+@router.get("/exercises/similarity", response_model=ExerciseSimilarityStatus)
+async def get_exercise_similarity_status(
+    current_user = Depends(get_current_active_superuser)
+) -> ExerciseSimilarityStatus:
+    """Exercise similarity index size, and LLM calls it saved during workout generation (admin only)"""
+    stats = active_catalog().vectors.stats()
+    # Only workout generation looks up similar exercises, and only for
+    # exercises it would otherwise generate, so each match is a saved call
+    stats["llm_calls_saved"] = stats.pop("matches")
+    return ExerciseSimilarityStatus(**stats, threshold=settings.EXERCISE_SIMILARITY_THRESHOLD)
@@ -1,37 +1,47 @@
 from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Body, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.security import create_access_token
-from app.core.database import get_db
-from app.schemas.auth import Token
+from app.schemas.auth import RefreshRequest, Token
 from app.schemas.user import UserCreate, User
+from app.services.refresh_token import issue_refresh_token, revoke_refresh_token, rotate_refresh_token
 from app.services.user import authenticate_user, create_user, get_user_by_email
-from app.core.deps import get_current_user
+from app.core.deps import get_db, get_current_user
 from app.models.user import User as UserModel
 
 router = APIRouter()
 
+def _create_access_token(user: UserModel) -> str:
+    return create_access_token(
+        data={
+            "sub": str(user.id),
+            "is_active": user.is_active,
+            "is_superuser": user.is_superuser
+        },
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register(
     request: Request,
     user_in: UserCreate = Body(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Register a new user.
     """
-    user = get_user_by_email(db, email=user_in.email)
+    user = await get_user_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    user = create_user(db, user_in)
+    user = await create_user(db, user_in)
     return {
         "id": str(user.id),
         "email": user.email,
@@ -46,27 +56,25 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
     return JSONResponse(
         content={
-            "access_token": access_token,
+            "access_token": _create_access_token(user),
             "token_type": "bearer",
+            "refresh_token": await issue_refresh_token(db, user.id),
+            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
             "user": {
                 "id": str(user.id),
                 "email": user.email,
@@ -76,6 +84,45 @@ async def login(
         }
     )
 
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    body: RefreshRequest,
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    
+    The presented refresh token is revoked; reusing it later revokes every
+    token issued from the same login.
+    """
+    rotated = await rotate_refresh_token(db, body.refresh_token)
+    if rotated is None:
+        # Keep any family revocation despite failing the request
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user, refresh_token = rotated
+    return {
+        "access_token": _create_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: RefreshRequest,
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Revoke a refresh token and every token issued from the same login.
+    """
+    await revoke_refresh_token(db, body.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 @router.get("/me", response_model=User)
 async def get_me(
     current_user: UserModel = Depends(get_current_user)
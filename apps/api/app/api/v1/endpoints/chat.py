@@ -1,8 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import deps
-from app.services.chat.history import ChatHistoryService
+from app.core.database import release_connection
+from app.core.pagination import set_next_cursor
+from app.services.chat.history import ChatHistoryService, message_keyset
 from app.services.chat.context import ChatContextService
 from app.agents.workflows.chat.fitness_chat import FitnessChatWorkflow
 from app.schemas.chat import (
@@ -12,6 +14,7 @@ from app.schemas.chat import (
     ChatMessageCreate
 )
 from app.core.logging import get_logger
+from app.schemas.auth import Principal
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -19,8 +22,8 @@ router = APIRouter()
 @router.post("/sessions", response_model=ChatSession)
 async def create_chat_session(
     *,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_principal)
 ):
     """Create a new chat session"""
     try:
@@ -42,8 +45,8 @@ async def create_chat_session(
 @router.get("/sessions/active", response_model=ChatSession)
 async def get_active_session(
     *,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_principal)
 ):
     """Get or create active chat session"""
     try:
@@ -70,24 +73,33 @@ async def get_active_session(
 @router.get("/sessions/{session_id}/messages", response_model=List[ChatMessage])
 async def get_chat_history(
     session_id: str,
+    response: Response,
     limit: Optional[int] = 10,
+    cursor: Optional[str] = None,
     *,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: Principal = Depends(deps.get_current_principal)
 ):
-    """Get chat history for a session"""
+    """
+    Get chat history for a session in chronological order.
+
+    Pass the X-Next-Cursor header of a response as `cursor` to load older messages.
+    """
     try:
         history_service = ChatHistoryService(db)
-        messages = await history_service.get_history(session_id, limit)
+        messages = await history_service.get_messages(session_id, limit, cursor)
+        set_next_cursor(response, message_keyset.next_cursor(messages, limit))
         return [
             ChatMessage(
-                role=msg["role"],
-                content=msg["content"],
-                metadata=msg["metadata"],
-                created_at=msg["created_at"]
+                role=msg.role,
+                content=msg.content,
+                metadata=msg.message_metadata,
+                created_at=msg.created_at
             )
-            for msg in messages
+            for msg in reversed(messages)
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting chat history: {str(e)}")
         raise HTTPException(
@@ -100,8 +112,8 @@ async def send_message(
     session_id: str,
     message: ChatMessageCreate,
     *,
-    db: Session = Depends(deps.get_db),
-    current_user = Depends(deps.get_current_user)
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_principal)
 ):
     """Send a message to the chat"""
     try:
@@ -118,6 +130,9 @@ async def send_message(
             context_type="user_profile"
         )
         
+        # Hand the connection back to the pool while the LLM workflow runs
+        await release_connection(db)
+        
         # Process message through workflow
         workflow = FitnessChatWorkflow(db)
         result = await workflow.process_message(
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List
-from app.core.deps import get_current_user
+from app.core.deps import get_current_principal
 from app.agents.llm_config import switch_llm_provider, DEFAULT_CONFIGS
 
 router = APIRouter()
@@ -12,7 +12,7 @@ class LLMProviderUpdate(BaseModel):
 
 @router.get("/llm/providers", response_model=List[str])
 async def list_llm_providers(
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_principal)
 ) -> List[str]:
     """List available LLM providers"""
     return list(DEFAULT_CONFIGS.keys())
@@ -20,7 +20,7 @@ async def list_llm_providers(
 @router.post("/llm/switch")
 async def update_llm_provider(
     provider_update: LLMProviderUpdate,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_principal)
 ):
     """Switch the active LLM provider"""
     try:
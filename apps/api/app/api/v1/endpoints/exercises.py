@@ -1,52 +1,99 @@
-from typing import List
+import gzip
+from datetime import datetime, timezone
+from typing import List, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_db, get_current_user
-from app.models.user import User
+from app.core.conditional import conditional_response
+from app.core.config import settings
+from app.core.deps import get_db, get_read_db, get_current_principal
+from app.core.pagination import set_next_cursor
+from app.schemas.auth import Principal
 from app.schemas.exercise import (
     Exercise,
+    ExerciseChanges,
     ExerciseCreate,
     ExerciseUpdate,
     ExerciseSearch,
+    ExerciseSuggestion,
     ExerciseGenerateRequest
 )
 from app.crud import exercises
 from app.services.ai.exercise_generator import generate_exercise_with_ai
+from app.services.exercise_service import active_catalog
+from app.services.catalog import (
+    catalog_snapshots,
+    exercise_columns,
+    read_catalog_version,
+    read_tombstones_pruned_to,
+    sync_cursor
+)
 
 router = APIRouter()
 
+def _exercise_etag(exercise: Exercise) -> str:
+    return f'W/"{int(exercise.updated_at.timestamp() * 1_000_000):x}"'
+
+def _accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().removeprefix("q=")
+            try:
+                return not params or float(quality) > 0
+            except ValueError:
+                return False
+    return False
+
 @router.get("/", response_model=List[Exercise])
-def list_exercises(
+async def list_exercises(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-) -> List[Exercise]:
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+) -> Union[List[Exercise], Response]:
     """
     Retrieve exercises with pagination.
+
+    Pass the X-Next-Cursor header of a response as `cursor` to get the next page.
+    Responses carry the catalog version as ETag; while it is unchanged,
+    If-None-Match is answered with 304 after reading only the version.
     """
-    return exercises.get_multi(db, skip=skip, limit=limit)
+    # Read from the same database as the page, replica or not, and before
+    # it, so a write landing meanwhile only makes the tag older than the
+    # page and the client fetches again
+    version = await read_catalog_version(db)
+    not_modified = conditional_response(
+        request, response, etag=version.etag, last_modified=version.changed_at
+    )
+    if not_modified:
+        return not_modified
+    items = await exercises.get_multi(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, exercises.keyset.next_cursor(items, limit))
+    return items
 
 @router.post("/", response_model=Exercise, status_code=201)
-def create_exercise(
+async def create_exercise(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     exercise_in: ExerciseCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> Exercise:
     """
     Create new exercise.
     """
-    return exercises.create(db, obj_in=exercise_in)
+    return await exercises.create(db, obj_in=exercise_in)
 
 @router.post("/generate", response_model=ExerciseCreate)
 async def generate_exercise(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     request: ExerciseGenerateRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> ExerciseCreate:
     """
     Generate exercise details using AI.
@@ -66,75 +113,171 @@ async def generate_exercise(
             detail=f"Failed to generate exercise: {str(e)}"
         )
 
+@router.get("/suggest", response_model=List[ExerciseSuggestion])
+async def suggest_exercises(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+) -> List[ExerciseSuggestion]:
+    """
+    Suggest exercises as a name is typed.
+
+    Names starting with `q` come first, then names with a later word
+    starting with it. Served from the exercise catalog (the shared catalog
+    file when EXERCISE_CATALOG_FILE is set).
+    """
+    return await active_catalog().suggest(db, q, limit=limit)
+
+@router.get("/snapshot", response_class=Response)
+async def get_exercise_snapshot(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+) -> Response:
+    """
+    The whole exercise library in one response, for offline clients.
+
+    The body is JSON: `version`, `since`, `count` and `exercises`, which
+    holds one array per field in catalog order. It is gzip-encoded for
+    clients that accept it. Built once per catalog version and revalidated
+    by ETag. Pass `since` to /exercises/changes to fetch later changes.
+    """
+    snapshot = await catalog_snapshots.get(db)
+    if _accepts_gzip(request):
+        response = Response(
+            snapshot.body, media_type="application/json", headers={"Content-Encoding": "gzip"}
+        )
+    else:
+        response = Response(gzip.decompress(snapshot.body), media_type="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+    return conditional_response(request, response, etag=snapshot.etag) or response
+
+@router.get("/changes", response_model=ExerciseChanges)
+async def get_exercise_changes(
+    since: datetime,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+) -> ExerciseChanges:
+    """
+    Exercises written and deleted since a cursor from /exercises/snapshot
+    or a previous call.
+
+    Exercises written just before the cursor may come again; apply
+    upserts by exercise_id. Deletes are kept for
+    EXERCISE_TOMBSTONE_RETENTION_DAYS; a cursor older than deletes since
+    pruned gets 410 and the client fetches the snapshot again.
+    """
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # The cursor is taken before the changes are read
+    version = await read_catalog_version(db)
+    upserts, deletes = await exercises.changes_since(db, since)
+    # and the pruning horizon after, so no prune can slip between them
+    pruned_to = await read_tombstones_pruned_to(db)
+    if pruned_to is not None and since < pruned_to:
+        raise HTTPException(
+            status_code=410,
+            detail=f"Deletes are kept for {settings.EXERCISE_TOMBSTONE_RETENTION_DAYS} days; "
+                   "fetch /exercises/snapshot again"
+        )
+    return ExerciseChanges(
+        since=since,
+        next_since=max(since, sync_cursor(db, version.read_at)),
+        count=len(upserts),
+        upserts=exercise_columns(upserts),
+        deletes=deletes
+    )
+
 @router.get("/{exercise_id}", response_model=Exercise)
-def get_exercise(
+async def get_exercise(
     exercise_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-) -> Exercise:
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+) -> Union[Exercise, Response]:
     """
     Get exercise by ID.
+
+    The ETag follows the exercise's updated_at. A matching If-None-Match
+    is answered with 304 and no body.
     """
-    exercise = exercises.get(db, id=exercise_id)
+    exercise = await exercises.get(db, id=exercise_id)
     if not exercise:
         raise HTTPException(
             status_code=404,
             detail="Exercise not found"
         )
-    return exercise
+    return conditional_response(
+        request, response, etag=_exercise_etag(exercise), last_modified=exercise.updated_at
+    ) or exercise
 
 @router.put("/{exercise_id}", response_model=Exercise)
-def update_exercise(
+async def update_exercise(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     exercise_id: UUID,
     exercise_in: ExerciseUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> Exercise:
     """
     Update exercise.
     """
-    exercise = exercises.get(db, id=exercise_id)
+    exercise = await exercises.get(db, id=exercise_id)
     if not exercise:
         raise HTTPException(
             status_code=404,
             detail="Exercise not found"
         )
-    exercise = exercises.update(db, db_obj=exercise, obj_in=exercise_in)
+    exercise = await exercises.update(db, db_obj=exercise, obj_in=exercise_in)
     return exercise
 
 @router.delete("/{exercise_id}", status_code=204)
-def delete_exercise(
+async def delete_exercise(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     exercise_id: UUID,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> None:
     """
     Delete exercise.
     """
-    exercise = exercises.get(db, id=exercise_id)
+    exercise = await exercises.get(db, id=exercise_id)
     if not exercise:
         raise HTTPException(
             status_code=404,
             detail="Exercise not found"
         )
-    exercises.remove(db, id=exercise_id)
+    await exercises.remove(db, id=exercise_id)
 
 @router.post("/search", response_model=List[Exercise])
-def search_exercises(
+async def search_exercises(
     *,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     search: ExerciseSearch,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> List[Exercise]:
     """
     Search exercises by various criteria.
+
+    `query` searches the name, description and instructions and ranks the
+    results by relevance; without it results come oldest first. Pass the
+    X-Next-Cursor header of a response as `cursor`, with the same body, to
+    get the next page.
     """
-    return exercises.search(
+    items = await exercises.search(
         db,
+        query=search.query,
         muscle_groups=search.muscle_groups,
         equipment=search.equipment,
         difficulty=search.difficulty,
-        name=search.name
-    ) 
\ No newline at end of file
+        name=search.name,
+        limit=limit,
+        cursor=cursor
+    )
+    set_next_cursor(response, exercises.search_keyset(search.query).next_cursor(items, limit))
+    return items
@@ -1,45 +1,50 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from datetime import date
 
 from app import crud, models, schemas
 from app.core import deps
-from app.core.deps import get_current_user
+from app.core.deps import get_current_principal
+from app.core.pagination import set_next_cursor
 
 router = APIRouter()
 
 @router.get("/me", response_model=List[schemas.UserMeasurement])
 async def get_my_measurements(
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: schemas.Principal = Depends(get_current_principal),
+    response: Response,
     skip: int = 0,
-    limit: int = Query(default=100, lte=100)
+    limit: int = Query(default=100, lte=100),
+    cursor: Optional[str] = None
 ) -> Any:
-    """Get current user's measurements"""
-    profile = crud.user_profile.get_by_user_id(db, user_id=current_user.id)
+    """Get current user's measurements, most recent first"""
+    profile = await crud.user_profile.get_by_user_id(db, user_id=current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    return crud.user_measurement.get_by_profile(
-        db, profile_id=profile.id, skip=skip, limit=limit
+    items = await crud.user_measurement.get_by_profile(
+        db, profile_id=profile.id, skip=skip, limit=limit, cursor=cursor
     )
+    set_next_cursor(response, crud.user_measurement.keyset.next_cursor(items, limit))
+    return items
 
 @router.post("/me", response_model=schemas.UserMeasurement)
 async def create_my_measurement(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     measurement_in: schemas.UserMeasurementCreate,
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.Principal = Depends(get_current_principal)
 ) -> Any:
     """Create a new measurement for current user"""
-    profile = crud.user_profile.get_by_user_id(db, user_id=current_user.id)
+    profile = await crud.user_profile.get_by_user_id(db, user_id=current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
     # Check if measurement for this date already exists
-    existing = crud.user_measurement.get_by_date(
+    existing = await crud.user_measurement.get_by_date(
         db, profile_id=profile.id, measurement_date=measurement_in.date
     )
     if existing:
@@ -48,20 +53,20 @@ async def create_my_measurement(
             detail="Measurement for this date already exists"
         )
     
-    return crud.user_measurement.create(db, obj_in=measurement_in, profile_id=profile.id)
+    return await crud.user_measurement.create(db, obj_in=measurement_in, profile_id=profile.id)
 
 @router.get("/me/{measurement_id}", response_model=schemas.UserMeasurement)
 async def get_my_measurement(
     measurement_id: UUID,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: schemas.Principal = Depends(get_current_principal)
 ) -> Any:
     """Get a specific measurement for current user"""
-    profile = crud.user_profile.get_by_user_id(db, user_id=current_user.id)
+    profile = await crud.user_profile.get_by_user_id(db, user_id=current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    measurement = crud.user_measurement.get(db, id=measurement_id)
+    measurement = await crud.user_measurement.get(db, id=measurement_id)
     if not measurement or measurement.profile_id != profile.id:
         raise HTTPException(status_code=404, detail="Measurement not found")
     return measurement
@@ -71,33 +76,33 @@ async def update_my_measurement(
     *,
     measurement_id: UUID,
     measurement_in: schemas.UserMeasurementUpdate,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: schemas.Principal = Depends(get_current_principal)
 ) -> Any:
     """Update a measurement for current user"""
-    profile = crud.user_profile.get_by_user_id(db, user_id=current_user.id)
+    profile = await crud.user_profile.get_by_user_id(db, user_id=current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    measurement = crud.user_measurement.get(db, id=measurement_id)
+    measurement = await crud.user_measurement.get(db, id=measurement_id)
     if not measurement or measurement.profile_id != profile.id:
         raise HTTPException(status_code=404, detail="Measurement not found")
     
-    return crud.user_measurement.update(db, db_obj=measurement, obj_in=measurement_in)
+    return await crud.user_measurement.update(db, db_obj=measurement, obj_in=measurement_in)
 
 @router.delete("/me/{measurement_id}", response_model=schemas.UserMeasurement)
 async def delete_my_measurement(
     measurement_id: UUID,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: schemas.Principal = Depends(get_current_principal)
 ) -> Any:
     """Delete a measurement for current user"""
-    profile = crud.user_profile.get_by_user_id(db, user_id=current_user.id)
+    profile = await crud.user_profile.get_by_user_id(db, user_id=current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    measurement = crud.user_measurement.get(db, id=measurement_id)
+    measurement = await crud.user_measurement.get(db, id=measurement_id)
     if not measurement or measurement.profile_id != profile.id:
         raise HTTPException(status_code=404, detail="Measurement not found")
     
-    return crud.user_measurement.remove(db, id=measurement_id) 
\ No newline at end of file
+    return await crud.user_measurement.remove(db, id=measurement_id) 
\ No newline at end of file
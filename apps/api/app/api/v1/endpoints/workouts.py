@@ -1,12 +1,13 @@
 from typing import List, Optional, Literal
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from pydantic import BaseModel, Field
 
-from app.core.deps import get_db, get_current_user
-from app.models.user import User
+from app.core.deps import get_db, get_read_db, get_current_principal
+from app.core.pagination import set_next_cursor
+from app.schemas.auth import Principal
 from app.schemas.workout import (
     WorkoutGenerationParams,
     WorkoutTemplate,
@@ -17,42 +18,58 @@ from app.schemas.workout import (
     WorkoutLogUpdate
 )
 from app.crud import workout_templates, workout_logs, exercises
+from app.crud import user_profile as user_profile_crud
 from app.services.ai.workout_generator import WorkoutGenerator
 
 router = APIRouter()
 
+async def _check_exercises_exist(db: AsyncSession, exercise_ids: List[UUID]) -> None:
+    """Raise 404 naming every exercise id without an exercise, in one query"""
+    missing = await exercises.exists_many(db, exercise_ids)
+    if len(missing) == 1:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Exercise with ID {missing[0]} not found"
+        )
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Exercises with IDs {', '.join(map(str, missing))} not found"
+        )
+
 # Workout Template endpoints
 @router.get("/templates/", response_model=List[WorkoutTemplate])
-def list_workout_templates(
+async def list_workout_templates(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ) -> List[WorkoutTemplate]:
     """
-    Retrieve workout templates for the current user.
+    Retrieve workout templates for the current user, newest first.
+
+    Pass the X-Next-Cursor header of a response as `cursor` to get the next page.
     """
-    return workout_templates.get_by_user(
-        db, user_id=current_user.id, skip=skip, limit=limit
+    items = await workout_templates.get_by_user(
+        db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor
     )
+    set_next_cursor(response, workout_templates.keyset.next_cursor(items, limit))
+    return items
 
 @router.post("/templates/", response_model=WorkoutTemplate, status_code=201)
-def create_workout_template(
+async def create_workout_template(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     template_in: WorkoutTemplateCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> WorkoutTemplate:
     """
     Create new workout template.
     """
     # Validate all exercise IDs exist
-    for exercise in template_in.exercises:
-        if not exercises.get(db, id=exercise.exercise_id):
-            raise HTTPException(
-                status_code=404,
-                detail=f"Exercise with ID {exercise.exercise_id} not found"
-            )
+    await _check_exercises_exist(db, [exercise.exercise_id for exercise in template_in.exercises])
     
     # Validate difficulty
     valid_difficulties = ["beginner", "intermediate", "advanced", "expert"]
@@ -62,20 +79,20 @@ def create_workout_template(
             detail=f"Invalid difficulty level. Must be one of: {', '.join(valid_difficulties)}"
         )
     
-    return workout_templates.create_with_user(
+    return await workout_templates.create_with_user(
         db, obj_in=template_in, user_id=current_user.id
     )
 
 @router.get("/templates/{template_id}", response_model=WorkoutTemplate)
-def get_workout_template(
+async def get_workout_template(
     template_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ) -> WorkoutTemplate:
     """
     Get specific workout template.
     """
-    template = workout_templates.get(db, id=template_id)
+    template = await workout_templates.get(db, id=template_id)
     if not template:
         raise HTTPException(
             status_code=404,
@@ -89,17 +106,17 @@ def get_workout_template(
     return template
 
 @router.put("/templates/{template_id}", response_model=WorkoutTemplate)
-def update_workout_template(
+async def update_workout_template(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     template_id: UUID,
     template_in: WorkoutTemplateUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> WorkoutTemplate:
     """
     Update workout template.
     """
-    template = workout_templates.get(db, id=template_id)
+    template = await workout_templates.get(db, id=template_id)
     if not template:
         raise HTTPException(
             status_code=404,
@@ -113,12 +130,7 @@ def update_workout_template(
     
     # Validate exercise IDs if provided
     if template_in.exercises:
-        for exercise in template_in.exercises:
-            if not exercises.get(db, id=exercise.exercise_id):
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Exercise with ID {exercise.exercise_id} not found"
-                )
+        await _check_exercises_exist(db, [exercise.exercise_id for exercise in template_in.exercises])
     
     # Validate difficulty if provided
     if template_in.difficulty:
@@ -129,21 +141,21 @@ def update_workout_template(
                 detail=f"Invalid difficulty level. Must be one of: {', '.join(valid_difficulties)}"
             )
     
-    return workout_templates.update(
+    return await workout_templates.update(
         db, db_obj=template, obj_in=template_in
     )
 
 @router.delete("/templates/{template_id}", status_code=204)
-def delete_workout_template(
+async def delete_workout_template(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     template_id: UUID,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> None:
     """
     Delete workout template.
     """
-    template = workout_templates.get(db, id=template_id)
+    template = await workout_templates.get(db, id=template_id)
     if not template:
         raise HTTPException(
             status_code=404,
@@ -154,20 +166,25 @@ def delete_workout_template(
             status_code=403,
             detail="Not enough permissions"
         )
-    workout_templates.remove(db, id=template_id)
+    await workout_templates.remove(db, id=template_id)
 
 # Workout Log endpoints
 @router.get("/logs/", response_model=List[WorkoutLog])
-def list_workout_logs(
+async def list_workout_logs(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ) -> List[WorkoutLog]:
     """
-    Retrieve workout logs for the current user.
+    Retrieve workout logs for the current user, most recent first.
+
+    Pass the X-Next-Cursor header of a response as `cursor` to get the next
+    page. Date range queries return every log in the range.
     """
     if start_date and end_date and start_date > end_date:
         raise HTTPException(
@@ -176,29 +193,31 @@ def list_workout_logs(
         )
     
     if start_date and end_date:
-        return workout_logs.get_user_logs_by_date_range(
+        return await workout_logs.get_user_logs_by_date_range(
             db,
             user_id=current_user.id,
             start_date=start_date,
             end_date=end_date
         )
-    return workout_logs.get_by_user(
-        db, user_id=current_user.id, skip=skip, limit=limit
+    items = await workout_logs.get_by_user(
+        db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor
     )
+    set_next_cursor(response, workout_logs.keyset.next_cursor(items, limit))
+    return items
 
 @router.post("/logs/", response_model=WorkoutLog, status_code=201)
-def create_workout_log(
+async def create_workout_log(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     log_in: WorkoutLogCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> WorkoutLog:
     """
     Create new workout log.
     """
     # Validate template if provided
     if log_in.template_id:
-        template = workout_templates.get(db, id=log_in.template_id)
+        template = await workout_templates.get(db, id=log_in.template_id)
         if not template:
             raise HTTPException(
                 status_code=404,
@@ -211,14 +230,10 @@ def create_workout_log(
             )
     
     # Validate all exercise IDs
+    await _check_exercises_exist(db, [exercise.exercise_id for exercise in log_in.exercises])
+
+    # Validate sets data
     for exercise in log_in.exercises:
-        if not exercises.get(db, id=exercise.exercise_id):
-            raise HTTPException(
-                status_code=404,
-                detail=f"Exercise with ID {exercise.exercise_id} not found"
-            )
-        
-        # Validate sets data
         for set_data in exercise.sets:
             if set_data.reps < 1:
                 raise HTTPException(
@@ -231,20 +246,20 @@ def create_workout_log(
                     detail="Weight must be greater than 0"
                 )
     
-    return workout_logs.create_with_user(
+    return await workout_logs.create_with_user(
         db, obj_in=log_in, user_id=current_user.id
     )
 
 @router.get("/logs/{log_id}", response_model=WorkoutLog)
-def get_workout_log(
+async def get_workout_log(
     log_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ) -> WorkoutLog:
     """
     Get specific workout log.
     """
-    log = workout_logs.get(db, id=log_id)
+    log = await workout_logs.get(db, id=log_id)
     if not log:
         raise HTTPException(
             status_code=404,
@@ -258,17 +273,17 @@ def get_workout_log(
     return log
 
 @router.put("/logs/{log_id}", response_model=WorkoutLog)
-def update_workout_log(
+async def update_workout_log(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     log_id: UUID,
     log_in: WorkoutLogUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> WorkoutLog:
     """
     Update workout log.
     """
-    log = workout_logs.get(db, id=log_id)
+    log = await workout_logs.get(db, id=log_id)
     if not log:
         raise HTTPException(
             status_code=404,
@@ -282,7 +297,7 @@ def update_workout_log(
     
     # Validate template if provided
     if log_in.template_id:
-        template = workout_templates.get(db, id=log_in.template_id)
+        template = await workout_templates.get(db, id=log_in.template_id)
         if not template:
             raise HTTPException(
                 status_code=404,
@@ -296,14 +311,10 @@ def update_workout_log(
     
     # Validate exercises if provided
     if log_in.exercises:
+        await _check_exercises_exist(db, [exercise.exercise_id for exercise in log_in.exercises])
+
+        # Validate sets data
         for exercise in log_in.exercises:
-            if not exercises.get(db, id=exercise.exercise_id):
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Exercise with ID {exercise.exercise_id} not found"
-                )
-            
-            # Validate sets data
             for set_data in exercise.sets:
                 if set_data.reps < 1:
                     raise HTTPException(
@@ -316,19 +327,19 @@ def update_workout_log(
                         detail="Weight must be greater than 0"
                     )
     
-    return workout_logs.update(db, db_obj=log, obj_in=log_in)
+    return await workout_logs.update(db, db_obj=log, obj_in=log_in)
 
 @router.delete("/logs/{log_id}", status_code=204)
-def delete_workout_log(
+async def delete_workout_log(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     log_id: UUID,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ) -> None:
     """
     Delete workout log.
     """
-    log = workout_logs.get(db, id=log_id)
+    log = await workout_logs.get(db, id=log_id)
     if not log:
         raise HTTPException(
             status_code=404,
@@ -339,13 +350,13 @@ def delete_workout_log(
             status_code=403,
             detail="Not enough permissions"
         )
-    workout_logs.remove(db, id=log_id)
+    await workout_logs.remove(db, id=log_id)
 
 @router.post("/generate", response_model=WorkoutTemplate)
 async def generate_workout(
     *,
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
     params: WorkoutGenerationParams
 ):
     """Generate a personalized workout using AI"""
@@ -353,11 +364,14 @@ async def generate_workout(
         # Initialize workout generator with database session
         generator = WorkoutGenerator(db)
         
+        # Relationships are not lazy-loaded on an AsyncSession, fetch the profile explicitly
+        profile = await user_profile_crud.get_by_user_id(db, user_id=current_user.id)
+        
         # Prepare user profile
         user_profile = {
-            "fitness_goals": current_user.profile.fitness_goals or ["general fitness"],
-            "available_equipment": current_user.profile.available_equipment or [],
-            "preferred_workout_duration": current_user.profile.preferred_workout_duration or 45,
+            "fitness_goals": profile.fitness_goals or ["general fitness"],
+            "available_equipment": profile.available_equipment or [],
+            "preferred_workout_duration": profile.preferred_workout_duration or 45,
             # Infer fitness level from goals and other data
             "fitness_level": "beginner"  # Default to beginner if no other info available
         }
@@ -372,11 +386,12 @@ async def generate_workout(
             "fitness_level": "beginner" if params.intensity == "light" else "intermediate" if params.intensity == "moderate" else "advanced"
         }
         
-        # Generate workout template
+        # Generate workout template; the generator releases the connection
+        # around its LLM calls so it is not held while the model responds
         template_in = await generator.generate_workout(user_profile, user_requirements)
         
         # Save the template
-        return workout_templates.create_with_user(
+        return await workout_templates.create_with_user(
             db=db,
             obj_in=template_in,
             user_id=current_user.id
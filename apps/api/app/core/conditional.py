@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Clients may keep responses but must revalidate them before each use;
+# responses need authentication, so shared caches must not keep them
+CACHE_CONTROL = "private, no-cache"
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have whole seconds
+    return last_modified.replace(microsecond=0) <= since
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    *,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """
+    Set ETag and Last-Modified on response, and return a 304 response if
+    the client's copy is still current.
+
+    If-None-Match takes precedence over If-Modified-Since, as RFC 9110
+    requires. Returns None when the full response should be sent.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif last_modified is not None and "If-Modified-Since" in request.headers:
+        fresh = _not_modified_since(request.headers["If-Modified-Since"], last_modified)
+    else:
+        fresh = False
+    return Response(status_code=304, headers=headers) if fresh else None
@@ -13,9 +13,73 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "fitholic"
     
+    # Database connection pool settings
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    
+    # Optional read replica for read-only endpoints (e.g. "replica-host:5432")
+    POSTGRES_REPLICA_SERVER: Optional[str] = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # fall back to the primary beyond this lag
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 10.0
+    
+    # Statement caching: compiled SQL per engine, prepared statements per connection
+    DB_STATEMENT_CACHE_ENABLED: bool = True
+    DB_COMPILED_CACHE_SIZE: int = 1000
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 256
+    
     # Security settings
     SECRET_KEY: str = "your-secret-key"  # TODO: Change in production
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # Access tokens are short lived; clients renew them at /auth/refresh
+    # instead of logging in with a password again
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Accept tokens whose subject is the email rather than the user id. Turn
+    # off once the last of them has expired (they were issued for 8 days)
+    LEGACY_EMAIL_TOKENS_ACCEPTED: bool = True
+    
+    # bcrypt runs in its own thread pool; login and register answer 503 once
+    # PASSWORD_HASH_MAX_QUEUE calls are already waiting for a worker
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    
+    # Verified access token claims, so repeat requests skip the JWT decode
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_TTL_SECONDS: float = 300.0  # never beyond the token's exp
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    
+    # Authenticated user cache used by get_current_user
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    
+    # Trigram similarity (0-1) a generated exercise name needs to reuse an
+    # existing exercise instead of generating a new one
+    EXERCISE_NAME_MATCH_THRESHOLD: float = 0.5
+    
+    # Cosine similarity (0-1) of name, muscle groups and equipment at which
+    # a generated exercise whose name matched nothing reuses an existing one
+    EXERCISE_SIMILARITY_THRESHOLD: float = 0.8
+    
+    # Rows the admin bulk import validates and commits together
+    EXERCISE_IMPORT_BATCH_SIZE: int = 1000
+    
+    # Catalog sync, for offline clients and each worker's catalog index: how
+    # far back each sync reaches, so writes whose transactions were still
+    # open during the last sync are not missed, and how long deletes are
+    # remembered for copies that have not synced
+    EXERCISE_SYNC_OVERLAP_SECONDS: float = 60.0
+    EXERCISE_TOMBSTONE_RETENTION_DAYS: int = 30
+    
+    # File of the exercise catalog that all workers map, for ExerciseService
+    # lookups and name suggestions (see app/services/catalog/shared.py);
+    # unset keeps a catalog per worker. After a write the file is rebuilt,
+    # at most once per this many seconds across workers, as each build
+    # reads the whole table
+    EXERCISE_CATALOG_FILE: Optional[str] = None
+    EXERCISE_CATALOG_FILE_REBUILD_INTERVAL_SECONDS: float = 30.0
     
     # Frontend URLs
     FRONTEND_URL: str = "app://fitholic.com"  # Mobile app URL
@@ -45,6 +109,18 @@ class Settings(BaseSettings):
         """Get the database URL."""
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
+    @property
+    def get_async_database_url(self) -> str:
+        """Get the database URL for the asyncpg driver."""
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+
+    @property
+    def get_async_replica_database_url(self) -> Optional[str]:
+        """Get the read replica URL for the asyncpg driver, if a replica is configured."""
+        if not self.POSTGRES_REPLICA_SERVER:
+            return None
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_REPLICA_SERVER}/{self.POSTGRES_DB}"
+
     class Config:
         env_file = ".env"
 
@@ -1,16 +1,219 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from .config import settings
+from .logging import get_logger
+from .pool import PoolMetrics, instrumented_pool_class
 
-engine = create_engine(settings.get_database_url)
+logger = get_logger(__name__)
+
+pool_options: Dict[str, Any] = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+# Synchronous engine, kept for Alembic and standalone scripts
+engine = create_engine(settings.get_database_url, **pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Statements executed and pool metrics per async engine, keyed by engine name
+query_counts: Dict[str, int] = {}
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+def statement_cache_options(enabled: bool) -> Dict[str, Any]:
+    """
+    Engine options for SQLAlchemy's compiled cache and asyncpg's prepared statements.
+
+    With both enabled, a repeated query shape skips SQL compilation in Python
+    and, once Postgres switches to a generic plan, planning on the server.
+    """
+    if not enabled:
+        return {"query_cache_size": 0, "connect_args": {"prepared_statement_cache_size": 0}}
+    return {
+        "query_cache_size": settings.DB_COMPILED_CACHE_SIZE,
+        "connect_args": {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE},
+    }
+
+def _create_async_engine(
+    name: str, url: str, statement_cache: bool = settings.DB_STATEMENT_CACHE_ENABLED
+) -> AsyncEngine:
+    metrics = PoolMetrics()
+    async_engine = create_async_engine(
+        url,
+        poolclass=instrumented_pool_class(metrics),
+        **pool_options,
+        **statement_cache_options(statement_cache)
+    )
+    pool_metrics[name] = metrics
+    query_counts[name] = 0
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        query_counts[name] += 1
+
+    return async_engine
+
+def _create_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+# Async engine used by the API request handlers
+async_engine = _create_async_engine("primary", settings.get_async_database_url)
+AsyncSessionLocal = _create_session_factory(async_engine)
+
+# Optional read replica, only used through session_router
+replica_engine: Optional[AsyncEngine] = None
+ReplicaSessionLocal: Optional[async_sessionmaker] = None
+if settings.get_async_replica_database_url:
+    replica_engine = _create_async_engine("replica", settings.get_async_replica_database_url)
+    ReplicaSessionLocal = _create_session_factory(replica_engine)
+
 Base = declarative_base()
 
-# Dependency
+class EagerDefaultsMixin:
+    """Fetches server-generated columns such as created_at/updated_at with RETURNING on flush"""
+    __mapper_args__ = {"eager_defaults": True}
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything
+# it received, or when the server is not a standby at all
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class SessionRouter:
+    """
+    Chooses the engine for read-only sessions.
+
+    Reads go to the replica while it is reachable and within
+    DB_REPLICA_MAX_LAG_SECONDS of the primary, otherwise they fall back to the
+    primary. Replica health is re-checked at most every check_interval seconds.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replica: Optional[async_sessionmaker] = None,
+        max_lag: float = settings.DB_REPLICA_MAX_LAG_SECONDS,
+        check_interval: float = settings.DB_REPLICA_CHECK_INTERVAL_SECONDS
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replica_healthy = False
+        self.replica_lag: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _check_due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    async def _check_replica(self) -> None:
+        try:
+            async with self.replica.kw["bind"].connect() as connection:
+                lag = await connection.scalar(REPLICA_LAG_SQL)
+            self.replica_lag = float(lag)
+            self.replica_healthy = self.replica_lag <= self.max_lag
+            if not self.replica_healthy:
+                logger.warning(f"Read replica is {self.replica_lag:.1f}s behind, reading from primary")
+        except Exception as e:
+            logger.warning(f"Read replica unavailable, reading from primary: {str(e)}")
+            self.replica_healthy = False
+            self.replica_lag = None
+        self._checked_at = time.monotonic()
+
+    async def replica_available(self) -> bool:
+        if self.replica is None:
+            return False
+        if self._check_due():
+            async with self._lock:
+                if self._check_due():
+                    await self._check_replica()
+        return self.replica_healthy
+
+    def mark_replica_unhealthy(self) -> None:
+        """Stop routing to the replica until the next health check"""
+        self.replica_healthy = False
+        self._checked_at = time.monotonic()
+
+    async def read_session(self) -> AsyncSession:
+        if await self.replica_available():
+            return self.replica()
+        return self.primary()
+
+session_router = SessionRouter(AsyncSessionLocal, ReplicaSessionLocal)
+
+# Track writes flushed into the open transaction, which release_connection
+# would otherwise silently roll back
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    session.info["has_writes"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_writes(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("has_writes", None)
+
+async def release_connection(db: AsyncSession) -> None:
+    """
+    Return the session's pooled connection before a long await such as an LLM call.
+
+    Loaded objects are detached but stay readable, and the session checks out a
+    fresh connection on its next query. The unit of work is only committed at
+    the end of the request, so call this between a read phase and the writes
+    that follow it.
+    """
+    if db.new or db.dirty or db.deleted or db.info.get("has_writes"):
+        raise RuntimeError("Cannot release a connection with pending changes")
+    await db.close()
+
+def get_pool_status(name: str = "primary") -> Dict[str, Any]:
+    """Live connection pool metrics for the named async engine"""
+    named_engine = replica_engine if name == "replica" else async_engine
+    return pool_metrics[name].snapshot(named_engine.pool)
+
+def get_engine_status() -> List[Dict[str, Any]]:
+    """Query counts and pool metrics for the primary and, if configured, the replica"""
+    engines = [{
+        "name": "primary",
+        "available": True,
+        "replication_lag_seconds": None,
+        "queries": query_counts["primary"],
+        "pool": get_pool_status("primary")
+    }]
+    if replica_engine is not None:
+        engines.append({
+            "name": "replica",
+            "available": session_router.replica_healthy,
+            "replication_lag_seconds": session_router.replica_lag,
+            "queries": query_counts["replica"],
+            "pool": get_pool_status("replica")
+        })
+    return engines
+
+# Dependency for synchronous scripts; request handlers use app.core.deps.get_db
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
@@ -1,57 +1,121 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from jose import JWTError
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 
 from app.core.config import settings
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal, replica_engine, session_router
+from app.core.principal import cache_principal, get_cached_principal
+from app.core.security import decode_access_token
 from app.models.user import User
 from app.services.user import get_user_by_email
-from app.schemas.auth import TokenPayload
+from app.schemas.auth import Principal, TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login",
     scheme_name="JWT"
 )
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Request-scoped unit of work.
+    
+    CRUD methods and services only flush. Everything the request wrote is
+    committed once after the handler returns, or rolled back if it raises.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            if db.in_transaction():
+                await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only handlers, served by the read replica when it is healthy.
+    
+    Handlers that write, or that must see their own writes, use get_db instead.
+    """
+    db = await session_router.read_session()
     try:
-        db = SessionLocal()
         yield db
+    except (DBAPIError, OSError):
+        if replica_engine is not None and db.bind is replica_engine:
+            session_router.mark_replica_unhealthy()
+        raise
     finally:
-        db.close()
+        await db.close()
 
-async def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+inactive_user_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Inactive user"
+)
+
+def decode_token(token: str = Depends(oauth2_scheme)) -> TokenPayload:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=["HS256"]
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        token_data = TokenPayload(**decode_access_token(token))
     except (JWTError, ValidationError):
         raise credentials_exception
-    
-    user = get_user_by_email(db, email=email)
-    if user is None:
+    if token_data.user_id is None and not settings.LEGACY_EMAIL_TOKENS_ACCEPTED:
         raise credentials_exception
+    return token_data
+
+async def _load_user(db: AsyncSession, token_data: TokenPayload) -> User:
+    user = get_cached_principal(token_data.sub)
+    if user is None:
+        if token_data.user_id is not None:
+            user = await db.get(User, token_data.user_id)
+        else:
+            # Tokens issued before subjects were user ids carry the email
+            user = await get_user_by_email(db, email=token_data.sub)
+        if user is None:
+            raise credentials_exception
+        cache_principal(token_data.sub, user)
+    return user
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
+    token_data: TokenPayload = Depends(decode_token)
+) -> User:
+    user = await _load_user(db, token_data)
     if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
-        )
+        raise inactive_user_exception
     return user
 
+async def get_current_principal(
+    db: AsyncSession = Depends(get_db),
+    token_data: TokenPayload = Depends(decode_token)
+) -> Principal:
+    """
+    The authenticated user's id and flags, taken from the token claims.
+    
+    For handlers that only need the user id, such as ownership checks. No
+    users row is loaded unless the token predates the claims. Use
+    get_current_user where the full, current row matters.
+    """
+    if token_data.user_id is not None and token_data.is_active is not None:
+        principal = Principal(
+            id=token_data.user_id,
+            is_active=token_data.is_active,
+            is_superuser=bool(token_data.is_superuser)
+        )
+    else:
+        principal = Principal.model_validate(await _load_user(db, token_data))
+    if not principal.is_active:
+        raise inactive_user_exception
+    return principal
+
 async def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
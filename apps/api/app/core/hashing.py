@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+ResultType = TypeVar("ResultType")
+
+class PasswordHasherBusy(HTTPException):
+    """Raised when the hashing queue is full"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, try again shortly",
+            headers={"Retry-After": "1"}
+        )
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a small dedicated thread pool instead of on the event loop.
+
+    A single bcrypt call costs tens of milliseconds of CPU. bcrypt releases
+    the GIL, so the loop keeps serving other requests while workers hash.
+    At most max_queue calls wait for a worker. Beyond that, calls fail fast
+    with PasswordHasherBusy rather than queueing without bound during a login
+    storm.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.queued = 0
+        self.running = 0
+        self.queue_depth_max = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def _run(self, func: Callable[..., ResultType], *args: Any) -> ResultType:
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.queued += 1
+            self.queue_depth_max = max(self.queue_depth_max, self.queued)
+        submitted = time.perf_counter()
+        dequeued = False
+
+        def leave_queue() -> None:
+            # Runs under self._lock, from whichever side gets there first
+            nonlocal dequeued
+            if not dequeued:
+                dequeued = True
+                self.queued -= 1
+
+        def call() -> ResultType:
+            waited = time.perf_counter() - submitted
+            with self._lock:
+                leave_queue()
+                self.running += 1
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            # A call cancelled while still queued never reaches call()
+            with self._lock:
+                leave_queue()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so the pool can start again after shutdown()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="password-hasher"
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.queued,
+                "queue_depth_max": self.queue_depth_max,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_time_avg_ms": round(self.wait_time_total / started * 1000, 3) if started else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+# Response header carrying the cursor of the next page; list bodies stay plain arrays
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class Keyset:
+    """
+    Keyset (cursor) pagination over an ordered, unique tuple of columns.
+
+    Pages continue from the last row of the previous page with a row
+    comparison, so deep pages use the same index range scan as the first.
+    Cursors are opaque URL-safe strings encoding that last row's key.
+    """
+
+    def __init__(self, *columns: InstrumentedAttribute, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+
+    def encode(self, obj: Any) -> str:
+        values = [getattr(obj, column.key) for column in self.columns]
+        raw = json.dumps(
+            [value.isoformat() if isinstance(value, (date, datetime)) else str(value) for value in values]
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError("Wrong number of cursor values")
+            return [self._parse(column, value) for column, value in zip(self.columns, values)]
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    def _parse(column: InstrumentedAttribute, value: str) -> Any:
+        python_type = column.type.python_type
+        if python_type in (date, datetime):
+            return python_type.fromisoformat(value)
+        return python_type(value)
+
+    def apply(self, query: Select, cursor: Optional[str], limit: int) -> Select:
+        """Order the query by the key columns and start after the cursor"""
+        if cursor:
+            key = tuple_(*self.columns)
+            values = tuple_(*self.decode(cursor))
+            query = query.where(key < values if self.descending else key > values)
+        order_by = [column.desc() if self.descending else column.asc() for column in self.columns]
+        return query.order_by(*order_by).limit(limit)
+
+    def next_cursor(self, items: Sequence[Any], limit: int) -> Optional[str]:
+        """Cursor for the page after items, or None if this was the last page"""
+        if len(items) < limit:
+            return None
+        return self.encode(items[-1])
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
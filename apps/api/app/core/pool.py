@@ -0,0 +1,79 @@
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+class PoolMetrics:
+    """Counters for connection checkouts on a single engine's pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """Combine the recorded counters with the live state of the pool"""
+        with self._lock:
+            checkouts = self.checkouts
+            wait_total = self.wait_time_total
+            wait_max = self.wait_time_max
+            timeouts = self.timeouts
+
+        return {
+            "pool_size": pool.size(),
+            "max_overflow": getattr(pool, "_max_overflow", 0),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # overflow() starts at -pool_size until the pool has filled up
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_time_total_ms": round(wait_total * 1000, 3),
+            "wait_time_avg_ms": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_time_max_ms": round(wait_max * 1000, 3),
+        }
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time and timeouts"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self.metrics.record_wait(time.perf_counter() - start)
+
+def instrumented_pool_class(metrics: PoolMetrics) -> Type[InstrumentedAsyncQueuePool]:
+    """
+    Bind a metrics instance to a pool class.
+
+    Engines rebuild their pool on dispose() from the class alone, so the metrics
+    live on the class rather than on the pool instance.
+    """
+    return type(
+        "InstrumentedAsyncQueuePool",
+        (InstrumentedAsyncQueuePool,),
+        {"metrics": metrics}
+    )
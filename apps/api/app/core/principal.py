@@ -0,0 +1,66 @@
+"""
+Cache of authenticated principals, so get_current_user skips the users table.
+
+Entries hold the user's column values keyed by the token subject. Any
+update or delete of a user invalidates its entries once the transaction
+commits. The TTL bounds how stale other worker processes can be.
+"""
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+principal_cache: TTLCache[str, Dict[str, Any]] = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+def _subjects(user: User) -> set:
+    """Every subject a user's cache entries may be stored under"""
+    state = inspect(user)
+    subjects = {str(user.id), user.email}
+    subjects.update(state.attrs.email.history.deleted or ())
+    return {subject for subject in subjects if subject}
+
+def get_cached_principal(subject: str) -> Optional[User]:
+    """A detached User built from the cache, or None on a miss"""
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        return None
+    values = principal_cache.get(subject)
+    if values is None:
+        return None
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+def cache_principal(subject: str, user: User) -> None:
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        return
+    values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    principal_cache.set(subject, values)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = [obj for obj in session.dirty if isinstance(obj, User)]
+    changed += [obj for obj in session.deleted if isinstance(obj, User)]
+    if changed:
+        subjects = session.info.setdefault("changed_principals", set())
+        for user in changed:
+            for subject in _subjects(user):
+                # Drop now as well; after_commit drops anything a concurrent
+                # request re-cached from the pre-commit row
+                principal_cache.pop(subject)
+                subjects.add(subject)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for subject in session.info.pop("changed_principals", ()):
+        principal_cache.pop(subject)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changed_users(session, previous_transaction):
+    session.info.pop("changed_principals", None)
@@ -1,11 +1,21 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from .cache import TTLCache
 from .config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verified claims keyed by the SHA-256 of the token; entries never outlive
+# the token's exp
+token_cache: TTLCache[bytes, Dict[str, Any]] = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -21,3 +31,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify an access token and return its claims.
+    
+    Clients send the same token on every request, so verified claims are
+    memoized until the token expires. Raises JWTError for invalid tokens,
+    which are never cached.
+    """
+    if not settings.TOKEN_CACHE_ENABLED:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        expires_in = claims.get("exp", 0) - time.time()
+        if expires_in > 0:
+            token_cache.set(key, claims, ttl=min(expires_in, token_cache.ttl))
+    return claims
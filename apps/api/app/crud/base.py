@@ -1,16 +1,21 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 from uuid import UUID
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import any_, delete, insert, inspect, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import Base
+from app.core.pagination import Keyset
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Page order for cursor pagination; subclasses may override it
+    keyset: Optional[Keyset] = None
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -24,46 +29,148 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             (column.name for column in model.__table__.columns if column.primary_key),
             "id"
         )
+        # Default page order: oldest first, with the id as tie-breaker
+        if self.keyset is None:
+            id_column = getattr(model, self.id_field)
+            if hasattr(model, "created_at"):
+                self.keyset = Keyset(model.created_at, id_column)
+            else:
+                self.keyset = Keyset(id_column)
+        # Attribute names of the mapped columns, used to filter incoming data
+        self.column_keys = frozenset(attr.key for attr in inspect(model).column_attrs)
+
+    def _column_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in data.items() if key in self.column_keys}
+
+    async def get(self, db: AsyncSession, id: UUID) -> Optional[ModelType]:
+        return await db.get(self.model, id)
+
+    def _id_in(self, ids: Sequence[UUID]):
+        # "id = ANY(:ids)" binds the ids as one array parameter, so the
+        # statement text, and its prepared statement, is the same for any count
+        id_column = getattr(self.model, self.id_field)
+        return id_column == any_(literal(list(ids), ARRAY(id_column.type)))
+
+    async def get_many(self, db: AsyncSession, ids: Sequence[UUID]) -> List[ModelType]:
+        """
+        Get the rows with the given ids in one query.
+
+        Ids without a row are left out; the order of the rows is undefined.
+        """
+        if not ids:
+            return []
+        result = await db.scalars(select(self.model).where(self._id_in(ids)))
+        return list(result.all())
+
+    async def exists_many(self, db: AsyncSession, ids: Sequence[UUID]) -> List[UUID]:
+        """
+        Check in one query that rows with the given ids exist.
 
-    def get(self, db: Session, id: UUID) -> Optional[ModelType]:
-        return db.query(self.model).filter(getattr(self.model, self.id_field) == id).first()
+        Returns the ids without a row, in the order given and without
+        repeats; an empty list means all of them exist.
+        """
+        wanted = list(dict.fromkeys(ids))
+        if not wanted:
+            return []
+        id_column = getattr(self.model, self.id_field)
+        found = set((await db.scalars(select(id_column).where(self._id_in(wanted)))).all())
+        return [id for id in wanted if id not in found]
 
-    def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        query = self.keyset.apply(select(self.model), cursor, limit)
+        result = await db.scalars(query.offset(skip))
+        return list(result.all())
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        # Server defaults come back through RETURNING (eager_defaults), so no
+        # refresh is needed. The request's unit of work commits (see deps.get_db)
+        db_obj = self.model(**self._column_values(obj_in.model_dump()))
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
         return db_obj
 
-    def update(
+    async def create_many(
         self,
-        db: Session,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]]
+    ) -> List[ModelType]:
+        """
+        Insert many rows.
+
+        Rows are sent as multi-row INSERT ... RETURNING statements, one round
+        trip per batch of insertmanyvalues_page_size rows (1000 by default).
+        The returned objects are in the same order as objs_in.
+        """
+        if not objs_in:
+            return []
+        rows = [
+            self._column_values(obj_in if isinstance(obj_in, dict) else obj_in.model_dump())
+            for obj_in in objs_in
+        ]
+        result = await db.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            rows
+        )
+        return list(result.all())
+
+    async def update(
+        self,
+        db: AsyncSession,
         *,
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in self._column_values(update_data).items():
+            setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
         return db_obj
 
-    def remove(self, db: Session, *, id: UUID) -> ModelType:
-        obj = db.query(self.model).filter(getattr(self.model, self.id_field) == id).first()
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Dict[UUID, Union[UpdateSchemaType, Dict[str, Any]]]
+    ) -> None:
+        """
+        Update many rows by primary key.
+
+        objs_in maps each id to its changes. Rows changing the same set of
+        columns are sent together as a single executemany UPDATE.
+        """
+        rows = []
+        for id, obj_in in objs_in.items():
+            if isinstance(obj_in, dict):
+                update_data = obj_in
+            else:
+                update_data = obj_in.model_dump(exclude_unset=True)
+            update_data = self._column_values(update_data)
+            if update_data:
+                rows.append({**update_data, self.id_field: id})
+        if not rows:
+            return
+        await db.execute(update(self.model), rows)
+
+    async def remove(self, db: AsyncSession, *, id: UUID) -> ModelType:
+        obj = await db.get(self.model, id)
         if obj:
-            db.delete(obj)
-            db.commit()
-        return obj 
\ No newline at end of file
+            await db.delete(obj)
+            await db.flush()
+        return obj
+
+    async def remove_many(self, db: AsyncSession, *, ids: Sequence[UUID]) -> List[UUID]:
+        """Delete many rows in one statement and return the ids that existed"""
+        if not ids:
+            return []
+        id_column = getattr(self.model, self.id_field)
+        result = await db.scalars(
+            delete(self.model).where(id_column.in_(ids)).returning(id_column)
+        )
+        return list(result.all())
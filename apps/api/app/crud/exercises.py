@@ -1,36 +1,172 @@
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Dict, Any, Sequence, Tuple, Union
 from uuid import UUID
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import Float, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import with_expression
 
+from app.core.config import settings
+from app.core.pagination import Keyset
 from app.crud.base import CRUDBase
-from app.models.exercise import Exercise
+from app.models.exercise import SEARCH_CONFIG, Exercise, ExerciseTombstone
 from app.schemas.exercise import ExerciseCreate, ExerciseUpdate
+from app.services.catalog import track_exercise_changes
+from app.services.catalog.version import record_tombstones_pruned
 
 class CRUDExercise(CRUDBase[Exercise, ExerciseCreate, ExerciseUpdate]):
-    def search(
+    # Bulk statements skip the unit of work, so tell the catalog index what
+    # they changed; single-row writes are picked up after flush
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[Union[ExerciseCreate, Dict[str, Any]]]
+    ) -> List[Exercise]:
+        created = await super().create_many(db, objs_in=objs_in)
+        track_exercise_changes(db.sync_session, exercises=created)
+        return created
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Dict[UUID, Union[ExerciseUpdate, Dict[str, Any]]]
+    ) -> None:
+        await super().update_many(db, objs_in=objs_in)
+        track_exercise_changes(db.sync_session, stale_ids=objs_in)
+
+    async def remove(self, db: AsyncSession, *, id: UUID) -> Exercise:
+        obj = await super().remove(db, id=id)
+        if obj:
+            await self._record_deletes(db, [id])
+        return obj
+
+    async def remove_many(self, db: AsyncSession, *, ids: Sequence[UUID]) -> List[UUID]:
+        removed = await super().remove_many(db, ids=ids)
+        track_exercise_changes(db.sync_session, deleted_ids=removed)
+        await self._record_deletes(db, removed)
+        return removed
+
+    async def _record_deletes(self, db: AsyncSession, ids: Sequence[UUID]) -> None:
+        """Leave tombstones for syncing clients, and prune expired ones"""
+        if not ids:
+            return
+        statement = insert(ExerciseTombstone).values([{"exercise_id": id} for id in ids])
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[ExerciseTombstone.exercise_id],
+            set_={"deleted_at": statement.excluded.deleted_at}
+        ))
+        retention = timedelta(days=settings.EXERCISE_TOMBSTONE_RETENTION_DAYS)
+        pruned = await db.scalars(
+            delete(ExerciseTombstone)
+            .where(ExerciseTombstone.deleted_at < func.now() - retention)
+            .returning(ExerciseTombstone.deleted_at)
+        )
+        pruned_to = max(pruned.all(), default=None)
+        if pruned_to is not None:
+            # Cursors before it can no longer be answered with /changes
+            await db.execute(record_tombstones_pruned(pruned_to))
+
+    async def names(self, db: AsyncSession, ids: Sequence[UUID]) -> Dict[UUID, str]:
+        """Names of the exercises with these ids, leaving out missing ones"""
+        if not ids:
+            return {}
+        result = await db.execute(select(self.model.exercise_id, self.model.name).where(self._id_in(ids)))
+        return dict(result.tuples().all())
+
+    async def stream_names(
+        self, db: AsyncSession, batch_size: int = 10000
+    ) -> AsyncIterator[List[Tuple[UUID, str]]]:
+        """Ids and names of every exercise, oldest first, a batch at a time"""
+        result = await db.stream(
+            select(self.model.exercise_id, self.model.name)
+            .order_by(self.model.created_at, self.model.exercise_id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for batch in result.tuples().partitions():
+            yield batch
+
+    async def changes_since(
+        self, db: AsyncSession, since: datetime
+    ) -> Tuple[List[Exercise], List[UUID]]:
+        """
+        Exercises written after since, oldest write first, and the ids of
+        exercises deleted after since
+        """
+        upserts = await db.scalars(
+            select(self.model)
+            .where(self.model.updated_at > since)
+            .order_by(self.model.updated_at, self.model.exercise_id)
+        )
+        deletes = await db.scalars(
+            select(ExerciseTombstone.exercise_id)
+            .where(ExerciseTombstone.deleted_at > since)
+            .order_by(ExerciseTombstone.deleted_at)
+        )
+        return list(upserts.all()), list(deletes.all())
+
+    def search_keyset(self, query: Optional[str] = None) -> Keyset:
+        """
+        Page order of search results: by relevance to a text query, best
+        first, otherwise the default oldest first
+        """
+        if not query:
+            return self.keyset
+        rank = func.ts_rank_cd(
+            self.model.search_vector,
+            func.websearch_to_tsquery(SEARCH_CONFIG, query),
+            type_=Float
+        ).label("search_rank")
+        return Keyset(rank, self.model.exercise_id, descending=True)
+
+    async def search(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
+        query: Optional[str] = None,
         muscle_groups: Optional[List[str]] = None,
         equipment: Optional[List[str]] = None,
         difficulty: Optional[str] = None,
-        name: Optional[str] = None
+        name: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Exercise]:
-        query = db.query(self.model)
-        
+        """
+        Exercises matching every given filter, a page at a time.
+
+        query is full-text search over name, description and instructions
+        (web search syntax: quoted phrases, "or", -excluded words), served
+        by the GIN index on search_vector; results then come best match
+        first with search_rank set. The other filters narrow the matches:
+        any of the muscle groups, any of the equipment, the difficulty,
+        and a name substring.
+        """
+        statement = select(self.model)
+
+        if query:
+            keyset = self.search_keyset(query)
+            rank = keyset.columns[0]
+            statement = statement.where(
+                self.model.search_vector.bool_op("@@")(func.websearch_to_tsquery(SEARCH_CONFIG, query))
+            ).options(with_expression(self.model.search_rank, rank))
+        else:
+            keyset = self.keyset
+
         if muscle_groups:
-            query = query.filter(self.model.muscle_groups.overlap(muscle_groups))
-        
+            statement = statement.where(self.model.muscle_groups.overlap(muscle_groups))
+
         if equipment:
-            query = query.filter(self.model.equipment.overlap(equipment))
-            
+            statement = statement.where(self.model.equipment.overlap(equipment))
+
         if difficulty:
-            query = query.filter(self.model.difficulty == difficulty)
-            
+            statement = statement.where(self.model.difficulty == difficulty)
+
         if name:
-            query = query.filter(self.model.name.ilike(f"%{name}%"))
-            
-        return query.all()
+            statement = statement.where(self.model.name.ilike(f"%{name}%"))
+
+        result = await db.scalars(keyset.apply(statement, cursor, limit))
+        return list(result.all())
 
 exercises = CRUDExercise(Exercise) 
\ No newline at end of file
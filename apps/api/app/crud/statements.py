@@ -0,0 +1,45 @@
+"""
+Pre-built statements for the queries every request runs.
+
+Each function returns a lambda statement. SQLAlchemy builds and caches the
+statement and its cache key once per call site, and each call only
+extracts the new parameter values. With DB_STATEMENT_CACHE_ENABLED off, a
+plain statement is built on every call instead.
+"""
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import Executable, lambda_stmt, select
+
+from app.core.config import settings
+from app.models.chat import ChatMessage
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.models.user_profile import UserProfile
+
+def _statement(build: Callable[[], Executable]) -> Executable:
+    if settings.DB_STATEMENT_CACHE_ENABLED:
+        return lambda_stmt(build)
+    return build()
+
+def user_by_email(email: str) -> Executable:
+    return _statement(lambda: select(User).where(User.email == email).limit(1))
+
+def refresh_token_with_user(token_hash: str) -> Executable:
+    return _statement(
+        lambda: select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == token_hash)
+    )
+
+def profile_by_user_id(user_id: UUID) -> Executable:
+    return _statement(lambda: select(UserProfile).where(UserProfile.user_id == user_id).limit(1))
+
+def latest_chat_messages(session_id: str, limit: int) -> Executable:
+    """First page of a session's history, newest first (see message_keyset)"""
+    return _statement(
+        lambda: select(ChatMessage)
+        .where(ChatMessage.session_id == session_id)
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.message_id.desc())
+        .limit(limit)
+    )
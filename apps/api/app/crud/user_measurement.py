@@ -1,53 +1,59 @@
 from typing import Optional, List, Dict, Any, Union
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 
+from app.core.pagination import Keyset
 from app.crud.base import CRUDBase
 from app.models.user_measurement import UserMeasurement
 from app.schemas.user_measurement import UserMeasurementCreate, UserMeasurementUpdate
 
 class CRUDUserMeasurement(CRUDBase[UserMeasurement, UserMeasurementCreate, UserMeasurementUpdate]):
-    def get_by_profile(
-        self, db: Session, *, profile_id: UUID, skip: int = 0, limit: int = 100
+    # Most recent measurements first
+    keyset = Keyset(UserMeasurement.date, UserMeasurement.id, descending=True)
+
+    async def get_by_profile(
+        self,
+        db: AsyncSession,
+        *,
+        profile_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[UserMeasurement]:
         """Get all measurements for a profile"""
-        return (
-            db.query(self.model)
-            .filter(self.model.profile_id == profile_id)
-            .order_by(self.model.date.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = select(self.model).where(self.model.profile_id == profile_id)
+        result = await db.scalars(self.keyset.apply(query, cursor, limit).offset(skip))
+        return list(result.all())
 
-    def get_by_date(
-        self, db: Session, *, profile_id: UUID, measurement_date: date
+    async def get_by_date(
+        self, db: AsyncSession, *, profile_id: UUID, measurement_date: date
     ) -> Optional[UserMeasurement]:
         """Get a measurement for a specific date"""
-        return (
-            db.query(self.model)
-            .filter(
+        result = await db.scalars(
+            select(self.model)
+            .where(
                 self.model.profile_id == profile_id,
                 self.model.date == measurement_date
             )
-            .first()
+            .limit(1)
         )
+        return result.first()
     
-    def create(
-        self, db: Session, *, obj_in: UserMeasurementCreate, profile_id: UUID
+    async def create(
+        self, db: AsyncSession, *, obj_in: UserMeasurementCreate, profile_id: UUID
     ) -> UserMeasurement:
         """Create a new measurement with profile_id"""
         obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data, profile_id=profile_id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
         return db_obj
     
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         db_obj: UserMeasurement,
         obj_in: Union[UserMeasurementUpdate, Dict[str, Any]]
@@ -61,6 +67,6 @@ class CRUDUserMeasurement(CRUDBase[UserMeasurement, UserMeasurementCreate, UserM
         # Don't allow updating profile_id
         update_data.pop("profile_id", None)
         
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
 
 user_measurement = CRUDUserMeasurement(UserMeasurement) 
\ No newline at end of file
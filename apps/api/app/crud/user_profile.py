@@ -1,28 +1,29 @@
 from typing import Optional, Dict, Any, Union
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud import statements
 from app.crud.base import CRUDBase
 from app.models.user_profile import UserProfile
 from app.schemas.user_profile import UserProfileCreate, UserProfileUpdate
 
 class CRUDUserProfile(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate]):
-    def get_by_user_id(self, db: Session, *, user_id: UUID) -> Optional[UserProfile]:
+    async def get_by_user_id(self, db: AsyncSession, *, user_id: UUID) -> Optional[UserProfile]:
         """Get a user's profile by user_id"""
-        return db.query(self.model).filter(self.model.user_id == user_id).first()
+        result = await db.scalars(statements.profile_by_user_id(user_id))
+        return result.first()
     
-    def create(self, db: Session, *, obj_in: UserProfileCreate, user_id: UUID) -> UserProfile:
+    async def create(self, db: AsyncSession, *, obj_in: UserProfileCreate, user_id: UUID) -> UserProfile:
         """Create a new user profile with user_id"""
         obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data, user_id=user_id)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
         return db_obj
     
-    def update(
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         db_obj: UserProfile,
         obj_in: Union[UserProfileUpdate, Dict[str, Any]]
@@ -36,6 +37,6 @@ class CRUDUserProfile(CRUDBase[UserProfile, UserProfileCreate, UserProfileUpdate
         # Don't allow updating user_id
         update_data.pop("user_id", None)
         
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return await super().update(db, db_obj=db_obj, obj_in=update_data)
 
 user_profile = CRUDUserProfile(UserProfile) 
\ No newline at end of file
@@ -1,9 +1,11 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, timedelta
 import json
 
+from app.core.pagination import Keyset
 from app.crud.base import CRUDBase
 from app.models.workout import WorkoutTemplate, WorkoutLog
 from app.schemas.workout import WorkoutTemplateCreate, WorkoutTemplateUpdate, WorkoutLogCreate, WorkoutLogUpdate
@@ -15,19 +17,24 @@ class UUIDEncoder(json.JSONEncoder):
         return super().default(obj)
 
 class CRUDWorkoutTemplate(CRUDBase[WorkoutTemplate, WorkoutTemplateCreate, WorkoutTemplateUpdate]):
-    def get_by_user(
-        self, db: Session, *, user_id: UUID, skip: int = 0, limit: int = 100
+    # Newest templates first
+    keyset = Keyset(WorkoutTemplate.created_at, WorkoutTemplate.template_id, descending=True)
+
+    async def get_by_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[WorkoutTemplate]:
-        return (
-            db.query(self.model)
-            .filter(self.model.created_by == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = select(self.model).where(self.model.created_by == user_id)
+        result = await db.scalars(self.keyset.apply(query, cursor, limit).offset(skip))
+        return list(result.all())
 
-    def create_with_user(
-        self, db: Session, *, obj_in: WorkoutTemplateCreate, user_id: UUID
+    async def create_with_user(
+        self, db: AsyncSession, *, obj_in: WorkoutTemplateCreate, user_id: UUID
     ) -> WorkoutTemplate:
         obj_data = obj_in.model_dump()
         # Convert exercises list to JSON with UUID handling
@@ -40,54 +47,66 @@ class CRUDWorkoutTemplate(CRUDBase[WorkoutTemplate, WorkoutTemplateCreate, Worko
             created_by=user_id
         )
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
         return db_obj
 
 class CRUDWorkoutLog(CRUDBase[WorkoutLog, WorkoutLogCreate, WorkoutLogUpdate]):
-    def get_by_user(
-        self, db: Session, *, user_id: UUID, skip: int = 0, limit: int = 100
+    # Most recent workouts first
+    keyset = Keyset(WorkoutLog.date, WorkoutLog.log_id, descending=True)
+
+    async def get_by_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[WorkoutLog]:
-        return (
-            db.query(self.model)
-            .filter(self.model.user_id == user_id)
-            .order_by(self.model.date.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = select(self.model).where(self.model.user_id == user_id)
+        result = await db.scalars(self.keyset.apply(query, cursor, limit).offset(skip))
+        return list(result.all())
 
-    def get_user_logs_by_date_range(
-        self, db: Session, *, user_id: UUID, start_date: date, end_date: date
+    async def get_user_logs_by_date_range(
+        self, db: AsyncSession, *, user_id: UUID, start_date: date, end_date: date
     ) -> List[WorkoutLog]:
-        return (
-            db.query(self.model)
-            .filter(
+        result = await db.scalars(
+            select(self.model)
+            .where(
                 self.model.user_id == user_id,
                 self.model.date >= start_date,
                 self.model.date <= end_date
             )
             .order_by(self.model.date.desc())
-            .all()
         )
+        return list(result.all())
 
-    def create_with_user(
-        self, db: Session, *, obj_in: WorkoutLogCreate, user_id: UUID
-    ) -> WorkoutLog:
+    def _row_with_user(self, obj_in: WorkoutLogCreate, user_id: UUID) -> Dict[str, Any]:
         obj_data = obj_in.model_dump()
         # Convert exercises list to JSON with UUID handling
         exercises_data = json.loads(
             json.dumps(obj_data["exercises"], cls=UUIDEncoder)
         )
-        db_obj = WorkoutLog(
+        return {
             **{k: v for k, v in obj_data.items() if k != "exercises"},
-            exercises=exercises_data,
-            user_id=user_id
-        )
+            "exercises": exercises_data,
+            "user_id": user_id
+        }
+
+    async def create_with_user(
+        self, db: AsyncSession, *, obj_in: WorkoutLogCreate, user_id: UUID
+    ) -> WorkoutLog:
+        db_obj = WorkoutLog(**self._row_with_user(obj_in, user_id))
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.flush()
         return db_obj
 
+    async def create_many_with_user(
+        self, db: AsyncSession, *, objs_in: List[WorkoutLogCreate], user_id: UUID
+    ) -> List[WorkoutLog]:
+        return await self.create_many(
+            db, objs_in=[self._row_with_user(obj_in, user_id) for obj_in in objs_in]
+        )
+
 workout_templates = CRUDWorkoutTemplate(WorkoutTemplate)
 workout_logs = CRUDWorkoutLog(WorkoutLog) 
\ No newline at end of file
@@ -4,7 +4,10 @@ from fastapi.responses import JSONResponse
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.hashing import password_hasher
 from app.core.logging import setup_logging, get_logger
+from app.services.catalog import exercise_catalog, shared_catalog
 
 # Initialize logging
 logger = get_logger(__name__)
@@ -50,8 +53,21 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up Fitholic API")
+    # Workers sharing the catalog file do not keep a copy of their own
+    if not settings.EXERCISE_CATALOG_FILE:
+        try:
+            async with AsyncSessionLocal() as db:
+                await exercise_catalog.load(db)
+        except Exception as e:
+            # The first catalog search loads it instead
+            logger.warning(f"Could not load the exercise catalog at startup: {str(e)}")
+    # A shared catalog file left by an earlier run may miss writes made
+    # since, so rebuild it
+    shared_catalog.changed()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Fitholic API")
+    await async_engine.dispose()
+    password_hasher.shutdown()
 
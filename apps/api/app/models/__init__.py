@@ -1,9 +1,10 @@
 from .user import User
 from .user_profile import UserProfile
 from .user_measurement import UserMeasurement
-from .exercise import Exercise
+from .exercise import Exercise, ExerciseCatalogVersion, ExerciseTombstone
 from .workout import WorkoutTemplate, WorkoutLog
 from .chat import ChatSession, ChatMessage, ChatContext
+from .refresh_token import RefreshToken
 
 # For Alembic migrations
 __all__ = [
@@ -11,9 +12,12 @@ __all__ = [
     "UserProfile",
     "UserMeasurement",
     "Exercise",
+    "ExerciseTombstone",
+    "ExerciseCatalogVersion",
     "WorkoutTemplate",
     "WorkoutLog",
     "ChatSession",
     "ChatMessage",
-    "ChatContext"
+    "ChatContext",
+    "RefreshToken"
 ]
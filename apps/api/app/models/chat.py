@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, JSON, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -9,6 +9,9 @@ import uuid
 class ChatSession(Base):
     """Model for chat sessions"""
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        Index("ix_chat_sessions_user_id_status", "user_id", "status"),
+    )
 
     session_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -24,6 +27,9 @@ class ChatSession(Base):
 class ChatMessage(Base):
     """Model for chat messages"""
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_id_created_at", "session_id", "created_at", "message_id"),
+    )
 
     message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.session_id"), nullable=False)
@@ -38,6 +44,9 @@ class ChatMessage(Base):
 class ChatContext(Base):
     """Model for chat context"""
     __tablename__ = "chat_context"
+    __table_args__ = (
+        Index("ix_chat_context_session_id_context_type", "session_id", "context_type", "updated_at"),
+    )
 
     context_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.session_id"), nullable=False)
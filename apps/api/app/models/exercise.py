@@ -1,12 +1,44 @@
 from typing import List
-from sqlalchemy import Column, String, ARRAY, DateTime, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, Computed, SmallInteger, String, DateTime, DDL, Index, event, func, text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
+from sqlalchemy.orm import deferred, query_expression
 import uuid
 
-from app.core.database import Base
+from app.core.database import Base, EagerDefaultsMixin
 
-class Exercise(Base):
+def _pg_trgm_available(ddl, target, bind, **kw) -> bool:
+    """Only build trigram indexes where the pg_trgm extension is installable"""
+    return bool(bind.scalar(
+        text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ))
+
+# Text search configuration of search_vector; queries must use the same one
+SEARCH_CONFIG = "english"
+
+# Name matches outrank description matches, which outrank instructions
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(instructions, '')), 'C')"
+)
+
+class Exercise(EagerDefaultsMixin, Base):
     __tablename__ = "exercises"
+    __table_args__ = (
+        Index("ix_exercises_created_at", "created_at", "exercise_id"),
+        # Serves the changes since a client's last sync
+        Index("ix_exercises_updated_at", "updated_at", "exercise_id"),
+        Index("ix_exercises_muscle_groups", "muscle_groups", postgresql_using="gin"),
+        Index("ix_exercises_equipment", "equipment", postgresql_using="gin"),
+        # Serves the ilike '%name%' search
+        Index(
+            "ix_exercises_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ).ddl_if(callable_=_pg_trgm_available),
+        Index("ix_exercises_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     exercise_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
@@ -17,4 +49,44 @@ class Exercise(Base):
     instructions = Column(String, nullable=True)
     video_url = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Maintained by Postgres; deferred so it is only read when asked for
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
+    # Relevance to a text search, set by the query that ranks by it
+    search_rank = query_expression()
+
+class ExerciseTombstone(Base):
+    """
+    A deleted exercise, kept so syncing clients learn of the delete.
+
+    Pruned after EXERCISE_TOMBSTONE_RETENTION_DAYS; clients that last
+    synced before that must fetch a full snapshot again.
+    """
+    __tablename__ = "exercise_tombstones"
+    __table_args__ = (
+        Index("ix_exercise_tombstones_deleted_at", "deleted_at"),
+    )
+
+    exercise_id = Column(UUID(as_uuid=True), primary_key=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class ExerciseCatalogVersion(Base):
+    """
+    Version of the exercise catalog: a single row, bumped by every
+    transaction that writes exercises as it commits, so any process can
+    tell with one read whether its copy of the catalog is current.
+    """
+    __tablename__ = "exercise_catalog_version"
+
+    id = Column(SmallInteger, primary_key=True, default=1)
+    version = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Latest deleted_at of the tombstones pruned; cursors before it may
+    # have missed deletes
+    tombstones_pruned_to = Column(DateTime(timezone=True))
+
+event.listen(
+    Exercise.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(callable_=_pg_trgm_available)
+)
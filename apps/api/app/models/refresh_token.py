@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.core.database import Base, EagerDefaultsMixin
+
+class RefreshToken(EagerDefaultsMixin, Base):
+    """
+    A refresh token, stored as the SHA-256 of the value handed to the client.
+
+    Each refresh revokes the presented token and issues a new one in the same
+    family. Presenting a revoked token again revokes the whole family.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_user_id", "user_id"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    family_id = Column(UUID(as_uuid=True), nullable=False, default=uuid.uuid4)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default='now()')
@@ -1,11 +1,11 @@
-from sqlalchemy import Boolean, Column, String, DateTime
+from sqlalchemy import Boolean, Column, String, DateTime, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from app.core.database import Base
+from app.core.database import Base, EagerDefaultsMixin
 
-class User(Base):
+class User(EagerDefaultsMixin, Base):
     __tablename__ = "users"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -16,7 +16,7 @@ class User(Base):
     is_active = Column(Boolean(), default=True)
     is_superuser = Column(Boolean(), default=False)
     created_at = Column(DateTime(timezone=True), server_default='now()')
-    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate='now()')
+    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate=func.now())
 
     # Add relationships
     profile = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Float, Date, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Float, Date, ForeignKey, JSON, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from app.core.database import Base
+from app.core.database import Base, EagerDefaultsMixin
 
-class UserMeasurement(Base):
+class UserMeasurement(EagerDefaultsMixin, Base):
     __tablename__ = "user_measurements"
+    # One measurement per profile and day
+    __table_args__ = (
+        Index("ix_user_measurements_profile_id_date", "profile_id", "date", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     profile_id = Column(UUID(as_uuid=True), ForeignKey("user_profiles.id"), nullable=False)
@@ -27,7 +31,7 @@ class UserMeasurement(Base):
     })
     
     created_at = Column(DateTime(timezone=True), server_default='now()')
-    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate='now()')
+    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate=func.now())
     
     # Relationships
     profile = relationship("UserProfile", back_populates="measurements") 
\ No newline at end of file
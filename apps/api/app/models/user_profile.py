@@ -1,11 +1,11 @@
-from sqlalchemy import Column, Float, Date, String, JSON, ForeignKey, ARRAY, DateTime, Integer
+from sqlalchemy import Column, Float, Date, String, JSON, ForeignKey, ARRAY, DateTime, Integer, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from app.core.database import Base
+from app.core.database import Base, EagerDefaultsMixin
 
-class UserProfile(Base):
+class UserProfile(EagerDefaultsMixin, Base):
     __tablename__ = "user_profiles"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -43,7 +43,7 @@ class UserProfile(Base):
     })
     
     created_at = Column(DateTime(timezone=True), server_default='now()')
-    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate='now()')
+    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="profile")
@@ -1,13 +1,16 @@
 from typing import List
-from sqlalchemy import Column, String, ARRAY, DateTime, ForeignKey, Integer, Boolean, JSON, Date
+from sqlalchemy import Column, String, ARRAY, DateTime, ForeignKey, Integer, Boolean, JSON, Date, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from app.core.database import Base
+from app.core.database import Base, EagerDefaultsMixin
 
-class WorkoutTemplate(Base):
+class WorkoutTemplate(EagerDefaultsMixin, Base):
     __tablename__ = "workout_templates"
+    __table_args__ = (
+        Index("ix_workout_templates_created_by_created_at", "created_by", "created_at", "template_id"),
+    )
 
     template_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
@@ -16,14 +19,17 @@ class WorkoutTemplate(Base):
     exercises = Column(JSON, nullable=False)  # Will store array of {exerciseId, sets, reps, restTime}
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default='now()')
-    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate='now()')
+    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="workout_templates")
     workout_logs = relationship("WorkoutLog", back_populates="template")
 
-class WorkoutLog(Base):
+class WorkoutLog(EagerDefaultsMixin, Base):
     __tablename__ = "workout_logs"
+    __table_args__ = (
+        Index("ix_workout_logs_user_id_date", "user_id", "date", "log_id"),
+    )
 
     log_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -33,7 +39,7 @@ class WorkoutLog(Base):
     notes = Column(String, nullable=True)
     exercises = Column(JSON, nullable=False)  # Will store array of {exerciseId, sets: [{reps, weight, completed}]}
     created_at = Column(DateTime(timezone=True), server_default='now()')
-    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate='now()')
+    updated_at = Column(DateTime(timezone=True), server_default='now()', onupdate=func.now())
 
     # Relationships
     user = relationship("User", back_populates="workout_logs")
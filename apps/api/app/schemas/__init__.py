@@ -1,4 +1,4 @@
-from .auth import Token, TokenData, TokenPayload
+from .auth import Principal, RefreshRequest, Token, TokenData, TokenPayload
 from .user import User, UserCreate, UserUpdate, UserInDB
 from .user_profile import (
     UserProfile,
@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+class DatabasePoolStatus(BaseModel):
+    """Schema for connection pool metrics"""
+    pool_size: int = Field(..., description="Configured number of persistent connections")
+    max_overflow: int = Field(..., description="Connections allowed beyond pool_size")
+    checked_out: int = Field(..., description="Connections currently in use")
+    idle: int = Field(..., description="Connections open and waiting in the pool")
+    overflow: int = Field(..., description="Overflow connections currently open")
+    checkouts: int = Field(..., description="Checkouts since startup")
+    timeouts: int = Field(..., description="Checkouts that gave up after DB_POOL_TIMEOUT")
+    wait_time_total_ms: float = Field(..., description="Total time spent waiting for a connection")
+    wait_time_avg_ms: float = Field(..., description="Average wait per checkout")
+    wait_time_max_ms: float = Field(..., description="Longest single wait")
+
+class DatabaseEngineStatus(BaseModel):
+    """Schema for per-engine routing and query metrics"""
+    name: str = Field(..., description="Engine name (primary or replica)")
+    available: bool = Field(..., description="Whether reads are currently routed to this engine")
+    replication_lag_seconds: Optional[float] = Field(None, description="Last measured replica lag")
+    queries: int = Field(..., description="Statements executed since startup")
+    pool: DatabasePoolStatus
+
+class PasswordHasherStatus(BaseModel):
+    """Schema for the bcrypt worker pool"""
+    workers: int = Field(..., description="Threads hashing passwords")
+    max_queue: int = Field(..., description="Calls allowed to wait before new ones are rejected")
+    queue_depth: int = Field(..., description="Calls currently waiting for a worker")
+    queue_depth_max: int = Field(..., description="Deepest the queue has been since startup")
+    running: int = Field(..., description="Calls currently hashing")
+    completed: int = Field(..., description="Calls finished since startup")
+    rejected: int = Field(..., description="Calls refused with 503 because the queue was full")
+    wait_time_avg_ms: float = Field(..., description="Average time spent waiting for a worker")
+    wait_time_max_ms: float = Field(..., description="Longest single wait for a worker")
+
+class CacheStatus(BaseModel):
+    """Schema for in-process cache metrics"""
+    size: int = Field(..., description="Entries currently cached")
+    max_size: int = Field(..., description="Entries kept before the least recently used is evicted")
+    ttl_seconds: float = Field(..., description="Time to live of an entry")
+    hits: int = Field(..., description="Lookups served from the cache since startup")
+    misses: int = Field(..., description="Lookups that went to the database since startup")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
+
+class ExerciseSimilarityStatus(BaseModel):
+    """Schema for the exercise similarity index that deduplicates generated exercises"""
+    built: bool = Field(..., description="Whether the vectors are built; the first lookup builds them")
+    indexed: int = Field(..., description="Exercises with a vector")
+    dimensions: int = Field(..., description="Hashed feature dimensions of each vector")
+    memory_bytes: int = Field(..., description="Size of the vectors' arrays")
+    threshold: float = Field(..., description="Cosine similarity a match needs (EXERCISE_SIMILARITY_THRESHOLD)")
+    lookups: int = Field(..., description="Generated exercises looked up since startup")
+    llm_calls_saved: int = Field(..., description="Lookups that reused an existing exercise instead of generating one")
+
+class ImportRowError(BaseModel):
+    """Schema for a rejected import row"""
+    line: int = Field(..., description="Line of the upload the row starts on")
+    error: str
+
+class ExerciseImportStatus(BaseModel):
+    """Schema for the progress of a bulk exercise import"""
+    import_id: UUID
+    format: str = Field(..., description="csv or jsonl")
+    state: str = Field(..., description="running, completed or failed")
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    bytes_read: int = Field(..., description="Bytes of the upload read so far")
+    rows: int = Field(..., description="Rows read so far, including rejected ones")
+    created: int = Field(..., description="Exercises inserted")
+    updated: int = Field(..., description="Existing exercises matched by normalized name and updated")
+    rejected: int = Field(..., description="Rows that failed to parse or validate")
+    batches: int = Field(..., description="Batches committed")
+    errors: List[ImportRowError] = Field(..., description="The first rejected rows")
+    failure: Optional[str] = Field(None, description="Why a failed import stopped")
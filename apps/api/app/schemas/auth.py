@@ -1,10 +1,17 @@
-from pydantic import BaseModel, EmailStr
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr
 from uuid import UUID
 
 class Token(BaseModel):
     """Token schema."""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # seconds until the access token expires
+
+class RefreshRequest(BaseModel):
+    """Refresh token presented to /auth/refresh and /auth/logout."""
+    refresh_token: str
 
 class TokenData(BaseModel):
     """Token data schema."""
@@ -12,4 +19,21 @@ class TokenData(BaseModel):
 
 class TokenPayload(BaseModel):
     """Token payload schema."""
-    sub: EmailStr 
\ No newline at end of file
+    sub: str  # user id; the email in tokens issued before user id subjects
+    is_active: Optional[bool] = None
+    is_superuser: Optional[bool] = None
+
+    @property
+    def user_id(self) -> Optional[UUID]:
+        try:
+            return UUID(self.sub)
+        except ValueError:
+            return None
+
+class Principal(BaseModel):
+    """The authenticated user as far as authorization checks need it."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    is_active: bool
+    is_superuser: bool 
\ No newline at end of file
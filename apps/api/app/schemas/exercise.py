@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class ExerciseBase(BaseModel):
@@ -19,11 +19,19 @@ class ExerciseUpdate(ExerciseBase):
     name: Optional[str] = None
 
 class ExerciseSearch(BaseModel):
+    query: Optional[str] = None
     name: Optional[str] = None
     muscle_groups: Optional[List[str]] = None
     equipment: Optional[List[str]] = None
     difficulty: Optional[str] = None
 
+class ExerciseSuggestion(BaseModel):
+    exercise_id: UUID
+    name: str
+
+    class Config:
+        from_attributes = True
+
 class ExerciseGenerateRequest(BaseModel):
     exercise_type: str
     target_muscles: List[str]
@@ -37,4 +45,14 @@ class Exercise(ExerciseBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class ExerciseChanges(BaseModel):
+    """Exercises written and deleted since a sync cursor"""
+    since: datetime
+    next_since: datetime = Field(..., description="Pass as since on the next sync")
+    count: int = Field(..., description="Exercises in upserts")
+    upserts: Dict[str, List[Any]] = Field(
+        ..., description="Written exercises as one list of values per field, oldest write first"
+    )
+    deletes: List[UUID] = Field(..., description="Ids of deleted exercises")
@@ -1,11 +1,15 @@
+import asyncio
 from typing import Dict, Any, List
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.agents.llm_config import get_llm
+from app.schemas.exercise import ExerciseCreate
 from app.schemas.workout import WorkoutTemplateCreate, TemplateExercise
+from app.core.database import release_connection
 from app.core.logging import get_logger
 from app.services.exercise_service import ExerciseService
+from app.services.catalog.names import normalize_name
 from app.services.ai.exercise_generator import generate_exercise_with_ai
 from app.crud import exercises
 
@@ -30,7 +34,7 @@ class WorkoutPlan(BaseModel):
 class WorkoutGenerator:
     """Service for generating personalized workouts using LangChain"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         logger.info("Initializing WorkoutGenerator service")
         self.db = db
         self.exercise_service = ExerciseService(db)
@@ -75,50 +79,63 @@ class WorkoutGenerator:
         # Create the chain with structured output
         self.chain = self.prompt | self.llm.with_structured_output(WorkoutPlan)
     
-    async def _get_or_create_exercise(
-        self, 
+    async def _find_existing_exercises(self, workout_plan: WorkoutPlan) -> Dict[str, str]:
+        """Read phase: map planned exercise names to IDs already in the database"""
+        existing = {}
+        # Similarity lookups by normalized name, so spelling variants are
+        # looked up, and counted as saved generations, once
+        similar = {}
+        for ex in workout_plan.exercises:
+            if ex.name in existing:
+                continue
+            exercise = await self.exercise_service.get_exercise_by_name(ex.name)
+            if exercise is None:
+                # Before paying for an LLM call, look for the same exercise
+                # under another name, like "DB Goblet Squat"
+                key = normalize_name(ex.name)
+                if key not in similar:
+                    similar[key] = await self.exercise_service.get_similar_exercise(
+                        ex.name, ex.target_muscles, ex.equipment_needed
+                    )
+                    if similar[key]:
+                        logger.info(f"Reusing {similar[key].name} for {ex.name} instead of generating it")
+                exercise = similar[key]
+            if exercise:
+                logger.debug(f"Found existing exercise: {exercise.name}")
+                existing[ex.name] = str(exercise.exercise_id)
+        return existing
+    
+    async def _generate_exercise(
+        self,
         exercise_data: WorkoutExercise,
         difficulty: str,
         available_equipment: List[str]
-    ) -> str:
-        """Get exercise ID from database or create if not exists"""
-        logger.debug(f"Looking up or creating exercise: {exercise_data.name}")
-        
-        # Try to find existing exercise
-        exercise = self.exercise_service.get_exercise_by_name(exercise_data.name)
-        if exercise:
-            logger.debug(f"Found existing exercise: {exercise.name}")
-            return str(exercise.exercise_id)
-        
-        # Exercise not found, create it using AI
+    ) -> ExerciseCreate:
+        """LLM phase: generate details for an exercise missing from the database"""
         try:
             logger.info(f"Generating new exercise: {exercise_data.name}")
-            exercise_create = await generate_exercise_with_ai(
+            return await generate_exercise_with_ai(
                 exercise_type=exercise_data.name,
                 target_muscles=exercise_data.target_muscles,
                 available_equipment=exercise_data.equipment_needed or available_equipment,
                 difficulty=difficulty,
                 considerations=None  # Could be added based on user profile
             )
-            
-            # Save the new exercise to database
-            new_exercise = exercises.create(self.db, obj_in=exercise_create)
-            logger.info(f"Created new exercise: {new_exercise.name}")
-            return str(new_exercise.exercise_id)
-            
         except Exception as e:
             logger.error(f"Failed to create exercise: {str(e)}")
             raise ValueError(f"Could not create exercise '{exercise_data.name}': {str(e)}")
     
     async def generate_workout(self, user_profile: Dict[str, Any], user_requirements: Dict[str, Any]) -> WorkoutTemplateCreate:
-        """Generate a personalized workout based on user profile"""
+        """
+        Generate a personalized workout based on user profile.
+        
+        Database access is split into short read and write phases and the pooled
+        connection is released before every LLM call, so a pending generation
+        does not hold a connection while it waits on the model.
+        """
         logger.info(f"Generating workout for user with goals: {user_profile.get('fitness_goals')}")
         try:
-            # Get available exercises for the user's equipment
-            available_exercises = self.exercise_service.get_exercises_by_criteria(
-                equipment=user_profile.get("available_equipment"),
-                difficulty=user_profile.get("fitness_level")
-            )
+            await release_connection(self.db)
             
             # Generate workout using the chain with structured output
             workout_plan = await self.chain.ainvoke({
@@ -131,28 +148,55 @@ class WorkoutGenerator:
                 "intensity": user_requirements.get("intensity", [])
             })
             
-            # Convert response to WorkoutTemplateCreate
-            exercises_list = []
+            exercise_ids = await self._find_existing_exercises(workout_plan)
+            await release_connection(self.db)
+            
+            # Generate every missing exercise concurrently, once per distinct
+            # name; "Push-ups" and "Push Up" count as the same name
+            missing = {}
             for ex in workout_plan.exercises:
-                try:
-                    # Get or create the exercise
-                    exercise_id = await self._get_or_create_exercise(
+                if ex.name not in exercise_ids:
+                    missing.setdefault(normalize_name(ex.name), ex)
+            generated = await asyncio.gather(
+                *(
+                    self._generate_exercise(
                         exercise_data=ex,
                         difficulty=workout_plan.difficulty,
                         available_equipment=user_requirements.get("available_equipment", [])
                     )
-                    
-                    exercises_list.append(
-                        TemplateExercise(
-                            exercise_id=exercise_id,
-                            sets=ex.sets,
-                            reps=ex.reps,
-                            rest_time=ex.rest_time
-                        )
-                    )
-                except ValueError as e:
-                    logger.warning(f"Skipping exercise: {str(e)}")
+                    for ex in missing.values()
+                ),
+                return_exceptions=True
+            )
+            
+            # Write phase: save the generated exercises in a single insert
+            created = {}
+            for key, exercise_create in zip(missing, generated):
+                if isinstance(exercise_create, Exception):
+                    logger.warning(f"Skipping exercise: {str(exercise_create)}")
                     continue
+                created[key] = exercise_create
+            new_exercises = await exercises.create_many(self.db, objs_in=list(created.values()))
+            created_ids = {}
+            for key, new_exercise in zip(created, new_exercises):
+                logger.info(f"Created new exercise: {new_exercise.name}")
+                created_ids[key] = str(new_exercise.exercise_id)
+            for ex in workout_plan.exercises:
+                key = normalize_name(ex.name)
+                if ex.name not in exercise_ids and key in created_ids:
+                    exercise_ids[ex.name] = created_ids[key]
+            
+            # Convert response to WorkoutTemplateCreate
+            exercises_list = [
+                TemplateExercise(
+                    exercise_id=exercise_ids[ex.name],
+                    sets=ex.sets,
+                    reps=ex.reps,
+                    rest_time=ex.rest_time
+                )
+                for ex in workout_plan.exercises
+                if ex.name in exercise_ids
+            ]
             
             if not exercises_list:
                 logger.error("No valid exercises could be created from the generated workout")
@@ -170,4 +214,4 @@ class WorkoutGenerator:
             
         except Exception as e:
             logger.error(f"Error generating workout: {str(e)}", exc_info=True)
-            raise Exception(f"Workout generation failed: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Workout generation failed: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,19 @@
+from .index import ExerciseCatalog, exercise_catalog
+from .events import track_exercise_changes
+from .snapshot import catalog_snapshots, exercise_columns, sync_cursor
+from .shared import SharedCatalog, shared_catalog
+from .version import CatalogVersion, read_catalog_version, read_tombstones_pruned_to
+
+__all__ = [
+    "ExerciseCatalog",
+    "exercise_catalog",
+    "track_exercise_changes",
+    "catalog_snapshots",
+    "exercise_columns",
+    "sync_cursor",
+    "SharedCatalog",
+    "shared_catalog",
+    "CatalogVersion",
+    "read_catalog_version",
+    "read_tombstones_pruned_to",
+]
@@ -0,0 +1,85 @@
+"""
+Keep the exercise catalog index in step with committed writes.
+
+Unit-of-work writes (add, update, delete) are collected after each flush.
+Bulk statements bypass the unit of work, so CRUDExercise records what they
+touched with track_exercise_changes. Either way, changes are held on the
+session and applied to the index only once the transaction commits, when
+the shared catalog file, if any, is also scheduled to be rebuilt.
+
+Committing such a transaction also bumps the catalog version in the
+database (see version.py), which is how other processes learn of it.
+
+A session with SUSPENDED_KEY set in its info, such as a bulk import's,
+still bumps the version but leaves its changes out of this process's
+copies: they catch up like other processes do, or reload, once it is done.
+"""
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.exercise import Exercise as ExerciseModel
+from app.schemas.exercise import Exercise
+from app.services.catalog.index import STALE, exercise_catalog
+from app.services.catalog.shared import shared_catalog
+from app.services.catalog.version import bump_catalog_version
+
+CHANGES_KEY = "exercise_catalog_changes"
+VERSION_KEY = "exercise_catalog_version"
+SUSPENDED_KEY = "exercise_catalog_suspended"
+
+# The columns the index keeps, which leaves out the deferred search_vector
+_column_keys = frozenset(Exercise.model_fields)
+
+def _snapshot(exercise: ExerciseModel):
+    """The exercise as the index stores it, or STALE if columns are unloaded"""
+    values = inspect(exercise).dict
+    if not _column_keys <= values.keys():
+        return STALE
+    return Exercise.model_validate({key: values[key] for key in _column_keys})
+
+def track_exercise_changes(
+    session: Session,
+    *,
+    exercises: Iterable[ExerciseModel] = (),
+    stale_ids: Iterable[UUID] = (),
+    deleted_ids: Iterable[UUID] = ()
+) -> None:
+    changes = session.info.setdefault(CHANGES_KEY, {})
+    for exercise in exercises:
+        changes[exercise.exercise_id] = _snapshot(exercise)
+    for exercise_id in stale_ids:
+        changes[exercise_id] = STALE
+    for exercise_id in deleted_ids:
+        changes[exercise_id] = None
+
+@event.listens_for(Session, "after_flush")
+def _collect_exercise_changes(session, flush_context):
+    written = [obj for obj in session.new if isinstance(obj, ExerciseModel)]
+    written += [obj for obj in session.dirty if isinstance(obj, ExerciseModel)]
+    deleted = [obj.exercise_id for obj in session.deleted if isinstance(obj, ExerciseModel)]
+    if written or deleted:
+        track_exercise_changes(session, exercises=written, deleted_ids=deleted)
+
+@event.listens_for(Session, "before_commit")
+def _bump_catalog_version(session):
+    # Commit flushes only after this hook; flush now so that writes still
+    # pending are collected too
+    session.flush()
+    if session.info.get(CHANGES_KEY):
+        session.info[VERSION_KEY] = tuple(session.execute(bump_catalog_version()).one())
+
+@event.listens_for(Session, "after_commit")
+def _apply_exercise_changes(session):
+    changes = session.info.pop(CHANGES_KEY, None)
+    version = session.info.pop(VERSION_KEY, None)
+    if changes and not session.info.get(SUSPENDED_KEY):
+        exercise_catalog.apply(changes, version=version)
+        shared_catalog.changed()
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_exercise_changes(session, previous_transaction):
+    session.info.pop(CHANGES_KEY, None)
+    session.info.pop(VERSION_KEY, None)
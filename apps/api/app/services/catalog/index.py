@@ -0,0 +1,567 @@
+"""
+Process-wide index of the exercise catalog.
+
+Exercises are held in memory with inverted indexes from each muscle group,
+equipment item and difficulty to the ids that have it, so criteria lookups
+are set intersections instead of table scans. Names are indexed by their
+normalized form and by trigram for fuzzy name resolution, and kept in
+sorted arrays for prefix suggestions. Vectors of each exercise's content
+(see vectors.py) catch near-duplicates that differ by more than spelling;
+they are built on the first similarity lookup.
+
+The index loads at startup (or on first use). Changes committed in this
+process are applied as they commit (see events.py). Changes committed by
+other processes are caught up with by sync(): it reads the catalog version
+from the database (see version.py) once per session and, when it moved,
+re-reads the exercises written and deleted since the last sync.
+"""
+import asyncio
+import math
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import replica_engine
+from app.core.logging import get_logger
+from app.models.exercise import Exercise as ExerciseModel, ExerciseTombstone
+from app.schemas.exercise import Exercise
+from app.services.catalog.names import name_words, normalize_name, trigrams
+from app.services.catalog.vectors import ExerciseVectors
+from app.services.catalog.version import CatalogVersion, read_catalog_version
+
+logger = get_logger(__name__)
+
+# Marks an exercise that changed but must be read back from the database
+STALE = object()
+
+# Session info key of the catalogs already synced in the session
+SYNCED_KEY = "exercise_catalogs_synced"
+
+# The exercise columns the catalog index, shared file and snapshots keep
+CATALOG_COLUMNS = [ExerciseModel.__table__.c[key] for key in Exercise.model_fields]
+
+class _SortedEntries:
+    """
+    Sorted (key, position) pairs. Between defer() and merge() changes are
+    collected and applied in one pass, as each single insert or delete
+    shifts the rest of the list.
+    """
+
+    def __init__(self):
+        self.items: List[Tuple[str, int]] = []
+        self._added: Optional[Set[Tuple[str, int]]] = None
+        self._removed: Optional[Set[Tuple[str, int]]] = None
+
+    def add(self, entry: Tuple[str, int]) -> None:
+        if self._added is None:
+            insort(self.items, entry)
+        elif entry in self._removed:
+            self._removed.discard(entry)
+        else:
+            self._added.add(entry)
+
+    def remove(self, entry: Tuple[str, int]) -> None:
+        if self._added is None:
+            index = bisect_left(self.items, entry)
+            if index < len(self.items) and self.items[index] == entry:
+                del self.items[index]
+        elif entry in self._added:
+            self._added.discard(entry)
+        else:
+            self._removed.add(entry)
+
+    def defer(self) -> None:
+        self._added, self._removed = set(), set()
+
+    def merge(self) -> None:
+        added, removed = self._added, self._removed
+        self._added = self._removed = None
+        if removed:
+            self.items = [entry for entry in self.items if entry not in removed]
+        if added:
+            # Two sorted runs: timsort merges them in linear time
+            self.items.extend(sorted(added))
+            self.items.sort()
+
+class ExerciseCatalog:
+    """In-memory exercise catalog with inverted indexes for criteria lookups"""
+
+    # Cost of visiting one exercise in an ordered walk relative to one set
+    # operation step, used to pick a query strategy
+    WALK_COST = 4
+
+    # Changes applied together beyond which the prefix arrays are merged in
+    # one pass rather than edited entry by entry
+    BULK_CHANGES = 32
+
+    def __init__(self):
+        self.vectors = ExerciseVectors()
+        # Serializes loads and catch-ups, which swap _changes_during_load
+        self._lock = asyncio.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget everything; the next search loads the catalog again"""
+        self.loaded = False
+        self.vectors.clear()
+        # The database catalog version the index holds, as of its read_at
+        self.catalog_version: Optional[CatalogVersion] = None
+        # Exercises are numbered in insertion order, oldest first like the
+        # exercise list endpoint. The inverted indexes hold these numbers,
+        # which hash and sort far faster than UUIDs.
+        self._exercises: Dict[int, Exercise] = {}
+        self._position: Dict[UUID, int] = {}
+        self._next_position = 0
+        self._by_muscle_group: Dict[str, Set[int]] = defaultdict(set)
+        self._by_equipment: Dict[str, Set[int]] = defaultdict(set)
+        self._by_difficulty: Dict[str, Set[int]] = defaultdict(set)
+        # Normalized name -> exercises; trigram -> distinct normalized names
+        self._by_name: Dict[str, Set[int]] = defaultdict(set)
+        self._by_trigram: Dict[str, Set[str]] = defaultdict(set)
+        # Trigrams per normalized name; the trigrams themselves are not kept,
+        # a set per name would cost kilobytes
+        self._trigram_counts: Dict[str, int] = {}
+        # Sorted (words, position) pairs for prefix suggestions: each whole
+        # name, and each name from its second, third... word on
+        self._name_prefixes = _SortedEntries()
+        self._word_prefixes = _SortedEntries()
+        self._stale: Set[UUID] = set()
+        # Changes committed while a load is running, replayed after it
+        self._changes_during_load: Optional[List[Dict[UUID, Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self._exercises)
+
+    def __iter__(self) -> Iterator[Exercise]:
+        """Every exercise, oldest first"""
+        return iter(self._exercises.values())
+
+    @property
+    def etag(self) -> str:
+        """Weak entity tag of the catalog version the index holds"""
+        return self.catalog_version.etag if self.catalog_version else 'W/"0"'
+
+    def get(self, exercise_id: UUID) -> Optional[Exercise]:
+        position = self._position.get(exercise_id)
+        return None if position is None else self._exercises[position]
+
+    def replace(self, exercises: Iterable[Exercise]) -> None:
+        """Rebuild the index from the whole catalog, oldest first"""
+        changes, self._changes_during_load = self._changes_during_load, None
+        self.clear()
+        for exercise in exercises:
+            self._add(exercise)
+        # Sorting once is far cheaper than inserting each entry in order
+        for position, exercise in self._exercises.items():
+            name_key, word_keys = self._prefix_keys(exercise)
+            self._name_prefixes.items.append((name_key, position))
+            self._word_prefixes.items.extend((key, position) for key in word_keys)
+        self._name_prefixes.items.sort()
+        self._word_prefixes.items.sort()
+        self.loaded = True
+        for pending in changes or ():
+            self.apply(pending)
+
+    async def load(self, db: AsyncSession) -> None:
+        async with self._lock:
+            await self._load(db)
+
+    async def _load(self, db: AsyncSession) -> None:
+        self._changes_during_load = []
+        try:
+            # Read first: writes landing during the load make the index
+            # newer than its version, never older
+            version = await read_catalog_version(db)
+            result = await db.execute(
+                select(*CATALOG_COLUMNS).order_by(
+                    ExerciseModel.created_at, ExerciseModel.exercise_id
+                )
+            )
+            exercises = [Exercise.model_validate(dict(row)) for row in result.mappings()]
+        except BaseException:
+            self._changes_during_load = None
+            raise
+        self.replace(exercises)
+        self.catalog_version = version
+        logger.info(f"Loaded {len(self._exercises)} exercises into the catalog index")
+
+    def apply(self, changes: Dict[UUID, Any], version: Optional[Tuple[int, datetime]] = None) -> None:
+        """
+        Apply committed changes: an Exercise to upsert, None for a deleted
+        exercise, or STALE for one to read back on the next search.
+
+        version is the catalog version and time the commit bumped to. When
+        it follows the version the index holds, no other process wrote in
+        between, and the index holds the new version.
+        """
+        if self._changes_during_load is not None:
+            self._changes_during_load.append(changes)
+        if not self.loaded or not changes:
+            return
+        if version is not None and self.catalog_version is not None:
+            if version[0] == self.catalog_version.version + 1:
+                self.catalog_version = self.catalog_version._replace(version=version[0], changed_at=version[1])
+        bulk = len(changes) > self.BULK_CHANGES
+        if bulk:
+            self._name_prefixes.defer()
+            self._word_prefixes.defer()
+        try:
+            for exercise_id, exercise in changes.items():
+                if exercise is STALE or exercise is None:
+                    self._remove(exercise_id)
+                    if exercise is STALE:
+                        self._stale.add(exercise_id)
+                else:
+                    self._stale.discard(exercise_id)
+                    self._add(exercise)
+        finally:
+            if bulk:
+                self._name_prefixes.merge()
+                self._word_prefixes.merge()
+
+    async def sync(self, db: AsyncSession) -> None:
+        """
+        Load the catalog if needed, catch up with changes committed by other
+        processes, once per session, and read back any stale exercises
+        """
+        synced = db.info.setdefault(SYNCED_KEY, set())
+        if self.loaded and self in synced and not self._stale:
+            return
+        # One load or catch-up at a time, however many sessions ask at once
+        async with self._lock:
+            if not self.loaded:
+                await self._load(db)
+            elif self not in synced:
+                await self._catch_up(db)
+            synced.add(self)
+            if self._stale:
+                stale, self._stale = self._stale, set()
+                result = await db.execute(
+                    select(*CATALOG_COLUMNS).where(ExerciseModel.exercise_id.in_(stale))
+                )
+                found = {row["exercise_id"]: Exercise.model_validate(dict(row)) for row in result.mappings()}
+                self.apply({exercise_id: found.get(exercise_id) for exercise_id in stale})
+
+    async def _catch_up(self, db: AsyncSession) -> None:
+        current = await read_catalog_version(db)
+        held = self.catalog_version
+        if current.version == held.version:
+            self.catalog_version = current
+            return
+        if current.version < held.version:
+            if replica_engine is not None and db.bind is replica_engine:
+                # The replica has yet to replay writes the index holds
+                return
+            # The database was restored to an earlier state
+            await self._load(db)
+            return
+        # Writes are stamped when their transaction starts, so one still open
+        # at the last sync may have committed since with an earlier stamp
+        since = held.read_at - timedelta(seconds=settings.EXERCISE_SYNC_OVERLAP_SECONDS)
+        if since < current.read_at - timedelta(days=settings.EXERCISE_TOMBSTONE_RETENTION_DAYS):
+            # Deletes as old are forgotten
+            await self._load(db)
+            return
+
+        result = await db.execute(
+            select(*CATALOG_COLUMNS)
+            .where(ExerciseModel.updated_at > since)
+            .order_by(ExerciseModel.created_at, ExerciseModel.exercise_id)
+        )
+        changes: Dict[UUID, Any] = {}
+        for row in result.mappings():
+            exercise = Exercise.model_validate(dict(row))
+            indexed = self.get(exercise.exercise_id)
+            # Commits of this process are applied already, maybe newer
+            if indexed is None or indexed.updated_at < exercise.updated_at:
+                changes[exercise.exercise_id] = exercise
+        deleted = await db.scalars(
+            select(ExerciseTombstone.exercise_id).where(ExerciseTombstone.deleted_at > since)
+        )
+        for exercise_id in deleted:
+            if exercise_id in self._position:
+                changes[exercise_id] = None
+        self.apply(changes)
+        self.catalog_version = current
+        if changes:
+            logger.debug(f"Caught up with {len(changes)} exercise changes to catalog version {current.version}")
+
+    def _add(self, exercise: Exercise) -> None:
+        """Insert or replace an exercise; a replaced one keeps its place"""
+        position = self._position.get(exercise.exercise_id)
+        if position is not None:
+            self._unindex(position)
+        else:
+            position = self._position[exercise.exercise_id] = self._next_position
+            self._next_position += 1
+        self._exercises[position] = exercise
+        for muscle_group in exercise.muscle_groups:
+            self._by_muscle_group[muscle_group].add(position)
+        for item in exercise.equipment:
+            self._by_equipment[item].add(position)
+        if exercise.difficulty:
+            self._by_difficulty[exercise.difficulty].add(position)
+        key = normalize_name(exercise.name)
+        if key not in self._by_name:
+            name_trigrams = trigrams(key)
+            self._trigram_counts[key] = len(name_trigrams)
+            for trigram in name_trigrams:
+                self._by_trigram[trigram].add(key)
+        self._by_name[key].add(position)
+        if self.vectors.built:
+            self.vectors.add(position, exercise)
+        if self.loaded:
+            name_key, word_keys = self._prefix_keys(exercise)
+            self._name_prefixes.add((name_key, position))
+            for word_key in word_keys:
+                self._word_prefixes.add((word_key, position))
+
+    @staticmethod
+    def _prefix_keys(exercise: Exercise) -> Tuple[str, List[str]]:
+        words = name_words(exercise.name)
+        return " ".join(words), [" ".join(words[i:]) for i in range(1, len(words))]
+
+    def _remove(self, exercise_id: UUID) -> None:
+        position = self._position.pop(exercise_id, None)
+        if position is not None:
+            self._unindex(position)
+            self.vectors.remove(position)
+            del self._exercises[position]
+
+    def _unindex(self, position: int) -> None:
+        exercise = self._exercises[position]
+        name_key = normalize_name(exercise.name)
+        for index, keys in (
+            (self._by_muscle_group, exercise.muscle_groups),
+            (self._by_equipment, exercise.equipment),
+            (self._by_difficulty, [exercise.difficulty] if exercise.difficulty else []),
+            (self._by_name, [name_key]),
+        ):
+            for key in keys:
+                positions = index.get(key)
+                if positions is not None:
+                    positions.discard(position)
+                    if not positions:
+                        del index[key]
+        if name_key not in self._by_name:
+            del self._trigram_counts[name_key]
+            for trigram in trigrams(name_key):
+                names = self._by_trigram[trigram]
+                names.discard(name_key)
+                if not names:
+                    del self._by_trigram[trigram]
+        if self.loaded:
+            prefix_key, word_keys = self._prefix_keys(exercise)
+            self._name_prefixes.remove((prefix_key, position))
+            for word_key in word_keys:
+                self._word_prefixes.remove((word_key, position))
+
+    def query(
+        self,
+        *,
+        equipment: Optional[List[str]] = None,
+        muscle_groups: Optional[List[str]] = None,
+        difficulty: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Exercise]:
+        """
+        Exercises using any of the equipment, working any of the muscle
+        groups and of the difficulty, oldest first. Criteria left empty
+        match everything.
+        """
+        criteria = [
+            [index[key] for key in keys if key in index]
+            for index, keys in (
+                (self._by_equipment, equipment),
+                (self._by_muscle_group, muscle_groups),
+                (self._by_difficulty, [difficulty] if difficulty else None),
+            )
+            if keys
+        ]
+        if not criteria:
+            return list(islice(self._exercises.values(), limit))
+        if not all(criteria):
+            return []
+
+        total = len(self._exercises)
+        criteria.sort(key=lambda sets: sum(map(len, sets)))
+        sizes = [min(sum(map(len, sets)), total) for sets in criteria]
+        expected_matches = total
+        for size in sizes:
+            expected_matches *= size / total
+
+        # Broad criteria: walk the catalog in order and stop at `limit` hits,
+        # visiting about limit * total / matches exercises. Narrow criteria:
+        # intersect the index sets, which touches about sum(sizes) entries
+        # but at C speed, then sort the few matches.
+        if limit * total / max(expected_matches, 1) * self.WALK_COST < sum(sizes):
+            matching = iter(self._exercises)
+            # Plain set lookups run in C, so let them reject first
+            for sets in sorted(criteria, key=len):
+                matching = filter(self._membership(sets), matching)
+            ordered_positions = list(islice(matching, limit))
+        else:
+            first = criteria[0]
+            positions = first[0] if len(first) == 1 else set().union(*first)
+            for sets in criteria[1:]:
+                if len(sets) == 1:
+                    positions = positions & sets[0]
+                else:
+                    # Intersect key by key rather than building a large union
+                    positions = set().union(*(positions & other for other in sets))
+                if not positions:
+                    return []
+            ordered_positions = sorted(positions)[:limit]
+        return [self._exercises[position] for position in ordered_positions]
+
+    @staticmethod
+    def _membership(sets: List[Set[int]]) -> Callable[[int], bool]:
+        if len(sets) == 1:
+            return sets[0].__contains__
+        return lambda position: any(position in positions for positions in sets)
+
+    def get_by_name_key(self, key: str) -> Optional[Exercise]:
+        """The oldest exercise whose normalized name is key"""
+        positions = self._by_name.get(key)
+        return self._exercises[min(positions)] if positions else None
+
+    def resolve_name(self, name: str, threshold: Optional[float] = None) -> Optional[Exercise]:
+        """
+        The exercise best matching a name, or None below the threshold.
+
+        Names equal after normalization match first, in O(1). Otherwise the
+        exercise sharing the most trigrams wins, if its similarity reaches
+        threshold (EXERCISE_NAME_MATCH_THRESHOLD by default). Ties go to the
+        oldest exercise.
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        exact = self.get_by_name_key(key)
+        if exact is not None:
+            return exact
+
+        if threshold is None:
+            threshold = settings.EXERCISE_NAME_MATCH_THRESHOLD
+        name_trigrams = trigrams(key)
+        # Reaching the threshold takes at least `needed` of the name's
+        # trigrams, so any match has one of its len - needed + 1 rarest.
+        # Only those postings are read, skipping the common trigrams.
+        needed = max(math.ceil(threshold * len(name_trigrams)), 1)
+        postings = sorted((self._by_trigram.get(trigram, ()) for trigram in name_trigrams), key=len)
+        candidates = set().union(*postings[:len(name_trigrams) - needed + 1])
+
+        # Similarity is at most the ratio of the two trigram counts, so
+        # names much shorter or longer than this one are skipped unscored
+        size = len(name_trigrams)
+        smallest, largest = threshold * size, size / threshold
+        best, best_score = None, threshold
+        for candidate in candidates:
+            candidate_size = self._trigram_counts[candidate]
+            if not smallest <= candidate_size <= largest:
+                continue
+            shared = sum(candidate in posting for posting in postings)
+            score = shared / (size + candidate_size - shared)
+            if score > best_score or (
+                score == best_score
+                and (best is None or min(self._by_name[candidate]) < min(self._by_name[best]))
+            ):
+                best, best_score = candidate, score
+        return None if best is None else self._exercises[min(self._by_name[best])]
+
+    def similar(
+        self,
+        name: str,
+        muscle_groups: Iterable[str] = (),
+        equipment: Iterable[str] = (),
+        limit: int = 5
+    ) -> List[Tuple[Exercise, float]]:
+        """
+        The exercises most like the one described, with their cosine
+        similarity from 0 to 1, best first
+        """
+        if not self.vectors.built:
+            self.vectors.build(self._exercises)
+        return [
+            (self._exercises[position], score)
+            for position, score in self.vectors.nearest(name, muscle_groups, equipment, limit)
+        ]
+
+    def prefix_matches(self, prefix: str, limit: int = 10) -> List[Exercise]:
+        """
+        Exercises whose name starts with prefix, then those with a later
+        word starting with it. Each group is in alphabetical order of the
+        matching text, oldest first among equals. Case and punctuation are
+        ignored.
+        """
+        key = " ".join(name_words(prefix))
+        if not key:
+            return []
+        positions: List[int] = []
+        for entries in (self._name_prefixes.items, self._word_prefixes.items):
+            index = bisect_left(entries, (key,))
+            while index < len(entries) and len(positions) < limit:
+                entry_key, position = entries[index]
+                if not entry_key.startswith(key):
+                    break
+                if position not in positions:
+                    positions.append(position)
+                index += 1
+        return [self._exercises[position] for position in positions]
+
+    async def suggest(self, db: AsyncSession, prefix: str, limit: int = 10) -> List[Exercise]:
+        await self.sync(db)
+        return self.prefix_matches(prefix, limit)
+
+    async def find_by_name(
+        self, db: AsyncSession, name: str, threshold: Optional[float] = None
+    ) -> Optional[Exercise]:
+        await self.sync(db)
+        return self.resolve_name(name, threshold)
+
+    async def find_similar(
+        self,
+        db: AsyncSession,
+        name: str,
+        muscle_groups: Iterable[str] = (),
+        equipment: Iterable[str] = (),
+        threshold: Optional[float] = None
+    ) -> Optional[Exercise]:
+        """
+        The exercise most like the one described, or None below threshold
+        (EXERCISE_SIMILARITY_THRESHOLD by default). Lookups and matches are
+        counted in vectors.stats().
+        """
+        await self.sync(db)
+        if threshold is None:
+            threshold = settings.EXERCISE_SIMILARITY_THRESHOLD
+        best = self.similar(name, muscle_groups, equipment, limit=1)
+        match = best[0][0] if best and best[0][1] >= threshold else None
+        self.vectors.record(match is not None)
+        return match
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        equipment: Optional[List[str]] = None,
+        muscle_groups: Optional[List[str]] = None,
+        difficulty: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Exercise]:
+        await self.sync(db)
+        return self.query(
+            equipment=equipment,
+            muscle_groups=muscle_groups,
+            difficulty=difficulty,
+            limit=limit
+        )
+
+exercise_catalog = ExerciseCatalog()
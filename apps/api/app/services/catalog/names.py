@@ -0,0 +1,46 @@
+"""
+Exercise name normalization and trigram similarity.
+
+normalize_name folds the spelling differences generated workouts tend to
+have, so "Push-ups", "Push Up" and "pushups" share the key "pushup".
+Names that still differ are compared by the similarity of their character
+trigrams, as Postgres pg_trgm does. name_words splits names for prefix
+suggestions, where what the user typed so far must stay a prefix.
+"""
+import re
+import sys
+from typing import FrozenSet, List
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _singular(word: str) -> str:
+    if len(word) <= 2:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+def name_words(name: str) -> List[str]:
+    """Lowercase words of a name, without punctuation"""
+    return _WORD.findall(name.lower().replace("&", " and "))
+
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation and spaces, and singularize each word"""
+    return "".join(_singular(word) for word in name_words(name))
+
+def trigrams(key: str) -> FrozenSet[str]:
+    """Character trigrams of a normalized name, padded like pg_trgm's"""
+    padded = f"  {key} "
+    # Interned, so the trigram index keeps one copy of each trigram
+    return frozenset(sys.intern(padded[i:i + 3]) for i in range(len(padded) - 2))
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Shared trigrams over all trigrams of either name, from 0 to 1"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
@@ -0,0 +1,574 @@
+"""
+Exercise catalog file shared by all worker processes.
+
+The in-process catalog (index.py) is a copy per worker, hundreds of MiB
+for a large catalog. When EXERCISE_CATALOG_FILE is set, ExerciseService
+lookups and name suggestions read this file instead, and workers do not
+load their own copy. Every worker maps the same file read-only, so the
+operating system keeps one copy of its pages however many workers run,
+and lookups read it in place.
+
+The file is built from the exercises table. Any worker that commits an
+exercise change rebuilds it, no sooner than
+EXERCISE_CATALOG_FILE_REBUILD_INTERVAL_SECONDS after the file's last
+build, so a stream of writes makes a build per interval. Builds hold a
+lock file across processes from before the table is read, and one that
+finds the file already at the database's catalog version stops there:
+workers noting the same writes, or all finding the file missing at
+startup, wait for one build instead of each reading the table. A build is
+written to a temporary file and renamed over the old one, so readers see
+either the old or the new file, never a partial one. Readers notice a new file on
+their next lookup and map it; lookups until then use the file they had.
+The header records the catalog version the file was built from (see
+version.py); the first lookup of a session compares it with the database
+and asks for a rebuild if the file is behind.
+
+Layout: a magic number, then a JSON header locating each section. The
+sections are arrays of fixed-width little-endian records read with NumPy,
+with text in one UTF-8 string table that records point into by offset and
+length:
+
+    records          one per exercise, oldest first
+    strings          the string table
+    lists            muscle group and equipment items of records
+    muscle_groups,   sorted values, each with a run of postings
+    equipment,
+    difficulty
+    postings         record numbers, ascending within each run
+    names            sorted normalized names, with the oldest record of
+                     each and its trigram count
+    trigrams         sorted name trigrams, each with a run of name_postings
+    name_postings    numbers of names having the trigram
+    name_prefixes    sorted name words, joined, with their record, for
+                     suggestions of names being typed
+    word_prefixes    the same from each name's second, third... word on
+    vector_*         the similarity vectors' postings (see vectors.py)
+    document_counts  their feature counts, for weighting lookups
+"""
+import asyncio
+import fcntl
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.models.exercise import Exercise as ExerciseModel
+from app.schemas.exercise import Exercise
+from app.services.catalog.index import CATALOG_COLUMNS, SYNCED_KEY
+from app.services.catalog.names import name_words, normalize_name, trigrams
+from app.services.catalog.vectors import ARRAYS, ExerciseVectors
+from app.services.catalog.version import read_catalog_version
+
+logger = get_logger(__name__)
+
+MAGIC = b"FHCATLG1"
+FORMAT = 3
+_PREFIX = struct.Struct("<8sI")
+# Sections start on cache line boundaries
+_ALIGNMENT = 64
+# How often a build waiting for another worker's tries the lock
+_BUILD_LOCK_POLL_SECONDS = 0.05
+
+# Offset and length of a string, or start and count of a run of items
+SPAN = np.dtype([("start", "<u4"), ("count", "<u4")])
+NULL = np.iinfo(np.uint32).max
+RECORD = np.dtype([
+    ("exercise_id", "V16"),
+    ("created_at", "<i8"),
+    ("updated_at", "<i8"),
+    ("name", SPAN),
+    ("description", SPAN),
+    ("difficulty", SPAN),
+    ("instructions", SPAN),
+    ("video_url", SPAN),
+    ("muscle_groups", SPAN),
+    ("equipment", SPAN),
+])
+FACET = np.dtype([("value", SPAN), ("postings", SPAN)])
+NAME = np.dtype([("key", SPAN), ("record", "<u4"), ("trigrams", "<u4")])
+TRIGRAM = np.dtype([("trigram", SPAN), ("postings", SPAN)])
+PREFIX = np.dtype([("key", SPAN), ("record", "<u4")])
+
+_TEXT_FIELDS = ("name", "description", "difficulty", "instructions", "video_url")
+_LIST_FIELDS = ("muscle_groups", "equipment")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def _microseconds(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+class _Strings:
+    """The string table being built; repeated strings are stored once"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self._spans: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return NULL, NULL
+        span = self._spans.get(value)
+        if span is None:
+            encoded = value.encode()
+            span = self._spans[value] = (len(self.data), len(encoded))
+            self.data += encoded
+        return span
+
+def _runs(groups: Dict[str, List[int]], strings: _Strings, dtype: np.dtype, postings: List[int]) -> np.ndarray:
+    """Table of the values sorted, each with its run, appended to postings"""
+    rows = []
+    for value in sorted(groups, key=str.encode):
+        rows.append((strings.add(value), (len(postings), len(groups[value]))))
+        postings.extend(groups[value])
+    return np.array(rows, dtype=dtype)
+
+def _prefixes(entries: List[Tuple[str, int]], strings: _Strings) -> np.ndarray:
+    """Table of (key, record) entries in key order, then record order"""
+    entries.sort(key=lambda entry: (entry[0].encode(), entry[1]))
+    return np.array([(strings.add(key), record) for key, record in entries], dtype=PREFIX)
+
+def encode_catalog(
+    exercises: List[Exercise], built_from: datetime, version: str = ""
+) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    """
+    The header and sections of a catalog file of exercises, oldest first,
+    read at built_from with the catalog at version (an ETag)
+    """
+    strings = _Strings()
+    records = []
+    items: List[Tuple[int, int]] = []
+    facets: Dict[str, Dict[str, List[int]]] = {"muscle_groups": {}, "equipment": {}, "difficulty": {}}
+    names: Dict[str, int] = {}
+    name_prefixes: List[Tuple[str, int]] = []
+    word_prefixes: List[Tuple[str, int]] = []
+    for number, exercise in enumerate(exercises):
+        record = [
+            exercise.exercise_id.bytes,
+            _microseconds(exercise.created_at),
+            _microseconds(exercise.updated_at),
+        ]
+        record.extend(strings.add(getattr(exercise, field)) for field in _TEXT_FIELDS)
+        for field in _LIST_FIELDS:
+            values = getattr(exercise, field)
+            record.append((len(items), len(values)))
+            items.extend(strings.add(value) for value in values)
+            for value in dict.fromkeys(values):
+                facets[field].setdefault(value, []).append(number)
+        records.append(tuple(record))
+        if exercise.difficulty:
+            facets["difficulty"].setdefault(exercise.difficulty, []).append(number)
+        names.setdefault(normalize_name(exercise.name), number)
+        words = name_words(exercise.name)
+        name_prefixes.append((" ".join(words), number))
+        word_prefixes.extend((" ".join(words[i:]), number) for i in range(1, len(words)))
+
+    postings: List[int] = []
+    sections = {"records": np.array(records, dtype=RECORD).tobytes()}
+    for field, groups in facets.items():
+        sections[field] = _runs(groups, strings, FACET, postings).tobytes()
+    sections["postings"] = np.array(postings, dtype="<u4").tobytes()
+
+    name_rows = []
+    by_trigram: Dict[str, List[int]] = {}
+    for number, key in enumerate(sorted(names, key=str.encode)):
+        name_trigrams = trigrams(key)
+        name_rows.append((strings.add(key), names[key], len(name_trigrams)))
+        for trigram in name_trigrams:
+            by_trigram.setdefault(trigram, []).append(number)
+    name_postings: List[int] = []
+    sections["names"] = np.array(name_rows, dtype=NAME).tobytes()
+    sections["trigrams"] = _runs(by_trigram, strings, TRIGRAM, name_postings).tobytes()
+    sections["name_postings"] = np.array(name_postings, dtype="<u4").tobytes()
+    sections["name_prefixes"] = _prefixes(name_prefixes, strings).tobytes()
+    sections["word_prefixes"] = _prefixes(word_prefixes, strings).tobytes()
+
+    vectors = ExerciseVectors()
+    vectors.build(dict(enumerate(exercises)))
+    for name, array in vectors.arrays().items():
+        sections[name] = array.astype(ARRAYS[name]).tobytes()
+    sections["lists"] = np.array(items, dtype=SPAN).tobytes()
+    sections["strings"] = bytes(strings.data)
+
+    header = {
+        "format": FORMAT,
+        "built_from": built_from.isoformat(),
+        "version": version,
+        "count": len(exercises),
+        "dimensions": ExerciseVectors.DIMENSIONS,
+    }
+    return header, sections
+
+def _read_header(data) -> Dict[str, Any]:
+    magic, length = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an exercise catalog file")
+    header = json.loads(bytes(data[_PREFIX.size:_PREFIX.size + length]))
+    if header["format"] != FORMAT:
+        raise ValueError(f"Catalog file format {header['format']} is not {FORMAT}")
+    return header
+
+def _file_header(path: str) -> Optional[Dict[str, Any]]:
+    """The header of the catalog file at path, None if there is no readable one"""
+    try:
+        with open(path, "rb") as file:
+            prefix = file.read(_PREFIX.size)
+            length = _PREFIX.unpack(prefix)[1]
+            return _read_header(prefix + file.read(length))
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+@asynccontextmanager
+async def _build_lock(path: str) -> AsyncIterator[None]:
+    """Hold the lock of builds of the file at path, across processes"""
+    with open(f"{path}.build", "a") as lock:
+        # Polled rather than blocking a thread for the length of a build
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(_BUILD_LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def write_catalog_file(path: str, exercises: List[Exercise], built_from: datetime, version: str = "") -> bool:
+    """
+    Write a catalog file and rename it into place, unless the file there
+    was built from a later read of the table. Returns whether it replaced it.
+    """
+    header, sections = encode_catalog(exercises, built_from, version)
+    # Lay the sections out after the header; its length depends on the
+    # offsets it lists, so reserve room for them first
+    header["sections"] = {name: [0, len(data)] for name, data in sections.items()}
+    reserved = len(json.dumps(header)) + 16 * len(sections)
+    offset = _PREFIX.size + reserved
+    for name, data in sections.items():
+        offset = math.ceil(offset / _ALIGNMENT) * _ALIGNMENT
+        header["sections"][name] = [offset, len(data)]
+        offset += len(data)
+    encoded = json.dumps(header).encode()
+    assert len(encoded) <= reserved
+    encoded = encoded.ljust(reserved)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    file = tempfile.NamedTemporaryFile(dir=directory, prefix=".catalog-", delete=False)
+    try:
+        with file:
+            file.write(_PREFIX.pack(MAGIC, len(encoded)) + encoded)
+            for name, data in sections.items():
+                file.seek(header["sections"][name][0])
+                file.write(data)
+            # Empty sections at the end still lie within the file
+            file.truncate(offset)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(file.name, 0o644)
+        # Workers finishing builds at once must not put an older one back
+        with open(f"{path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            current = _file_header(path)
+            if current is not None and datetime.fromisoformat(current["built_from"]) >= built_from:
+                return False
+            os.replace(file.name, path)
+        return True
+    finally:
+        if os.path.exists(file.name):
+            os.unlink(file.name)
+
+class _Mapping:
+    """One mapped catalog file and NumPy views of its sections"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self.stat = os.fstat(file.fileno())
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _read_header(self.data)
+        self.built_from = datetime.fromisoformat(header["built_from"])
+        self.version = header["version"]
+        self.count = header["count"]
+        sections = header["sections"]
+
+        def view(name: str, dtype) -> np.ndarray:
+            offset, length = sections[name]
+            return np.frombuffer(self.data, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+        self.records = view("records", RECORD)
+        self.lists = view("lists", SPAN)
+        self.facets = {field: view(field, FACET) for field in ("muscle_groups", "equipment", "difficulty")}
+        self.postings = view("postings", "<u4")
+        self.names = view("names", NAME)
+        self.trigrams = view("trigrams", TRIGRAM)
+        self.name_postings = view("name_postings", "<u4")
+        self.prefixes = (view("name_prefixes", PREFIX), view("word_prefixes", PREFIX))
+        self.vectors = {name: view(name, dtype) for name, dtype in ARRAYS.items()}
+        self.strings_offset = sections["strings"][0]
+
+    def text(self, span) -> Optional[str]:
+        start, count = span if isinstance(span, tuple) else span.item()
+        if count == NULL:
+            return None
+        start += self.strings_offset
+        return self.data[start:start + count].decode()
+
+    def find(self, table: np.ndarray, field: str, value: str) -> Optional[int]:
+        """Row of a sorted table whose field holds value, by binary search"""
+        encoded = value.encode()
+        row = bisect_left(range(len(table)), encoded, key=lambda i: self.text(table[i][field]).encode())
+        if row < len(table) and self.text(table[row][field]) == value:
+            return row
+        return None
+
+    def run(self, postings: np.ndarray, span) -> np.ndarray:
+        start = int(span["start"])
+        return postings[start:start + int(span["count"])]
+
+    def exercise(self, number: int) -> Exercise:
+        # One conversion of the record to Python values, then field by field
+        exercise_id, created_at, updated_at, *spans = self.records[number].item()
+        fields: Dict[str, Any] = {
+            "exercise_id": UUID(bytes=bytes(exercise_id)),
+            "created_at": _EPOCH + timedelta(microseconds=created_at),
+            "updated_at": _EPOCH + timedelta(microseconds=updated_at),
+        }
+        for field, span in zip(_TEXT_FIELDS, spans):
+            fields[field] = self.text(span)
+        for field, (start, count) in zip(_LIST_FIELDS, spans[len(_TEXT_FIELDS):]):
+            fields[field] = [self.text(item) for item in self.lists[start:start + count].tolist()]
+        # Validated when the file was built
+        return Exercise.model_construct(**fields)
+
+class SharedCatalog:
+    """
+    Lookups over the shared catalog file, with the same methods as
+    ExerciseCatalog. Builds the file when it is missing.
+    """
+
+    def __init__(self):
+        self._mapping: Optional[_Mapping] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._dirty = False
+        # Counters survive remapping; lookups and matches since startup
+        self.vectors = ExerciseVectors()
+
+    @property
+    def path(self) -> Optional[str]:
+        return settings.EXERCISE_CATALOG_FILE
+
+    async def rebuild(self) -> bool:
+        """
+        Build the file from the exercises table; False if it was already
+        current or a newer build won
+        """
+        async with _build_lock(self.path), AsyncSessionLocal() as db:
+            # Taken before the read, so a later build has seen at least as much
+            version = await read_catalog_version(db)
+            # Another worker may have built it while this one waited
+            header = _file_header(self.path)
+            if header is not None and header["version"] == version.etag:
+                return False
+            result = await db.execute(
+                select(*CATALOG_COLUMNS).order_by(ExerciseModel.created_at, ExerciseModel.exercise_id)
+            )
+            exercises = [Exercise.model_validate(dict(row)) for row in result.mappings()]
+            replaced = await asyncio.to_thread(
+                write_catalog_file, self.path, exercises, version.read_at, version.etag
+            )
+        if replaced:
+            logger.info(f"Wrote {len(exercises)} exercises to the shared catalog file {self.path}")
+        return replaced
+
+    def changed(self) -> None:
+        """
+        Note committed exercise changes; the file is rebuilt as soon as
+        EXERCISE_CATALOG_FILE_REBUILD_INTERVAL_SECONDS have passed since its
+        last build
+        """
+        if not self.path:
+            return
+        self._dirty = True
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._rebuild_task = loop.create_task(self._rebuild_later())
+
+    async def _rebuild_later(self) -> None:
+        while self._dirty and self.path:
+            # The file's modification time is its last build, by any worker
+            try:
+                built = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                built = 0.0
+            wait = built + settings.EXERCISE_CATALOG_FILE_REBUILD_INTERVAL_SECONDS - time.time()
+            await asyncio.sleep(max(wait, 0))
+            self._dirty = False
+            try:
+                await self.rebuild()
+            except Exception:
+                logger.error("Rebuilding the shared catalog file failed", exc_info=True)
+
+    async def wait_for_rebuild(self) -> None:
+        """Wait for a scheduled rebuild, if any, to finish"""
+        if self._rebuild_task is not None:
+            await self._rebuild_task
+
+    async def _current(self, db: Optional[AsyncSession]) -> _Mapping:
+        """
+        The mapping of the latest file, built or remapped as needed. Once
+        per session of db, a file behind the database is rebuilt; lookups
+        use it meanwhile.
+        """
+        mapping = await self._latest()
+        synced = db.info.setdefault(SYNCED_KEY, set()) if db is not None else None
+        if synced is not None and self not in synced:
+            synced.add(self)
+            if (await read_catalog_version(db)).etag != mapping.version:
+                self.changed()
+        return mapping
+
+    async def _latest(self) -> _Mapping:
+        """The mapping of the latest file, built if missing"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            await self.rebuild()
+            stat = os.stat(self.path)
+        mapping = self._mapping
+        if mapping is None or (self.path, stat.st_ino, stat.st_mtime_ns) != (
+            mapping.path, mapping.stat.st_ino, mapping.stat.st_mtime_ns
+        ):
+            # The old mapping is unmapped once nothing refers to it
+            mapping = self._mapping = _Mapping(self.path)
+            self.vectors.attach(mapping.vectors, mapping.count)
+        return mapping
+
+    def __len__(self) -> int:
+        return 0 if self._mapping is None else self._mapping.count
+
+    async def search(
+        self,
+        db: Optional[AsyncSession] = None,
+        *,
+        equipment: Optional[List[str]] = None,
+        muscle_groups: Optional[List[str]] = None,
+        difficulty: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Exercise]:
+        """Same as ExerciseCatalog.search"""
+        mapping = await self._current(db)
+        # A mask over the records per criterion: set for any of its values,
+        # then combined across criteria. Runs are already in record order
+        matching: Optional[np.ndarray] = None
+        for field, values in (
+            ("equipment", equipment),
+            ("muscle_groups", muscle_groups),
+            ("difficulty", [difficulty] if difficulty else None),
+        ):
+            if not values:
+                continue
+            table = mapping.facets[field]
+            found = np.zeros(mapping.count, dtype=bool)
+            for row in (mapping.find(table, "value", value) for value in values):
+                if row is not None:
+                    found[mapping.run(mapping.postings, table[row]["postings"])] = True
+            matching = found if matching is None else matching & found
+        if matching is None:
+            numbers = range(min(limit, mapping.count))
+        else:
+            numbers = np.flatnonzero(matching)[:limit]
+        return [mapping.exercise(int(number)) for number in numbers]
+
+    async def suggest(self, db: AsyncSession, prefix: str, limit: int = 10) -> List[Exercise]:
+        """Same as ExerciseCatalog.suggest"""
+        mapping = await self._current(db)
+        key = " ".join(name_words(prefix))
+        if not key:
+            return []
+        numbers: List[int] = []
+        for table in mapping.prefixes:
+            # Keys sort as their UTF-8 bytes, so those starting with key
+            # follow the first at or after it
+            encoded = key.encode()
+            row = bisect_left(range(len(table)), encoded, key=lambda i: mapping.text(table[i]["key"]).encode())
+            while row < len(table) and len(numbers) < limit:
+                entry_key, number = table[row].item()
+                if not mapping.text(entry_key).startswith(key):
+                    break
+                if number not in numbers:
+                    numbers.append(number)
+                row += 1
+        return [mapping.exercise(number) for number in numbers]
+
+    def _resolve(self, mapping: _Mapping, name: str, threshold: float) -> Optional[Exercise]:
+        key = normalize_name(name)
+        if not key:
+            return None
+        row = mapping.find(mapping.names, "key", key)
+        if row is not None:
+            return mapping.exercise(int(mapping.names[row]["record"]))
+
+        # Shared trigrams of every name having any of this name's, counted
+        # at once; see ExerciseCatalog.resolve_name for the scoring
+        name_trigrams = trigrams(key)
+        runs = []
+        for trigram in name_trigrams:
+            found = mapping.find(mapping.trigrams, "trigram", trigram)
+            if found is not None:
+                runs.append(mapping.run(mapping.name_postings, mapping.trigrams[found]["postings"]))
+        if not runs:
+            return None
+        candidates, shared = np.unique(np.concatenate(runs), return_counts=True)
+        sizes = mapping.names["trigrams"][candidates]
+        scores = shared / (len(name_trigrams) + sizes - shared)
+        matches = scores >= threshold
+        if not matches.any():
+            return None
+        records = mapping.names["record"][candidates[matches]]
+        # Best score, then the oldest exercise
+        best = np.lexsort((records, -scores[matches]))[0]
+        return mapping.exercise(int(records[best]))
+
+    async def find_by_name(self, db: AsyncSession, name: str, threshold: Optional[float] = None) -> Optional[Exercise]:
+        """Same as ExerciseCatalog.find_by_name"""
+        mapping = await self._current(db)
+        if threshold is None:
+            threshold = settings.EXERCISE_NAME_MATCH_THRESHOLD
+        return self._resolve(mapping, name, threshold)
+
+    async def find_similar(
+        self,
+        db: AsyncSession,
+        name: str,
+        muscle_groups: Iterable[str] = (),
+        equipment: Iterable[str] = (),
+        threshold: Optional[float] = None
+    ) -> Optional[Exercise]:
+        """Same as ExerciseCatalog.find_similar"""
+        mapping = await self._current(db)
+        if threshold is None:
+            threshold = settings.EXERCISE_SIMILARITY_THRESHOLD
+        best = self.vectors.nearest(name, muscle_groups, equipment, k=1)
+        match = mapping.exercise(best[0][0]) if best and best[0][1] >= threshold else None
+        self.vectors.record(match is not None)
+        return match
+
+shared_catalog = SharedCatalog()
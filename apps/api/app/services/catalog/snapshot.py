@@ -0,0 +1,118 @@
+"""
+Whole-catalog snapshots for clients that keep the library offline.
+
+A snapshot is the catalog as columnar JSON, one array per field, with
+gzip applied: the values of a column repeat a lot, and compress better
+side by side than spread over row objects. It is read from the database
+once per catalog version (see version.py), encoded off the event loop, and
+then served as stored bytes until the version moves.
+
+Each snapshot carries a `since` cursor for GET /exercises/changes, taken
+from the database clock before the rows are read, less
+EXERCISE_SYNC_OVERLAP_SECONDS so writes committing meanwhile come again in
+the first changes. Clients apply upserts by exercise_id, so seeing one
+twice is harmless.
+"""
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import replica_engine
+from app.core.logging import get_logger
+from app.models.exercise import Exercise as ExerciseModel
+from app.schemas.exercise import Exercise
+from app.services.catalog.index import CATALOG_COLUMNS
+from app.services.catalog.version import read_catalog_version
+
+logger = get_logger(__name__)
+
+COLUMNS = list(Exercise.model_fields)
+
+def exercise_columns(exercises: Iterable[Any]) -> Dict[str, List[Any]]:
+    """Field values of exercises (schema or ORM objects), one list per field"""
+    columns: Dict[str, List[Any]] = {column: [] for column in COLUMNS}
+    for exercise in exercises:
+        for column, values in columns.items():
+            values.append(getattr(exercise, column))
+    return columns
+
+def sync_cursor(db: AsyncSession, read_at: datetime) -> datetime:
+    """
+    The cursor of data db reads after read_at, a time of the database
+    clock: EXERCISE_SYNC_OVERLAP_SECONDS before it
+    """
+    cursor = read_at - timedelta(seconds=settings.EXERCISE_SYNC_OVERLAP_SECONDS)
+    if db.bind is replica_engine and replica_engine is not None:
+        # The replica may not have the latest writes yet
+        cursor -= timedelta(seconds=settings.DB_REPLICA_MAX_LAG_SECONDS)
+    return cursor
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class CatalogSnapshot:
+    """One catalog version as gzip-compressed columnar JSON"""
+
+    def __init__(self, etag: str, since: datetime, count: int, body: bytes):
+        self.etag = etag
+        self.since = since
+        self.count = count
+        self.body = body
+
+    @classmethod
+    def encode(cls, etag: str, since: datetime, columns: Dict[str, List[Any]]) -> "CatalogSnapshot":
+        count = len(columns[COLUMNS[0]])
+        document = {"version": etag, "since": since, "count": count, "exercises": columns}
+        data = json.dumps(document, default=_json_default, separators=(",", ":")).encode()
+        # mtime=0 keeps the bytes the same for the same catalog
+        return cls(etag, since, count, gzip.compress(data, compresslevel=6, mtime=0))
+
+class SnapshotCache:
+    """The snapshot of the latest catalog version, built on first request"""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        """The snapshot of the catalog version db sees, read with db if not built yet"""
+        # Read before the rows, so the rows hold at least this version and
+        # the cursor comes before them
+        version = await read_catalog_version(db)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.etag == version.etag:
+            return snapshot
+        # One build per version, however many clients ask at once
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.etag == version.etag:
+                return snapshot
+            result = await db.execute(
+                select(*CATALOG_COLUMNS).order_by(ExerciseModel.created_at, ExerciseModel.exercise_id)
+            )
+            columns = exercise_columns(result.all())
+            # Encoding and compressing run in a thread
+            snapshot = await asyncio.to_thread(
+                CatalogSnapshot.encode, version.etag, sync_cursor(db, version.read_at), columns
+            )
+            self._snapshot = snapshot
+            logger.info(
+                f"Built catalog snapshot {version.etag}: {snapshot.count} exercises, {len(snapshot.body)} bytes"
+            )
+            return snapshot
+
+catalog_snapshots = SnapshotCache()
@@ -0,0 +1,343 @@
+"""
+Vector similarity of exercises, for catching near-duplicates by content.
+
+Name resolution (see names.py) matches spellings of the same name. It
+cannot tell that "DB Goblet Squat" is the "Dumbbell Goblet Squat" already
+in the catalog. Here each exercise is a hashed TF-IDF vector of its name
+words, name trigrams, muscle groups and equipment, and candidates are
+compared by cosine similarity, entirely in process.
+
+Features are hashed into a fixed number of dimensions, so there is no
+vocabulary to keep. Inverse document frequencies are counted per dimension
+and taken when a vector is made; vectors made before later inserts keep
+their weights until the catalog is loaded again.
+
+An exercise sets a few dozen of the dimensions, so vectors are kept sparse:
+postings of each dimension's rows and weights, which a lookup scores by
+reading only the dimensions it sets. A vector costs about 12 bytes per
+feature, some 300 bytes an exercise, rather than a dense row.
+"""
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.schemas.exercise import Exercise
+from app.services.catalog.names import name_words, normalize_name, trigrams
+
+# Shorthand common in generated exercise names
+ABBREVIATIONS = {
+    "db": "dumbbell",
+    "dbs": "dumbbell",
+    "bb": "barbell",
+    "kb": "kettlebell",
+    "kbs": "kettlebell",
+    "bw": "bodyweight",
+    "rdl": "romanian deadlift",
+    "ohp": "overhead press",
+}
+
+# Weight of each kind of feature before IDF. Trigrams only help with words
+# spelled differently, so many of them must not outweigh a few shared words
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.25
+MUSCLE_GROUP_WEIGHT = 0.5
+
+# Arrays of the vectors that lookups read, with their stored types; see
+# ExerciseVectors.arrays and the shared catalog file
+ARRAYS = {
+    "vector_dimensions": "<i4",
+    "vector_runs": "<i8",
+    "vector_rows": "<i4",
+    "vector_weights": "<f4",
+    "document_counts": "<i4",
+}
+
+@lru_cache(maxsize=1 << 16)
+def _words(text: str) -> Tuple[str, ...]:
+    # Cached: equipment and muscle groups, and many name words, repeat
+    words = []
+    for word in name_words(text):
+        words.extend(ABBREVIATIONS.get(word, word).split())
+    return tuple(normalize_name(word) for word in words)
+
+def features(name: str, muscle_groups: Iterable[str] = (), equipment: Iterable[str] = ()) -> Dict[str, float]:
+    """Weighted features of an exercise, before hashing"""
+    words = _words(name)
+    found: Dict[str, float] = {}
+    for trigram in trigrams("".join(words)):
+        found[f"t:{trigram}"] = TRIGRAM_WEIGHT
+    # Equipment shares the name words' features, so a name that spells out
+    # its equipment matches one that leaves it to the equipment list
+    for item in equipment:
+        for word in _words(item):
+            found[f"w:{word}"] = WORD_WEIGHT
+    for word in words:
+        found[f"w:{word}"] = WORD_WEIGHT
+    for muscle_group in muscle_groups:
+        found[f"m:{normalize_name(muscle_group)}"] = MUSCLE_GROUP_WEIGHT
+    return found
+
+class ExerciseVectors:
+    """
+    Hashed TF-IDF vectors of exercises, one per catalog position.
+
+    Vectors built together are frozen into postings, sorted by dimension,
+    with each row's dimensions kept alongside for removals. Vectors added
+    later are kept apart, one pair of arrays per position, and folded into
+    the postings once there are COMPACT_SIZE of them. Removed rows are
+    masked out of the postings until then. Lookups and matches are counted
+    from startup.
+    """
+
+    # Hashed dimensions. Only the document counts grow with them, 4 bytes a
+    # dimension; fewer make unrelated features collide
+    DIMENSIONS = 1 << 18
+    # Vectors added since the postings were built that fold them in
+    COMPACT_SIZE = 1024
+
+    def __init__(self):
+        self.lookups = 0
+        self.matches = 0
+        self.clear()
+
+    def clear(self) -> None:
+        self.built = False
+        # The postings: the dimensions set, sorted, each with its run of
+        # rows and weights, rows ascending
+        self._postings_dimensions = np.zeros(0, dtype=np.int32)
+        self._runs = np.zeros(1, dtype=np.int64)
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        # Dimensions of each row of the postings, and the rows still current
+        self._row_starts: Optional[np.ndarray] = np.zeros(1, dtype=np.int64)
+        self._row_dimensions = np.zeros(0, dtype=np.int32)
+        self._live = np.zeros(0, dtype=bool)
+        # Vectors added since, by position
+        self._added: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._added_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        # Rows with each dimension set, for the IDF weights
+        self._document_counts = np.zeros(self.DIMENSIONS, dtype=np.int32)
+        self._documents = 0
+        # Features repeat across exercises, trigrams especially
+        self._hashes: Dict[str, Tuple[int, float]] = {}
+
+    def __len__(self) -> int:
+        return self._documents
+
+    def _hashed(self, found: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Dimensions and signed weights of the features"""
+        dimensions, weights = [], []
+        for feature, weight in found.items():
+            hashed = self._hashes.get(feature)
+            if hashed is None:
+                digest = zlib.crc32(feature.encode())
+                # A sign bit per feature makes colliding features cancel
+                # out on average instead of adding up
+                hashed = self._hashes[feature] = (
+                    digest % self.DIMENSIONS, 1.0 if digest & 0x80000000 else -1.0
+                )
+            dimensions.append(hashed[0])
+            weights.append(weight * hashed[1])
+        return np.array(dimensions, dtype=np.int64), np.array(weights, dtype=np.float32)
+
+    def _idf(self, dimensions: np.ndarray) -> np.ndarray:
+        counts = self._document_counts[dimensions]
+        return np.log((1 + self._documents) / (1 + counts)).astype(np.float32) + 1
+
+    def _vector(self, dimensions: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """The normalized vector, as its sorted dimensions and their weights"""
+        dimensions, inverse = np.unique(dimensions, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights, minlength=len(dimensions)).astype(np.float32)
+        weights *= self._idf(dimensions)
+        norm = np.linalg.norm(weights)
+        return dimensions.astype(np.int32), weights / norm if norm else weights
+
+    def _count(self, dimensions: np.ndarray, change: int) -> None:
+        self._document_counts[dimensions] += change
+        self._documents += change
+
+    def _freeze(self, rows: np.ndarray, dimensions: np.ndarray, weights: np.ndarray, live: np.ndarray) -> None:
+        """Make the postings of vectors given as (row, dimension, weight) entries"""
+        order = np.lexsort((dimensions, rows))
+        rows, dimensions, weights = rows[order], dimensions[order], weights[order]
+        self._row_starts = np.zeros(len(live) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(live)), out=self._row_starts[1:])
+        self._row_dimensions = dimensions.astype(np.int32)
+        # A stable sort keeps the rows of each dimension ascending
+        order = np.argsort(dimensions, kind="stable")
+        self._postings_dimensions, starts = np.unique(dimensions[order], return_index=True)
+        self._postings_dimensions = self._postings_dimensions.astype(np.int32)
+        self._runs = np.append(starts, len(order)).astype(np.int64)
+        self._rows = rows[order].astype(np.int32)
+        self._weights = weights[order].astype(np.float32)
+        self._live = live
+        self._added = {}
+        self._added_arrays = None
+
+    def build(self, exercises: Dict[int, Exercise]) -> None:
+        """Vectorize the whole catalog, counting frequencies first"""
+        self.clear()
+        if exercises:
+            hashed = [
+                self._hashed(features(exercise.name, exercise.muscle_groups, exercise.equipment))
+                for exercise in exercises.values()
+            ]
+            positions = np.fromiter(exercises, dtype=np.int64, count=len(exercises))
+            rows = np.repeat(positions, [len(dimensions) for dimensions, _ in hashed])
+            # Sum the weights of features hashed to the same dimension of a row
+            keys, inverse = np.unique(
+                rows * self.DIMENSIONS + np.concatenate([dimensions for dimensions, _ in hashed]),
+                return_inverse=True
+            )
+            weights = np.bincount(inverse, weights=np.concatenate([weights for _, weights in hashed]))
+            rows, dimensions = np.divmod(keys, self.DIMENSIONS)
+            self._document_counts = np.bincount(dimensions, minlength=self.DIMENSIONS).astype(np.int32)
+            self._documents = len(exercises)
+            weights = (weights * self._idf(dimensions)).astype(np.float32)
+            size = int(positions.max()) + 1
+            norms = np.sqrt(np.bincount(rows, weights=weights.astype(np.float64) ** 2, minlength=size))
+            weights /= np.where(norms > 0, norms, 1)[rows].astype(np.float32)
+            live = np.zeros(size, dtype=bool)
+            live[positions] = True
+            self._freeze(rows, dimensions, weights, live)
+        self.built = True
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The postings and document counts, by the names of ARRAYS"""
+        if self._added or not self._live.all():
+            self._compact()
+        return dict(zip(ARRAYS, (
+            self._postings_dimensions, self._runs, self._rows, self._weights, self._document_counts
+        )))
+
+    def attach(self, arrays: Dict[str, np.ndarray], size: int) -> None:
+        """
+        Use vectors built elsewhere, such as those of the shared catalog
+        file, as they are: read only, without copying
+        """
+        self.clear()
+        (self._postings_dimensions, self._runs, self._rows, self._weights,
+         self._document_counts) = (arrays[name] for name in ARRAYS)
+        # Rows' own dimensions are only needed to remove them
+        self._row_starts = None
+        self._live = np.ones(size, dtype=bool)
+        self._documents = size
+        self.built = True
+
+    def add(self, position: int, exercise: Exercise) -> None:
+        self.remove(position)
+        dimensions, weights = self._vector(*self._hashed(
+            features(exercise.name, exercise.muscle_groups, exercise.equipment)
+        ))
+        self._count(dimensions, 1)
+        self._added[position] = (dimensions, weights)
+        self._added_arrays = None
+        if len(self._added) >= self.COMPACT_SIZE:
+            self._compact()
+
+    def remove(self, position: int) -> None:
+        added = self._added.pop(position, None)
+        if added is not None:
+            self._count(added[0], -1)
+            self._added_arrays = None
+        elif position < len(self._live) and self._live[position]:
+            start, end = self._row_starts[position:position + 2]
+            self._count(self._row_dimensions[start:end], -1)
+            self._live[position] = False
+
+    def _compact(self) -> None:
+        """Fold the vectors added since into the postings, dropping removed rows"""
+        rows = self._rows
+        dimensions = np.repeat(self._postings_dimensions, np.diff(self._runs))
+        keep = self._live[rows]
+        size = max(len(self._live), max(self._added, default=-1) + 1)
+        live = np.zeros(size, dtype=bool)
+        live[:len(self._live)] = self._live
+        live[list(self._added)] = True
+        added_rows, added_dimensions, added_weights = self._added_entries()
+        self._freeze(
+            np.concatenate([rows[keep], added_rows]).astype(np.int64),
+            np.concatenate([dimensions[keep], added_dimensions]).astype(np.int64),
+            np.concatenate([self._weights[keep], added_weights]),
+            live
+        )
+
+    def _added_entries(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The vectors added since the postings, as (row, dimension, weight) entries"""
+        if self._added_arrays is None:
+            vectors = list(self._added.values())
+            self._added_arrays = (
+                np.repeat(np.fromiter(self._added, dtype=np.int64, count=len(vectors)),
+                          [len(dimensions) for dimensions, _ in vectors]),
+                np.concatenate([dimensions for dimensions, _ in vectors] or [np.zeros(0, np.int32)]),
+                np.concatenate([weights for _, weights in vectors] or [np.zeros(0, np.float32)]),
+            )
+        return self._added_arrays
+
+    def _scores(self, dimensions: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every position to a normalized vector"""
+        size = max(len(self._live), max(self._added, default=-1) + 1)
+        scores = np.zeros(size)
+        # Only the postings of the dimensions the vector sets are read
+        found = np.searchsorted(self._postings_dimensions, dimensions)
+        runs = [
+            (self._runs[i], self._runs[i + 1], weight)
+            for i, dimension, weight in zip(found.tolist(), dimensions.tolist(), weights.tolist())
+            if i < len(self._postings_dimensions) and self._postings_dimensions[i] == dimension
+        ]
+        if runs:
+            rows = np.concatenate([self._rows[start:end] for start, end, _ in runs])
+            products = np.concatenate([self._weights[start:end] * weight for start, end, weight in runs])
+            scores[:len(self._live)] = np.bincount(rows, weights=products, minlength=len(self._live))
+            scores[:len(self._live)][~self._live] = 0
+        if self._added:
+            rows, added_dimensions, added_weights = self._added_entries()
+            found = np.searchsorted(dimensions, added_dimensions)
+            found[found == len(dimensions)] = 0
+            products = np.where(dimensions[found] == added_dimensions, weights[found] * added_weights, 0)
+            scores += np.bincount(rows, weights=products, minlength=size)
+        return scores
+
+    def nearest(
+        self,
+        name: str,
+        muscle_groups: Iterable[str] = (),
+        equipment: Iterable[str] = (),
+        k: int = 5
+    ) -> List[Tuple[int, float]]:
+        """The k positions most similar to the exercise described, best first"""
+        if not self._documents or k < 1:
+            return []
+        dimensions, weights = self._vector(*self._hashed(features(name, muscle_groups, equipment)))
+        if not len(dimensions):
+            return []
+        scores = self._scores(dimensions, weights)
+        k = min(k, len(scores))
+        # Partial selection of the top k, then a sort of just those; equal
+        # scores go to the lower (older) position
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(int(position), float(scores[position])) for position in top if scores[position] > 0]
+
+    def record(self, matched: bool) -> None:
+        self.lookups += 1
+        self.matches += matched
+
+    def stats(self) -> Dict[str, Any]:
+        arrays = [
+            self._postings_dimensions, self._runs, self._rows, self._weights, self._document_counts,
+            self._row_dimensions, self._live,
+        ]
+        if self._row_starts is not None:
+            arrays.append(self._row_starts)
+        arrays.extend(array for vector in self._added.values() for array in vector)
+        return {
+            "built": self.built,
+            "indexed": self._documents,
+            "dimensions": self.DIMENSIONS,
+            "memory_bytes": sum(array.nbytes for array in arrays),
+            "lookups": self.lookups,
+            "matches": self.matches,
+        }
@@ -0,0 +1,70 @@
+"""
+The exercise catalog version kept in the database.
+
+Copies of the catalog (each worker's index, snapshots) see only the
+writes their own process commits unless they ask the database. Every
+transaction that writes exercises bumps the exercise_catalog_version row
+as it commits (see events.py), so reading that row, a primary key lookup,
+tells any process whether its copy is current. Writers queue on the row
+only while they commit.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.exercise import ExerciseCatalogVersion
+
+_ROW = 1
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+class CatalogVersion(NamedTuple):
+    version: int
+    changed_at: datetime
+    # The database clock when the version was read
+    read_at: datetime
+
+    @property
+    def etag(self) -> str:
+        """Weak entity tag of the whole catalog"""
+        # changed_at tells apart databases restored or recreated since
+        changed = (self.changed_at - _EPOCH) // timedelta(microseconds=1)
+        return f'W/"{self.version:x}-{changed:x}"'
+
+async def read_catalog_version(db: AsyncSession) -> CatalogVersion:
+    """The catalog version as db sees it"""
+    row = (await db.execute(select(
+        func.clock_timestamp(),
+        select(ExerciseCatalogVersion.version).where(ExerciseCatalogVersion.id == _ROW).scalar_subquery(),
+        select(ExerciseCatalogVersion.changed_at).where(ExerciseCatalogVersion.id == _ROW).scalar_subquery(),
+    ))).one()
+    read_at, version, changed_at = row
+    # The row is created by the first write if a migration did not
+    return CatalogVersion(version or 0, changed_at or _EPOCH, read_at)
+
+def bump_catalog_version():
+    """Statement bumping the version, returning the new version and its time"""
+    statement = insert(ExerciseCatalogVersion).values(id=_ROW, version=1, changed_at=func.clock_timestamp())
+    return statement.on_conflict_do_update(
+        index_elements=[ExerciseCatalogVersion.id],
+        set_={"version": ExerciseCatalogVersion.version + 1, "changed_at": func.clock_timestamp()}
+    ).returning(ExerciseCatalogVersion.version, ExerciseCatalogVersion.changed_at)
+
+async def read_tombstones_pruned_to(db: AsyncSession) -> Optional[datetime]:
+    """The latest deleted_at of the tombstones pruned, if any were"""
+    return await db.scalar(
+        select(ExerciseCatalogVersion.tombstones_pruned_to).where(ExerciseCatalogVersion.id == _ROW)
+    )
+
+def record_tombstones_pruned(pruned_to: datetime):
+    """Statement moving the pruned tombstones' horizon up to pruned_to"""
+    statement = insert(ExerciseCatalogVersion).values(id=_ROW, version=0, tombstones_pruned_to=pruned_to)
+    return statement.on_conflict_do_update(
+        index_elements=[ExerciseCatalogVersion.id],
+        # greatest() skips a NULL horizon
+        set_={"tombstones_pruned_to": func.greatest(
+            ExerciseCatalogVersion.tombstones_pruned_to, statement.excluded.tombstones_pruned_to
+        )}
+    )
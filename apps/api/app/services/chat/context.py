@@ -1,5 +1,6 @@
 from typing import Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.chat import ChatContext
 from app.core.logging import get_logger
 
@@ -8,7 +9,7 @@ logger = get_logger(__name__)
 class ChatContextService:
     """Service for managing chat context"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
     async def get_context(
@@ -18,14 +19,17 @@ class ChatContextService:
     ) -> Dict[str, Any]:
         """Get context for a chat session"""
         try:
-            query = self.db.query(ChatContext).filter(
+            query = select(ChatContext).where(
                 ChatContext.session_id == session_id
             )
             
             if context_type:
-                query = query.filter(ChatContext.context_type == context_type)
+                query = query.where(ChatContext.context_type == context_type)
             
-            context = query.order_by(ChatContext.updated_at.desc()).first()
+            result = await self.db.scalars(
+                query.order_by(ChatContext.updated_at.desc()).limit(1)
+            )
+            context = result.first()
             
             return context.context_data if context else {}
         except Exception as e:
@@ -41,14 +45,15 @@ class ChatContextService:
         """Update or create context for a chat session"""
         try:
             # Try to find existing context
-            context = (
-                self.db.query(ChatContext)
-                .filter(
+            result = await self.db.scalars(
+                select(ChatContext)
+                .where(
                     ChatContext.session_id == session_id,
                     ChatContext.context_type == context_type
                 )
-                .first()
+                .limit(1)
             )
+            context = result.first()
             
             if context:
                 # Update existing context
@@ -62,11 +67,10 @@ class ChatContextService:
                 )
                 self.db.add(context)
             
-            self.db.commit()
-            self.db.refresh(context)
+            await self.db.flush()
             return context
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error updating chat context: {str(e)}")
             raise
     
@@ -77,16 +81,16 @@ class ChatContextService:
     ) -> None:
         """Clear context for a chat session"""
         try:
-            query = self.db.query(ChatContext).filter(
+            query = delete(ChatContext).where(
                 ChatContext.session_id == session_id
             )
             
             if context_type:
-                query = query.filter(ChatContext.context_type == context_type)
+                query = query.where(ChatContext.context_type == context_type)
             
-            query.delete()
-            self.db.commit()
+            await self.db.execute(query)
+            await self.db.flush()
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error clearing chat context: {str(e)}")
             raise 
\ No newline at end of file
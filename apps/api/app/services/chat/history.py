@@ -1,16 +1,37 @@
 from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.chat import ChatSession, ChatMessage
 from app.core.logging import get_logger
+from app.core.pagination import Keyset
+from app.crud import statements
 
 logger = get_logger(__name__)
 
+# History pages walk back in time from the newest message
+message_keyset = Keyset(ChatMessage.created_at, ChatMessage.message_id, descending=True)
+
 class ChatHistoryService:
     """Service for managing chat history"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
+    async def get_messages(
+        self,
+        session_id: str,
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> List[ChatMessage]:
+        """Get a page of messages for a session, newest first"""
+        if cursor:
+            query = select(ChatMessage).where(ChatMessage.session_id == session_id)
+            result = await self.db.scalars(message_keyset.apply(query, cursor, limit))
+        else:
+            # The first page is fetched on every chat turn
+            result = await self.db.scalars(statements.latest_chat_messages(session_id, limit))
+        return list(result.all())
+    
     async def get_history(
         self,
         session_id: str,
@@ -18,19 +39,13 @@ class ChatHistoryService:
     ) -> List[Dict[str, Any]]:
         """Get recent chat history for a session"""
         try:
-            messages = (
-                self.db.query(ChatMessage)
-                .filter(ChatMessage.session_id == session_id)
-                .order_by(ChatMessage.created_at.desc())
-                .limit(limit)
-                .all()
-            )
+            messages = await self.get_messages(session_id, limit)
             
             return [
                 {
                     "role": msg.role,
                     "content": msg.content,
-                    "metadata": msg.metadata,
+                    "metadata": msg.message_metadata,
                     "created_at": msg.created_at.isoformat()
                 }
                 for msg in reversed(messages)  # Reverse to get chronological order
@@ -52,14 +67,13 @@ class ChatHistoryService:
                 session_id=session_id,
                 role=role,
                 content=content,
-                metadata=metadata
+                message_metadata=metadata
             )
             self.db.add(message)
-            self.db.commit()
-            self.db.refresh(message)
+            await self.db.flush()
             return message
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error adding chat message: {str(e)}")
             raise
     
@@ -68,25 +82,25 @@ class ChatHistoryService:
         try:
             session = ChatSession(user_id=user_id)
             self.db.add(session)
-            self.db.commit()
-            self.db.refresh(session)
+            await self.db.flush()
             return session
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating chat session: {str(e)}")
             raise
     
     async def get_active_session(self, user_id: str) -> Optional[ChatSession]:
         """Get user's active chat session or create new one"""
         try:
-            session = (
-                self.db.query(ChatSession)
-                .filter(
+            result = await self.db.scalars(
+                select(ChatSession)
+                .where(
                     ChatSession.user_id == user_id,
                     ChatSession.status == "active"
                 )
-                .first()
+                .limit(1)
             )
+            session = result.first()
             
             if not session:
                 session = await self.create_session(user_id)
@@ -0,0 +1,330 @@
+"""
+Streaming bulk import of exercises from CSV or JSON Lines.
+
+The upload is decoded and parsed a record at a time as it arrives, so the
+import holds one batch of rows however large the upload is. Rows are
+validated with ExerciseCreate and upserted by normalized name (see
+catalog/names.py): new names are inserted, names already in the catalog
+update that exercise and keep its spelling. Each batch commits on its own,
+so a failed import keeps the batches before it.
+
+Names are matched through _NameIndex, 24 bytes per exercise, rather than
+the catalog index. Batches are left out of this process's catalog copies
+as they commit (see catalog/events.py); the index reloads once the import
+is done, and the shared catalog file is rebuilt once.
+
+CSV needs a header row naming ExerciseCreate fields; muscle_groups and
+equipment cells hold ";"-separated items. JSON Lines holds one exercise
+object per line. In both, fields left out are left unchanged on update.
+"""
+import codecs
+import csv
+import json
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.crud import exercises
+from app.schemas.exercise import ExerciseCreate
+from app.services.catalog import exercise_catalog, shared_catalog
+from app.services.catalog.events import SUSPENDED_KEY
+from app.services.catalog.names import normalize_name
+
+logger = get_logger(__name__)
+
+CSV_TYPES = frozenset({"text/csv"})
+JSONL_TYPES = frozenset({"application/x-ndjson", "application/jsonl", "application/x-jsonlines"})
+LIST_SEPARATOR = ";"
+# Longest line accepted, so a missing newline cannot buffer the whole upload
+MAX_LINE_LENGTH = 1 << 20
+# Rejected rows listed in the report; all of them are counted
+MAX_REPORTED_ERRORS = 100
+
+_FIELDS = frozenset(ExerciseCreate.model_fields)
+_LIST_FIELDS = frozenset({"muscle_groups", "equipment"})
+
+# (line number, fields, error): one of fields and error is None
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    try:
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line.removesuffix("\r")
+            if len(buffer) > MAX_LINE_LENGTH:
+                raise HTTPException(status_code=413, detail=f"Line longer than {MAX_LINE_LENGTH} characters")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Upload is not valid UTF-8")
+    if buffer:
+        yield buffer.removesuffix("\r")
+
+def _csv_fields(header: List[str], values: List[str]) -> Dict[str, Any]:
+    fields: Dict[str, Any] = {}
+    for column, value in zip(header, values):
+        if column not in _FIELDS:
+            continue
+        value = value.strip()
+        if column in _LIST_FIELDS:
+            fields[column] = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+        elif column == "name":
+            fields[column] = value
+        else:
+            fields[column] = value or None
+    return fields
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    quotes = 0
+    number = start = 0
+    async for line in lines:
+        number += 1
+        if not pending:
+            start = number
+        pending.append(line)
+        # An odd number of quotes so far means a quoted field spans lines
+        quotes += line.count('"')
+        if quotes % 2:
+            if sum(map(len, pending)) > MAX_LINE_LENGTH:
+                raise HTTPException(status_code=413, detail=f"Record at line {start} never ends")
+            continue
+        record, pending, quotes = "\n".join(pending), [], 0
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            if "name" not in header:
+                raise HTTPException(status_code=400, detail="CSV header has no name column")
+            continue
+        if len(values) > len(header):
+            yield start, None, f"{len(values)} values for {len(header)} columns"
+            continue
+        yield start, _csv_fields(header, values), None
+    if pending:
+        yield start, None, "Unterminated quoted field"
+
+async def _jsonl_records(lines: AsyncIterator[str]) -> AsyncIterator[Record]:
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(fields, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, fields, None
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}" for detail in error.errors()
+    )
+
+class _NameIndex:
+    """
+    Exercise ids by the hash of their normalized name, oldest first: two
+    sorted arrays, 24 bytes an exercise, so a 1M-row import stays small.
+    Different names can share a hash; candidates() may return exercises of
+    other names, which callers confirm against the stored names.
+    """
+
+    # Exercises added one by one are merged into the arrays in runs
+    MERGE_SIZE = 1 << 16
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.int64)
+        self._ids = np.empty(0, dtype="V16")
+        self._added: Dict[int, List[uuid.UUID]] = {}
+        self._added_count = 0
+
+    def __len__(self) -> int:
+        return len(self._hashes) + self._added_count
+
+    async def load(self, db: AsyncSession) -> None:
+        hashes, ids = [self._hashes], [self._ids]
+        async for batch in exercises.stream_names(db):
+            hashes.append(np.fromiter((hash(normalize_name(name)) for _, name in batch), np.int64, len(batch)))
+            ids.append(np.array([exercise_id.bytes for exercise_id, _ in batch], dtype="V16"))
+        self._merge(np.concatenate(hashes), np.concatenate(ids))
+
+    def _merge(self, hashes: np.ndarray, ids: np.ndarray) -> None:
+        # A stable sort keeps exercises of one hash oldest first
+        order = np.argsort(hashes, kind="stable")
+        self._hashes, self._ids = hashes[order], ids[order]
+
+    def candidates(self, key: str) -> List[uuid.UUID]:
+        hashed = hash(key)
+        start, end = np.searchsorted(self._hashes, [hashed, hashed + 1])
+        found = [uuid.UUID(bytes=exercise_id.tobytes()) for exercise_id in self._ids[start:end]]
+        return found + self._added.get(hashed, [])
+
+    def add(self, key: str, exercise_id: uuid.UUID) -> None:
+        self._added.setdefault(hash(key), []).append(exercise_id)
+        self._added_count += 1
+        if self._added_count >= self.MERGE_SIZE:
+            added = [(hashed, exercise_id) for hashed, ids in self._added.items() for exercise_id in ids]
+            self._merge(
+                np.concatenate([self._hashes, np.array([hashed for hashed, _ in added], dtype=np.int64)]),
+                np.concatenate([self._ids, np.array([exercise_id.bytes for _, exercise_id in added], dtype="V16")])
+            )
+            self._added, self._added_count = {}, 0
+
+class ExerciseImport:
+    """One bulk import and its progress, readable while it runs"""
+
+    def __init__(self, content_type: Optional[str]):
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        if media_type in CSV_TYPES:
+            self.format = "csv"
+        elif media_type in JSONL_TYPES:
+            self.format = "jsonl"
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Send text/csv or application/x-ndjson, not {media_type or 'no content type'}"
+            )
+        self.import_id = uuid.uuid4()
+        self.state = "running"
+        self.started_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        self.bytes_read = 0
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.rejected = 0
+        self.batches = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.failure: Optional[str] = None
+        self._names = _NameIndex()
+
+    async def _count_bytes(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def _reject(self, line: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    async def _write(self, db: AsyncSession, batch: Dict[str, Dict[str, Any]]) -> None:
+        candidates = {key: self._names.candidates(key) for key in batch}
+        # One read of the candidates' names confirms them, and drops those
+        # deleted meanwhile
+        stored = await exercises.names(db, [id for ids in candidates.values() for id in ids])
+        stored_keys = {exercise_id: normalize_name(name) for exercise_id, name in stored.items()}
+        creates: List[Dict[str, Any]] = []
+        created_keys: List[str] = []
+        updates: Dict[uuid.UUID, Dict[str, Any]] = {}
+        for key, fields in batch.items():
+            existing = next((id for id in candidates[key] if stored_keys.get(id) == key), None)
+            if existing is None:
+                creates.append(ExerciseCreate(**fields).model_dump())
+                created_keys.append(key)
+            else:
+                updates[existing] = {field: value for field, value in fields.items() if field != "name"}
+        created = await exercises.create_many(db, objs_in=creates)
+        await exercises.update_many(db, objs_in=updates)
+        await db.commit()
+        for key, exercise in zip(created_keys, created):
+            self._names.add(key, exercise.exercise_id)
+        self.created += len(creates)
+        self.updated += len(updates)
+        self.batches += 1
+        logger.debug(
+            f"Exercise import {self.import_id}: {self.rows} rows, "
+            f"{self.created} created, {self.updated} updated, {self.rejected} rejected"
+        )
+
+    async def run(self, db: AsyncSession, chunks: AsyncIterator[bytes]) -> "ExerciseImport":
+        """Import every record of the upload, committing batch by batch"""
+        parse = _csv_records if self.format == "csv" else _jsonl_records
+        batch: Dict[str, Dict[str, Any]] = {}
+        start = time.perf_counter()
+        db.info[SUSPENDED_KEY] = True
+        try:
+            await self._names.load(db)
+            async for line, fields, error in parse(_lines(self._count_bytes(chunks))):
+                self.rows += 1
+                if error is None:
+                    try:
+                        exercise_in = ExerciseCreate.model_validate(fields)
+                    except ValidationError as e:
+                        error = _validation_message(e)
+                    else:
+                        key = normalize_name(exercise_in.name)
+                        if not key:
+                            error = "name: has no letters or digits"
+                if error is not None:
+                    self._reject(line, error)
+                    continue
+                fields = exercise_in.model_dump(exclude_unset=True)
+                if key in batch:
+                    # Repeats of a name within a batch merge into the first
+                    # row, later values winning but not the later spelling
+                    del fields["name"]
+                    batch[key].update(fields)
+                else:
+                    batch[key] = fields
+                if len(batch) >= settings.EXERCISE_IMPORT_BATCH_SIZE:
+                    await self._write(db, batch)
+                    batch = {}
+            if batch:
+                await self._write(db, batch)
+        except Exception as e:
+            self.state = "failed"
+            self.failure = e.detail if isinstance(e, HTTPException) else str(e)
+            raise
+        finally:
+            self.finished_at = datetime.now(timezone.utc)
+            del db.info[SUSPENDED_KEY]
+            self._names = _NameIndex()
+            if self.batches:
+                shared_catalog.changed()
+        self.state = "completed"
+        if self.batches and exercise_catalog.loaded:
+            await exercise_catalog.load(db)
+        logger.info(
+            f"Exercise import {self.import_id} read {self.rows} rows in {time.perf_counter() - start:.1f}s: "
+            f"{self.created} created, {self.updated} updated, {self.rejected} rejected"
+        )
+        return self
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "import_id": self.import_id,
+            "format": self.format,
+            "state": self.state,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "bytes_read": self.bytes_read,
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "errors": self.errors,
+            "failure": self.failure,
+        }
+
+# Running and recent imports, newest last, for the admin progress endpoint
+recent_imports: Deque[ExerciseImport] = deque(maxlen=20)
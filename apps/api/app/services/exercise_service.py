@@ -1,19 +1,24 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.crud import exercises
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.exercise import Exercise
 from app.core.logging import get_logger
+from app.core.config import settings
+from app.services.catalog import exercise_catalog, shared_catalog
 
 logger = get_logger(__name__)
 
+def active_catalog():
+    """The shared catalog file when EXERCISE_CATALOG_FILE is set, else this worker's index"""
+    return shared_catalog if settings.EXERCISE_CATALOG_FILE else exercise_catalog
+
 class ExerciseService:
     """Service for managing exercises"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         logger.info("Initialized ExerciseService")
     
-    def get_exercises_by_criteria(
+    async def get_exercises_by_criteria(
         self,
         equipment: Optional[List[str]] = None,
         muscle_groups: Optional[List[str]] = None,
@@ -21,49 +26,49 @@ class ExerciseService:
         limit: int = 100
     ) -> List[Exercise]:
         """
-        Get exercises matching the given criteria
+        Get exercises matching the given criteria, served from the catalog index
         """
         logger.debug(f"Fetching exercises with equipment: {equipment}, muscles: {muscle_groups}, difficulty: {difficulty}")
         
-        # Get all exercises first
-        all_exercises = exercises.get_multi(self.db, limit=limit)
-        
-        # Filter exercises based on criteria
-        filtered_exercises = []
-        for exercise in all_exercises:
-            matches = True
-            
-            # Check equipment
-            if equipment and not any(eq in exercise.equipment for eq in equipment):
-                matches = False
-            
-            # Check muscle groups
-            if muscle_groups and not any(mg in exercise.muscle_groups for mg in muscle_groups):
-                matches = False
-            
-            # Check difficulty
-            if difficulty and exercise.difficulty != difficulty:
-                matches = False
-            
-            if matches:
-                filtered_exercises.append(exercise)
+        filtered_exercises = await active_catalog().search(
+            self.db,
+            equipment=equipment,
+            muscle_groups=muscle_groups,
+            difficulty=difficulty,
+            limit=limit
+        )
         
         logger.info(f"Found {len(filtered_exercises)} matching exercises")
         return filtered_exercises
     
-    def get_exercise_by_name(self, name: str) -> Optional[Exercise]:
+    async def get_exercise_by_name(self, name: str) -> Optional[Exercise]:
         """
-        Get exercise by name (case-insensitive partial match)
+        Get the exercise whose name best matches, ignoring case, punctuation,
+        plurals and small spelling differences
         """
         logger.debug(f"Looking up exercise by name: {name}")
-        # Get all exercises and find the best match
-        # TODO: Replace with proper database query
-        all_exercises = exercises.get_multi(self.db)
-        
-        for exercise in all_exercises:
-            if name.lower() in exercise.name.lower():
-                logger.debug(f"Found matching exercise: {exercise.name}")
-                return exercise
+        exercise = await active_catalog().find_by_name(self.db, name)
+        if exercise:
+            logger.debug(f"Found matching exercise: {exercise.name}")
+            return exercise
         
         logger.warning(f"No matching exercise found for name: {name}")
-        return None 
\ No newline at end of file
+        return None
+    
+    async def get_similar_exercise(
+        self,
+        name: str,
+        muscle_groups: Optional[List[str]] = None,
+        equipment: Optional[List[str]] = None
+    ) -> Optional[Exercise]:
+        """
+        Get the exercise most similar in name, muscle groups and equipment,
+        for names that match nothing, such as "DB Goblet Squat" for
+        "Dumbbell Goblet Squat"
+        """
+        exercise = await active_catalog().find_similar(
+            self.db, name, muscle_groups or [], equipment or []
+        )
+        if exercise:
+            logger.debug(f"Found similar exercise for {name}: {exercise.name}")
+        return exercise
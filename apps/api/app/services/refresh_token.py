@@ -0,0 +1,88 @@
+"""
+Refresh tokens: issue, rotate and revoke.
+
+Clients renew their short lived access token with a refresh token instead
+of the password, so renewal is a single indexed lookup rather than a
+bcrypt verify. Only the SHA-256 of a token is stored.
+"""
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import statements
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def issue_refresh_token(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    family_id: Optional[uuid.UUID] = None
+) -> str:
+    """Create a refresh token, starting a new family unless one is given"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4(),
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    await db.flush()
+    return token
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Optional[Tuple[User, str]]:
+    """
+    Exchange a refresh token for its user and a new token in the same family.
+
+    Returns None if the token is unknown, expired, revoked or belongs to an
+    inactive user. A token that was already rotated is being replayed, so its
+    whole family is revoked; the caller must commit that even though the
+    request fails.
+    """
+    row = (await db.execute(statements.refresh_token_with_user(hash_refresh_token(token)))).first()
+    if row is None:
+        return None
+    refresh_token, user = row
+
+    # Claim the token in one statement, so two concurrent refreshes with the
+    # same token cannot both succeed
+    claimed = await db.scalar(
+        update(RefreshToken)
+        .where(RefreshToken.id == refresh_token.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+        .returning(RefreshToken.id)
+    )
+    if claimed is None:
+        await revoke_refresh_token_family(db, refresh_token.family_id)
+        return None
+    if refresh_token.expires_at <= datetime.now(timezone.utc) or not user.is_active:
+        return None
+    return user, await issue_refresh_token(db, user.id, refresh_token.family_id)
+
+async def revoke_refresh_token_family(db: AsyncSession, family_id: uuid.UUID) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
+
+async def revoke_refresh_token(db: AsyncSession, token: str) -> None:
+    """Log out: revoke the token and every token rotated from the same login"""
+    family_id = (
+        select(RefreshToken.family_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=func.now())
+    )
@@ -1,31 +1,32 @@
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import statements
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.hashing import password_hasher
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.scalars(statements.user_by_email(email))
+    return result.first()
 
-def create_user(db: Session, user_in: UserCreate) -> User:
+async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     db_user = User(
         email=user_in.email,
-        password=get_password_hash(user_in.password),
+        password=await password_hasher.hash(user_in.password),
         first_name=user_in.first_name,
         last_name=user_in.last_name
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
     return db_user
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.password):
+    if not await password_hasher.verify(password, user.password):
         return None
     return user
 
 def is_active_user(user: User) -> bool:
-    return user.is_active 
\ No newline at end of file
+    return user.is_active
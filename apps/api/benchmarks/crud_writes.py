@@ -0,0 +1,87 @@
+"""
+Compare the CRUDBase write path with the previous encode-and-refresh one.
+
+Run from apps/api against a development database:
+
+    python -m benchmarks.crud_writes --rows 500
+
+Rows are created with a "bench-" name prefix and deleted afterwards.
+"""
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete
+
+from app.core.database import AsyncSessionLocal, async_engine, query_counts
+from app.crud import exercises
+from app.models.exercise import Exercise
+from app.schemas.exercise import ExerciseCreate, ExerciseUpdate
+
+async def legacy_create(db, obj_in: ExerciseCreate) -> Exercise:
+    db_obj = Exercise(**jsonable_encoder(obj_in))
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+async def legacy_update(db, db_obj: Exercise, obj_in: ExerciseUpdate) -> Exercise:
+    obj_data = jsonable_encoder(db_obj)
+    update_data = obj_in.model_dump(exclude_unset=True)
+    for field in obj_data:
+        if field in update_data:
+            setattr(db_obj, field, update_data[field])
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+async def current_create(db, obj_in: ExerciseCreate) -> Exercise:
+    return await exercises.create(db, obj_in=obj_in)
+
+async def current_update(db, db_obj: Exercise, obj_in: ExerciseUpdate) -> Exercise:
+    return await exercises.update(db, db_obj=db_obj, obj_in=obj_in)
+
+async def run(
+    label: str,
+    create: Callable[..., Awaitable[Exercise]],
+    update: Callable[..., Awaitable[Exercise]],
+    rows: int
+) -> None:
+    objs_in = [
+        ExerciseCreate(name=f"bench-{label}-{i}", muscle_groups=["chest"], equipment=["none"])
+        for i in range(rows)
+    ]
+    async with AsyncSessionLocal() as db:
+        for phase in ("create", "update"):
+            queries = query_counts["primary"]
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            if phase == "create":
+                created: List[Exercise] = [await create(db, obj_in) for obj_in in objs_in]
+            else:
+                for db_obj in created:
+                    await update(db, db_obj, ExerciseUpdate(description="updated"))
+            cpu = time.process_time() - cpu
+            wall = time.perf_counter() - wall
+            queries = query_counts["primary"] - queries
+            print(
+                f"{label:<8} {phase:<7} "
+                f"{queries / rows:5.2f} statements/write  "
+                f"{cpu / rows * 1000:7.3f} ms CPU/write  "
+                f"{wall / rows * 1000:7.3f} ms wall/write"
+            )
+        await db.execute(delete(Exercise).where(Exercise.name.like(f"bench-{label}-%")))
+        await db.commit()
+
+async def main(rows: int) -> None:
+    await run("legacy", legacy_create, legacy_update, rows)
+    await run("current", current_create, current_update, rows)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    asyncio.run(main(parser.parse_args().rows))
@@ -0,0 +1,148 @@
+"""
+Criteria lookups against the in-memory exercise catalog index.
+
+Run from apps/api:
+
+    python -m benchmarks.exercise_catalog --exercises 50000
+
+Builds a synthetic catalog with a skewed spread of muscle groups,
+equipment and difficulties, then times the criteria and name lookups
+workout generation makes, the similarity lookups it makes before
+generating an exercise, and the prefix suggestions of a name being typed,
+and reports the memory of the similarity vectors. No database is needed.
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.schemas.exercise import Exercise
+from app.services.catalog import ExerciseCatalog
+
+MUSCLE_GROUPS = [
+    "chest", "back", "shoulders", "biceps", "triceps", "forearms", "core",
+    "glutes", "quadriceps", "hamstrings", "calves", "hip flexors",
+]
+# Listed roughly from most to least common
+EQUIPMENT = [
+    "bodyweight", "dumbbell", "barbell", "machine", "cable", "kettlebell",
+    "resistance band", "bench", "pull-up bar", "medicine ball", "trx", "sled",
+]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+MODIFIERS = ["", "Incline", "Decline", "Seated", "Standing", "Single-Arm", "Alternating", "Reverse", "Wide-Grip", "Paused"]
+MOVEMENTS = [
+    "Press", "Row", "Curl", "Squat", "Lunge", "Deadlift", "Fly", "Raise", "Extension", "Pulldown",
+    "Push-up", "Pull-up", "Dip", "Crunch", "Plank", "Bridge", "Kickback", "Shrug", "Swing", "Step-up",
+]
+
+LOOKUPS = {
+    "one common item": dict(equipment=["bodyweight"]),
+    "home gym": dict(equipment=["dumbbell", "resistance band", "bodyweight"], difficulty="beginner"),
+    "rare items": dict(equipment=["sled", "trx"], muscle_groups=["hamstrings"]),
+    "focus muscles": dict(muscle_groups=["chest", "triceps"], difficulty="advanced"),
+    "no criteria": dict(),
+}
+
+def synthetic_catalog(size: int) -> list:
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    weights = [1 / (rank + 1) for rank in range(len(EQUIPMENT))]
+    return [
+        Exercise(
+            exercise_id=uuid.uuid4(),
+            name=" ".join(filter(None, (
+                rng.choice(MODIFIERS), rng.choice(EQUIPMENT).title(), rng.choice(MOVEMENTS)
+            ))),
+            muscle_groups=rng.sample(MUSCLE_GROUPS, rng.randint(1, 3)),
+            equipment=list(set(rng.choices(EQUIPMENT, weights, k=rng.randint(1, 2)))),
+            difficulty=rng.choice(DIFFICULTIES),
+            created_at=now,
+            updated_at=now
+        )
+        for i in range(size)
+    ]
+
+def main(size: int, repeat: int) -> None:
+    exercises = synthetic_catalog(size)
+    catalog = ExerciseCatalog()
+    start = time.perf_counter()
+    catalog.replace(exercises)
+    print(f"indexed {size} exercises in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for label, criteria in LOOKUPS.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = catalog.query(limit=100, **criteria)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{label:<16} {len(results):4d} results  "
+            f"median {statistics.median(timings) * 1000:6.3f} ms  max {max(timings) * 1000:6.3f} ms"
+        )
+
+    sample = next(exercise.name for exercise in reversed(exercises) if "Dumbbell" in exercise.name)
+    names = {
+        "exact name": sample,
+        "spelling variant": sample.lower().replace("-", " ") + "s",
+        "fuzzy name": sample.replace("Dumbbell", "DB"),
+        "no match": "Underwater Basket Weaving",
+    }
+    for label, name in names.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            match = catalog.resolve_name(name)
+            timings.append(time.perf_counter() - start)
+        print(
+            f"{label:<16} {'hit ' if match else 'miss'}          "
+            f"median {statistics.median(timings) * 1000:6.3f} ms  max {max(timings) * 1000:6.3f} ms"
+        )
+
+    start = time.perf_counter()
+    catalog.similar(sample, limit=1)
+    memory = catalog.vectors.stats()["memory_bytes"]
+    print(
+        f"similarity index built in {(time.perf_counter() - start) * 1000:.1f} ms, "
+        f"{memory / 2 ** 20:.1f} MiB, {memory / size:.0f} bytes per exercise"
+    )
+    described = sample.replace("Dumbbell", "DB")
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        catalog.similar(described, ["chest"], ["dumbbell"], limit=5)
+        timings.append(time.perf_counter() - start)
+    print(
+        f"similar          top 5          "
+        f"median {statistics.median(timings) * 1000:6.3f} ms  max {max(timings) * 1000:6.3f} ms"
+    )
+
+    # Every keystroke of a few names, as a type-ahead client sends them
+    typed = ["Incline Dumbbell Press", "kettlebell swing", "Pull-up", "zzz"]
+    timings = []
+    for _ in range(repeat):
+        for text in typed:
+            for end in range(1, len(text) + 1):
+                start = time.perf_counter()
+                catalog.prefix_matches(text[:end], limit=10)
+                timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(
+        f"suggest          {len(timings)} keystrokes  median {statistics.median(timings) * 1000:6.3f} ms  "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1000:6.3f} ms  max {timings[-1] * 1000:6.3f} ms"
+    )
+
+    # Keeping the sorted arrays current costs a shift per entry
+    renamed = exercises[len(exercises) // 2]
+    start = time.perf_counter()
+    for i in range(repeat):
+        catalog.apply({renamed.exercise_id: renamed.model_copy(update={"name": f"Renamed {i} Press"})})
+    print(f"rename           average {(time.perf_counter() - start) / repeat * 1000:6.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--exercises", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.exercises, args.repeat)
@@ -0,0 +1,75 @@
+"""
+Throughput and memory of the streaming bulk exercise import.
+
+Run from apps/api against a development database:
+
+    python -m benchmarks.exercise_import --rows 1000000
+
+Streams generated CSV through ExerciseImport twice: the first pass
+creates every exercise, the second matches every name and updates it.
+Peak RSS is printed after each pass; the upload itself is never held
+in memory. Imported rows are marked with a video_url and deleted
+afterwards.
+"""
+import argparse
+import asyncio
+import resource
+import time
+
+from sqlalchemy import delete
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.exercise import Exercise
+from app.services.catalog import exercise_catalog
+from app.services.exercise_import import ExerciseImport
+from benchmarks.exercise_catalog import EQUIPMENT, MODIFIERS, MOVEMENTS, MUSCLE_GROUPS
+
+MARKER = "bench://exercise-import"
+
+async def csv_upload(rows: int, difficulty: str, chunk_rows: int = 500):
+    yield b"name,muscle_groups,equipment,difficulty,video_url\n"
+    lines = []
+    for i in range(rows):
+        name = " ".join(filter(None, (
+            MODIFIERS[i % len(MODIFIERS)], EQUIPMENT[i % len(EQUIPMENT)].title(),
+            MOVEMENTS[i % len(MOVEMENTS)], str(i)
+        )))
+        muscles = ";".join(MUSCLE_GROUPS[i % len(MUSCLE_GROUPS):][:2])
+        lines.append(f"{name},{muscles},{EQUIPMENT[i % len(EQUIPMENT)]},{difficulty},{MARKER}\n")
+        if len(lines) == chunk_rows:
+            yield "".join(lines).encode()
+            lines = []
+    yield "".join(lines).encode()
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+async def run(label: str, rows: int, difficulty: str) -> None:
+    exercise_import = ExerciseImport("text/csv")
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        await exercise_import.run(db, csv_upload(rows, difficulty))
+        elapsed = time.perf_counter() - start
+    print(
+        f"{label:<7} {exercise_import.rows} rows in {elapsed:6.1f} s  "
+        f"{exercise_import.rows / elapsed:8.0f} rows/s  "
+        f"created {exercise_import.created}  updated {exercise_import.updated}  "
+        f"upload {exercise_import.bytes_read / 1e6:.0f} MB  peak RSS {peak_rss_mb():.0f} MB"
+    )
+
+async def main(rows: int) -> None:
+    print(f"start   peak RSS {peak_rss_mb():.0f} MB")
+    try:
+        await run("create", rows, "beginner")
+        await run("update", rows, "advanced")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Exercise).where(Exercise.video_url == MARKER))
+            await db.commit()
+        exercise_catalog.clear()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    asyncio.run(main(parser.parse_args().rows))
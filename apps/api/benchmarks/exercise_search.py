@@ -0,0 +1,120 @@
+"""
+Latency of exercise search on a large seeded catalog.
+
+Run from apps/api against a development database:
+
+    python -m benchmarks.exercise_search --exercises 100000
+
+"legacy" is the search as it used to be: a name ilike with no limit.
+"ranked" is the full-text search over the search_vector GIN index,
+best match first, one page of --limit results; "page 5" times the
+fifth page, reached with the cursor of the fourth. Seeded rows are
+marked with a video_url and deleted afterwards.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import delete, select, text
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.crud import exercises
+from app.models.exercise import Exercise
+from benchmarks.exercise_catalog import DIFFICULTIES, EQUIPMENT, MODIFIERS, MOVEMENTS, MUSCLE_GROUPS
+
+MARKER = "bench://exercise-search"
+
+SEARCHES = {
+    "one word": dict(query="press"),
+    "three words": dict(query="incline dumbbell press"),
+    "with filters": dict(query="swing", equipment=["kettlebell"], difficulty="beginner"),
+    "description": dict(query="hamstrings"),
+    "rare": dict(query="sled pulldown"),
+}
+
+def synthetic_rows(size: int) -> list:
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(len(EQUIPMENT))]
+    rows = []
+    for _ in range(size):
+        equipment = list(set(rng.choices(EQUIPMENT, weights, k=rng.randint(1, 2))))
+        muscle_groups = rng.sample(MUSCLE_GROUPS, rng.randint(1, 3))
+        movement = rng.choice(MOVEMENTS)
+        rows.append({
+            "name": " ".join(filter(None, (rng.choice(MODIFIERS), equipment[0].title(), movement))),
+            "description": f"A {movement.lower()} that works the {' and '.join(muscle_groups)}.",
+            "instructions": f"Set up with the {' and '.join(equipment)}, brace, and control every rep.",
+            "muscle_groups": muscle_groups,
+            "equipment": equipment,
+            "difficulty": rng.choice(DIFFICULTIES),
+            "video_url": MARKER,
+        })
+    return rows
+
+async def legacy_search(db, query: str, **filters) -> list:
+    statement = select(Exercise)
+    if filters.get("equipment"):
+        statement = statement.where(Exercise.equipment.overlap(filters["equipment"]))
+    if filters.get("difficulty"):
+        statement = statement.where(Exercise.difficulty == filters["difficulty"])
+    statement = statement.where(Exercise.name.ilike(f"%{query}%"))
+    return list((await db.scalars(statement)).all())
+
+async def page_cursor(limit: int, page: int, **criteria) -> str:
+    """Cursor of the given page of ranked results"""
+    cursor = None
+    keyset = exercises.search_keyset(criteria["query"])
+    async with AsyncSessionLocal() as db:
+        for _ in range(page - 1):
+            items = await exercises.search(db, limit=limit, cursor=cursor, **criteria)
+            cursor = keyset.next_cursor(items, limit)
+    return cursor
+
+async def timed(repeat: int, search) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            results = await search(db)
+            timings.append(time.perf_counter() - start)
+    return len(results), statistics.median(timings) * 1000, max(timings) * 1000
+
+async def main(size: int, limit: int, repeat: int) -> None:
+    async with AsyncSessionLocal() as db:
+        rows = synthetic_rows(size)
+        start = time.perf_counter()
+        for offset in range(0, size, 5000):
+            await exercises.create_many(db, objs_in=rows[offset:offset + 5000])
+        await db.commit()
+        await db.execute(text("ANALYZE exercises"))
+        await db.commit()
+        print(f"seeded {size} exercises in {time.perf_counter() - start:.1f} s")
+    try:
+        for label, criteria in SEARCHES.items():
+            cursor = await page_cursor(limit, 5, **criteria)
+            runs = {
+                "legacy": lambda db: legacy_search(db, **criteria),
+                "ranked": lambda db: exercises.search(db, limit=limit, **criteria),
+                "page 5": lambda db: exercises.search(db, limit=limit, cursor=cursor, **criteria),
+            }
+            for name, search in runs.items():
+                count, median, worst = await timed(repeat, search)
+                print(
+                    f"{label:<12} {name:<7} {count:6d} results  "
+                    f"median {median:8.2f} ms  max {worst:8.2f} ms"
+                )
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Exercise).where(Exercise.video_url == MARKER))
+            await db.commit()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--exercises", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.exercises, args.limit, args.repeat))
@@ -0,0 +1,74 @@
+"""
+Size and build time of the exercise catalog snapshot.
+
+Run from apps/api against a development database:
+
+    python -m benchmarks.exercise_snapshot --exercises 50000
+
+Compares fetching the library a page at a time from /exercises/, as
+clients did, with one snapshot: bytes on the wire and requests made.
+Pages are encoded as the endpoint encodes them, one JSON object per
+exercise. The snapshot is read from the database, as the endpoint reads
+it. Seeded rows are marked with a video_url and deleted afterwards.
+"""
+import argparse
+import asyncio
+import gzip
+import time
+
+from pydantic import TypeAdapter
+from sqlalchemy import delete, select
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.crud import exercises
+from app.models.exercise import Exercise as ExerciseModel
+from app.schemas.exercise import Exercise
+from app.services.catalog.snapshot import SnapshotCache
+from benchmarks.exercise_search import MARKER, synthetic_rows
+
+PAGE_SIZE = 100
+
+async def main(size: int) -> None:
+    async with AsyncSessionLocal() as db:
+        rows = synthetic_rows(size)
+        for offset in range(0, size, 5000):
+            await exercises.create_many(db, objs_in=rows[offset:offset + 5000])
+        await db.commit()
+    try:
+        async with AsyncSessionLocal() as db:
+            catalog = (await db.scalars(
+                select(ExerciseModel).order_by(ExerciseModel.created_at, ExerciseModel.exercise_id)
+            )).all()
+        page_adapter = TypeAdapter(list[Exercise])
+        listed = [Exercise.model_validate(exercise) for exercise in catalog]
+        pages = [page_adapter.dump_json(listed[i:i + PAGE_SIZE]) for i in range(0, len(listed), PAGE_SIZE)]
+        paged = sum(map(len, pages))
+        paged_gzip = sum(len(gzip.compress(page)) for page in pages)
+        print(f"paged list       {len(pages):5d} requests  {paged / 2 ** 20:6.1f} MiB  gzip {paged_gzip / 2 ** 20:6.1f} MiB")
+
+        cache = SnapshotCache()
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            snapshot = await cache.get(db)
+            built = time.perf_counter() - start
+            raw = len(gzip.decompress(snapshot.body))
+            print(
+                f"snapshot             1 request   {raw / 2 ** 20:6.1f} MiB  gzip {len(snapshot.body) / 2 ** 20:6.1f} MiB  "
+                f"built in {built * 1000:.0f} ms"
+            )
+
+            # A version read, then the stored bytes
+            start = time.perf_counter()
+            await cache.get(db)
+            print(f"cached snapshot  served in {(time.perf_counter() - start) * 1000:.3f} ms")
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(ExerciseModel).where(ExerciseModel.video_url == MARKER))
+            await db.commit()
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--exercises", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(main(args.exercises))
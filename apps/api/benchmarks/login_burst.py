@@ -0,0 +1,98 @@
+"""
+Latency of an unrelated endpoint while a burst of logins is hashing passwords.
+
+Run from apps/api against a development database:
+
+    python -m benchmarks.login_burst --logins 40 --concurrency 20
+
+"inline" verifies bcrypt on the event loop as login used to. "pool" uses
+the PasswordHasher worker pool. Meanwhile GET /health is probed every 20 ms
+and timed from when each probe was due; its p50/p99/max show how long the
+loop was frozen. The seeded user is deleted afterwards.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import List
+
+import httpx
+from sqlalchemy import delete
+
+from app.core.database import AsyncSessionLocal
+from app.core.hashing import PasswordHasher
+from app.main import app
+from app.models.user import User
+from app.services import user as user_service
+
+EMAIL = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+PASSWORD = "benchmark-password"
+
+class InlineHasher(PasswordHasher):
+    """Hashes on the calling thread, i.e. on the event loop"""
+
+    async def _run(self, func, *args):
+        return func(*args)
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+async def login(client: httpx.AsyncClient, semaphore: asyncio.Semaphore) -> None:
+    async with semaphore:
+        response = await client.post(
+            "/api/v1/auth/login",
+            data={"username": EMAIL, "password": PASSWORD}
+        )
+        response.raise_for_status()
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: List[float]) -> None:
+    due = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(max(due - time.perf_counter(), 0))
+        await client.get("/health")
+        samples.append(time.perf_counter() - due)
+        due += 0.02
+
+async def run(label: str, hasher: PasswordHasher, logins: int, concurrency: int) -> None:
+    user_service.password_hasher = hasher
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        samples: List[float] = []
+        stop = asyncio.Event()
+        semaphore = asyncio.Semaphore(concurrency)
+        prober = asyncio.ensure_future(probe(client, stop, samples))
+        start = time.perf_counter()
+        await asyncio.gather(*(login(client, semaphore) for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await prober
+    hasher.shutdown()
+    print(
+        f"{label:<6} {logins / elapsed:6.1f} logins/s  /health "
+        f"p50 {statistics.median(samples) * 1000:7.1f} ms  "
+        f"p99 {percentile(samples, 0.99) * 1000:7.1f} ms  "
+        f"max {max(samples) * 1000:7.1f} ms  ({len(samples)} probes)"
+    )
+
+async def main(logins: int, concurrency: int, workers: int) -> None:
+    async with AsyncSessionLocal() as db:
+        pool = PasswordHasher(workers=workers, max_queue=logins)
+        db.add(User(email=EMAIL, password=await pool.hash(PASSWORD)))
+        await db.commit()
+    try:
+        await run("inline", InlineHasher(workers=1, max_queue=logins), logins, concurrency)
+        await run("pool", pool, logins, concurrency)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.email == EMAIL))
+            await db.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency, args.workers))
@@ -0,0 +1,85 @@
+"""
+Memory and lookup times of the shared catalog file against the in-process index.
+
+Run from apps/api:
+
+    python -m benchmarks.shared_catalog --exercises 50000
+
+Writes the file for a synthetic catalog to a temporary directory, then
+compares what one worker allocates for the in-process index (with its
+similarity vectors) with what it allocates to map the file, and times the
+lookups ExerciseService makes and name suggestions against both. Mapped
+pages belong to the page cache, shared by every worker, so they are not
+counted as allocated.
+No database is needed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.services.catalog import ExerciseCatalog, SharedCatalog
+from app.services.catalog.shared import write_catalog_file
+from benchmarks.exercise_catalog import LOOKUPS, synthetic_catalog
+
+def _allocated(start: int) -> str:
+    return f"{(tracemalloc.get_traced_memory()[0] - start) / 2 ** 20:6.1f} MiB"
+
+async def _timed(label: str, repeat: int, lookup) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = lookup()
+        if asyncio.iscoroutine(result):
+            await result
+        timings.append(time.perf_counter() - start)
+    print(f"{label:<24} median {statistics.median(timings) * 1000:6.3f} ms  max {max(timings) * 1000:6.3f} ms")
+
+async def main(size: int, repeat: int) -> None:
+    exercises = synthetic_catalog(size)
+    sample = next(exercise.name for exercise in reversed(exercises) if "Dumbbell" in exercise.name)
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.EXERCISE_CATALOG_FILE = os.path.join(directory, "catalog.bin")
+        start = time.perf_counter()
+        write_catalog_file(settings.EXERCISE_CATALOG_FILE, exercises, datetime.now(timezone.utc))
+        print(
+            f"file written in {(time.perf_counter() - start) * 1000:.0f} ms, "
+            f"{os.path.getsize(settings.EXERCISE_CATALOG_FILE) / 2 ** 20:.0f} MiB"
+        )
+
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        index = ExerciseCatalog()
+        index.replace(exercises)
+        index.similar(sample, limit=1)
+        print(f"in-process index allocates {_allocated(start)} per worker")
+
+        start = tracemalloc.get_traced_memory()[0]
+        shared = SharedCatalog()
+        await shared.find_similar(None, sample)
+        print(f"mapped file allocates      {_allocated(start)} per worker")
+        tracemalloc.stop()
+
+        for label, criteria in LOOKUPS.items():
+            await _timed(f"{label} (index)", repeat, lambda: index.query(limit=100, **criteria))
+            await _timed(f"{label} (file)", repeat, lambda: shared.search(limit=100, **criteria))
+        fuzzy = sample.replace("Dumbbell", "DB")
+        await _timed("fuzzy name (index)", repeat, lambda: index.resolve_name(fuzzy))
+        await _timed("fuzzy name (file)", repeat, lambda: shared.find_by_name(None, fuzzy))
+        await _timed("similar (index)", repeat, lambda: index.similar(fuzzy, ["chest"], ["dumbbell"], limit=1))
+        await _timed("similar (file)", repeat, lambda: shared.find_similar(None, fuzzy, ["chest"], ["dumbbell"]))
+        await _timed("suggest (index)", repeat, lambda: index.prefix_matches("incline dumb"))
+        await _timed("suggest (file)", repeat, lambda: shared.suggest(None, "incline dumb"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--exercises", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.exercises, args.repeat))
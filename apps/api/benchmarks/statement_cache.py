@@ -0,0 +1,95 @@
+"""
+Measure the hot per-request queries with statement caching on and off.
+
+Run from apps/api against a development database:
+
+    python -m benchmarks.statement_cache --iterations 2000
+
+"On" uses lambda statements, the compiled cache and asyncpg prepared
+statements. "Off" builds, compiles and plans every query from scratch.
+The seeded user, profile and chat messages are deleted afterwards.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.database import _create_async_engine, _create_session_factory
+from app.crud import exercises, user_profile
+from app.models.chat import ChatMessage, ChatSession
+from app.models.exercise import Exercise
+from app.models.user import User
+from app.models.user_profile import UserProfile
+from app.services.chat.history import ChatHistoryService
+from app.services.user import get_user_by_email
+
+EMAIL = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+
+async def seed(session_factory) -> dict:
+    async with session_factory() as db:
+        user = User(email=EMAIL, password="x")
+        db.add(user)
+        await db.flush()
+        profile = UserProfile(user_id=user.id)
+        session = ChatSession(user_id=user.id)
+        exercise = Exercise(name=f"bench-{EMAIL}")
+        db.add_all([profile, session, exercise])
+        await db.flush()
+        db.add_all([
+            ChatMessage(session_id=session.session_id, role="user", content=f"Message {i}")
+            for i in range(50)
+        ])
+        await db.commit()
+        return {"user_id": user.id, "session_id": str(session.session_id), "exercise_id": exercise.exercise_id}
+
+async def cleanup(session_factory, keys: dict) -> None:
+    async with session_factory() as db:
+        await db.execute(delete(ChatMessage).where(ChatMessage.session_id == keys["session_id"]))
+        await db.execute(delete(ChatSession).where(ChatSession.session_id == keys["session_id"]))
+        await db.execute(delete(UserProfile).where(UserProfile.user_id == keys["user_id"]))
+        await db.execute(delete(Exercise).where(Exercise.exercise_id == keys["exercise_id"]))
+        await db.execute(delete(User).where(User.id == keys["user_id"]))
+        await db.commit()
+
+async def request(session_factory, keys: dict) -> None:
+    """The reads a typical authenticated chat request makes"""
+    async with session_factory() as db:
+        await get_user_by_email(db, EMAIL)
+        await exercises.get(db, keys["exercise_id"])
+        await user_profile.get_by_user_id(db, user_id=keys["user_id"])
+        await ChatHistoryService(db).get_messages(keys["session_id"], 10)
+
+async def run(label: str, enabled: bool, iterations: int) -> None:
+    settings.DB_STATEMENT_CACHE_ENABLED = enabled
+    engine = _create_async_engine(f"bench-{label}", settings.get_async_database_url, statement_cache=enabled)
+    session_factory = _create_session_factory(engine)
+    keys = await seed(session_factory)
+    try:
+        # Warm up the caches and let Postgres settle on generic plans
+        for _ in range(20):
+            await request(session_factory, keys)
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        for _ in range(iterations):
+            await request(session_factory, keys)
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+        print(
+            f"{label:<4} {cpu / iterations * 1000:7.3f} ms CPU/request  "
+            f"{wall / iterations * 1000:7.3f} ms wall/request"
+        )
+    finally:
+        await cleanup(session_factory, keys)
+        await engine.dispose()
+
+async def main(iterations: int) -> None:
+    await run("off", False, iterations)
+    await run("on", True, iterations)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().iterations))
@@ -8,7 +8,10 @@ import httpx
 from app.main import app
 from app.core.config import settings
 from app.core.database import Base, get_db
-from sqlalchemy import create_engine
+from app.core.principal import principal_cache
+from app.core.security import token_cache
+from app.services.catalog import catalog_snapshots, exercise_catalog
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 # Create test database engine
@@ -61,4 +64,41 @@ def clear_database():
     # Create all tables
     Base.metadata.create_all(bind=engine)
     
-    yield 
\ No newline at end of file
+    # Users are recreated with new ids, forget the cached ones
+    principal_cache.clear()
+    token_cache.clear()
+    exercise_catalog.clear()
+    catalog_snapshots.clear()
+    
+    yield 
+
+async def _register(client: AsyncClient, email: str) -> None:
+    await client.post(
+        "/api/v1/auth/register",
+        json={"email": email, "password": "testpassword123"}
+    )
+
+async def _login(client: AsyncClient, email: str) -> dict:
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": email, "password": "testpassword123", "grant_type": "password"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+async def auth_headers(async_client: AsyncClient) -> dict:
+    """Authorization headers for a regular user."""
+    await _register(async_client, "user@example.com")
+    return await _login(async_client, "user@example.com")
+
+@pytest.fixture
+async def superuser_headers(async_client: AsyncClient) -> dict:
+    """Authorization headers for a superuser."""
+    await _register(async_client, "admin@example.com")
+    with test_engine.begin() as connection:
+        connection.execute(
+            text("UPDATE users SET is_superuser = true WHERE email = :email"),
+            {"email": "admin@example.com"}
+        )
+    return await _login(async_client, "admin@example.com")
@@ -0,0 +1,19 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.asyncio
+
+async def test_pool_status_requires_superuser(async_client: AsyncClient, auth_headers):
+    """Test that regular users cannot read pool metrics."""
+    response = await async_client.get("/api/v1/admin/db/pool", headers=auth_headers)
+    assert response.status_code == 403
+
+async def test_pool_status(async_client: AsyncClient, superuser_headers):
+    """Test pool metrics reflect checkouts made by earlier requests."""
+    response = await async_client.get("/api/v1/admin/db/pool", headers=superuser_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["checkouts"] > 0
+    assert data["checked_out"] >= 0
+    assert data["timeouts"] == 0
+    assert data["wait_time_max_ms"] >= data["wait_time_avg_ms"]
@@ -0,0 +1,107 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from httpx import AsyncClient
+from jose import jwt
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core import security
+from app.core.security import create_access_token, token_cache
+
+pytestmark = pytest.mark.asyncio
+
+async def _statements(client: AsyncClient, url: str, headers: dict) -> list:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get(url, headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200, response.text
+    return statements
+
+def _claims(headers: dict) -> dict:
+    token = headers["Authorization"].split(" ", 1)[1]
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+async def test_login_issues_user_id_subject(async_client: AsyncClient, auth_headers):
+    """Test that the token subject is the user id and carries the flags."""
+    me = (await async_client.get("/api/v1/auth/me", headers=auth_headers)).json()
+    claims = _claims(auth_headers)
+    assert claims["sub"] == me["id"]
+    assert claims["is_active"] is True
+    assert claims["is_superuser"] is False
+
+async def test_principal_endpoints_skip_users_table(async_client: AsyncClient, auth_headers):
+    """Test that handlers needing only the user id never read the users table."""
+    statements = await _statements(async_client, "/api/v1/workouts/templates/", auth_headers)
+    assert not any("FROM users" in statement for statement in statements)
+
+async def test_legacy_email_subject_accepted(async_client: AsyncClient, auth_headers):
+    """Test that tokens issued before the switch keep working."""
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'user@example.com'})}"}
+    response = await async_client.get("/api/v1/workouts/templates/", headers=headers)
+    assert response.status_code == 200
+    response = await async_client.get("/api/v1/auth/me", headers=headers)
+    assert response.json()["email"] == "user@example.com"
+
+async def test_legacy_email_subject_rejected_when_disabled(
+    async_client: AsyncClient, auth_headers, monkeypatch
+):
+    """Test that legacy tokens are refused once the window is closed."""
+    monkeypatch.setattr(settings, "LEGACY_EMAIL_TOKENS_ACCEPTED", False)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'user@example.com'})}"}
+    response = await async_client.get("/api/v1/workouts/templates/", headers=headers)
+    assert response.status_code == 401
+
+async def test_inactive_claim_rejected(async_client: AsyncClient, auth_headers):
+    """Test that a token claiming an inactive user is refused."""
+    claims = _claims(auth_headers)
+    token = create_access_token({"sub": claims["sub"], "is_active": False, "is_superuser": False})
+    response = await async_client.get(
+        "/api/v1/workouts/templates/", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+
+async def test_repeat_requests_decode_token_once(async_client: AsyncClient, auth_headers, monkeypatch):
+    """Test that a token is verified once and then served from the cache."""
+    decodes = []
+    decode = security.jwt.decode
+    monkeypatch.setattr(security.jwt, "decode", lambda *args, **kwargs: decodes.append(1) or decode(*args, **kwargs))
+
+    for _ in range(3):
+        response = await async_client.get("/api/v1/workouts/templates/", headers=auth_headers)
+        assert response.status_code == 200
+    assert len(decodes) == 1
+    assert token_cache.stats()["hits"] >= 2
+
+async def test_cached_token_expires_with_token(async_client: AsyncClient, auth_headers):
+    """Test that a cached token stops working at its exp."""
+    claims = _claims(auth_headers)
+    token = create_access_token(
+        {"sub": claims["sub"], "is_active": True, "is_superuser": False},
+        expires_delta=timedelta(seconds=1)
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await async_client.get("/api/v1/workouts/templates/", headers=headers)
+    assert response.status_code == 200
+
+    # jose compares exp against whole seconds
+    await asyncio.sleep(2.1)
+    response = await async_client.get("/api/v1/workouts/templates/", headers=headers)
+    assert response.status_code == 401
+
+async def test_invalid_token_not_cached(async_client: AsyncClient, auth_headers):
+    """Test that tokens failing verification are not memoized."""
+    token = auth_headers["Authorization"].split(" ", 1)[1]
+    headers = {"Authorization": f"Bearer {token[:-2]}xx"}
+    response = await async_client.get("/api/v1/workouts/templates/", headers=headers)
+    assert response.status_code == 401
+    assert len(token_cache) == 0
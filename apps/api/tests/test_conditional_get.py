@@ -0,0 +1,88 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.database import query_counts
+from app.services.catalog import exercise_catalog
+
+pytestmark = pytest.mark.asyncio
+
+async def _create(client: AsyncClient, headers: dict, name: str) -> str:
+    response = await client.post("/api/v1/exercises/", json={"name": name}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["exercise_id"]
+
+async def test_exercise_list_revalidates_with_one_query(async_client: AsyncClient, auth_headers):
+    """Test that an unchanged catalog answers 304 after reading only its version."""
+    await _create(async_client, auth_headers, "Squat")
+    response = await async_client.get("/api/v1/exercises/", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    before = query_counts["primary"]
+    response = await async_client.get("/api/v1/exercises/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert query_counts["primary"] == before + 1
+
+    await _create(async_client, auth_headers, "Lunge")
+    response = await async_client.get("/api/v1/exercises/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [exercise["name"] for exercise in response.json()] == ["Squat", "Lunge"]
+
+async def test_exercise_revalidates_by_updated_at(async_client: AsyncClient, auth_headers):
+    """Test per-exercise ETags, and that an update invalidates them."""
+    exercise_id = await _create(async_client, auth_headers, "Row")
+    url = f"/api/v1/exercises/{exercise_id}"
+    etag = (await async_client.get(url, headers=auth_headers)).headers["ETag"]
+
+    before = query_counts["primary"]
+    response = await async_client.get(url, headers={**auth_headers, "If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    assert query_counts["primary"] == before + 1
+
+    await async_client.put(url, json={"equipment": ["cable"]}, headers=auth_headers)
+    response = await async_client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["equipment"] == ["cable"]
+    assert response.headers["ETag"] != etag
+
+async def test_writes_of_other_workers_invalidate(async_client: AsyncClient, auth_headers, monkeypatch):
+    """Test that writes this process's catalog index never saw still change the tags."""
+    exercise_id = await _create(async_client, auth_headers, "Dip")
+    url = f"/api/v1/exercises/{exercise_id}"
+    list_etag = (await async_client.get("/api/v1/exercises/", headers=auth_headers)).headers["ETag"]
+    etag = (await async_client.get(url, headers=auth_headers)).headers["ETag"]
+
+    # As if another worker made the writes
+    monkeypatch.setattr(exercise_catalog, "apply", lambda changes, version=None: None)
+    await async_client.put(url, json={"equipment": ["parallel bars"]}, headers=auth_headers)
+    response = await async_client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["equipment"] == ["parallel bars"]
+    response = await async_client.get("/api/v1/exercises/", headers={**auth_headers, "If-None-Match": list_etag})
+    assert response.status_code == 200
+    list_etag = response.headers["ETag"]
+
+    await async_client.delete(url, headers=auth_headers)
+    response = await async_client.get("/api/v1/exercises/", headers={**auth_headers, "If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert (await async_client.get(url, headers={**auth_headers, "If-None-Match": etag})).status_code == 404
+
+async def test_if_modified_since(async_client: AsyncClient, auth_headers):
+    """Test Last-Modified revalidation for clients that do not send ETags."""
+    await _create(async_client, auth_headers, "Plank")
+    last_modified = (await async_client.get("/api/v1/exercises/", headers=auth_headers)).headers["Last-Modified"]
+
+    response = await async_client.get(
+        "/api/v1/exercises/", headers={**auth_headers, "If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+    response = await async_client.get(
+        "/api/v1/exercises/", headers={**auth_headers, "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    )
+    assert response.status_code == 200
@@ -0,0 +1,125 @@
+import pytest
+from datetime import date, timedelta
+from uuid import uuid4
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal, query_counts
+from app.crud import exercises, workout_logs
+from app.models.exercise import Exercise
+from app.models.user import User
+from app.schemas.exercise import ExerciseCreate, ExerciseUpdate
+from app.schemas.workout import WorkoutLogCreate
+
+pytestmark = pytest.mark.asyncio
+
+async def test_create_many_inserts_one_statement_per_batch():
+    """Test that bulk inserts send one statement per 1000 rows."""
+    objs_in = [ExerciseCreate(name=f"Exercise {i}", muscle_groups=["chest"]) for i in range(2500)]
+    async with AsyncSessionLocal() as db:
+        before = query_counts["primary"]
+        created = await exercises.create_many(db, objs_in=objs_in)
+        assert query_counts["primary"] - before == 3
+
+        assert [ex.name for ex in created] == [obj_in.name for obj_in in objs_in]
+        assert all(ex.exercise_id and ex.created_at for ex in created)
+        assert await db.scalar(select(func.count()).select_from(Exercise)) == 2500
+
+async def test_create_many_with_user_logs(async_client: AsyncClient, auth_headers):
+    """Test bulk creation of workout logs for a user."""
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.email == "user@example.com"))
+        objs_in = [
+            WorkoutLogCreate(date=date(2024, 1, 1) + timedelta(days=i), exercises=[])
+            for i in range(10)
+        ]
+        created = await workout_logs.create_many_with_user(db, objs_in=objs_in, user_id=user.id)
+        await db.commit()
+        assert [log.date for log in created] == [obj_in.date for obj_in in objs_in]
+
+    response = await async_client.get("/api/v1/workouts/logs/", headers=auth_headers)
+    assert len(response.json()) == 10
+
+async def test_update_many_and_remove_many():
+    """Test bulk updates by id and bulk deletes."""
+    async with AsyncSessionLocal() as db:
+        created = await exercises.create_many(
+            db, objs_in=[ExerciseCreate(name=f"Exercise {i}") for i in range(3)]
+        )
+        ids = [ex.exercise_id for ex in created]
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        await exercises.update_many(db, objs_in={
+            ids[0]: ExerciseUpdate(difficulty="beginner"),
+            ids[1]: {"difficulty": "advanced", "description": "Harder"},
+        })
+        updated = {ex.exercise_id: ex for ex in await exercises.get_multi(db)}
+        assert updated[ids[0]].difficulty == "beginner"
+        assert updated[ids[1]].description == "Harder"
+        assert updated[ids[2]].difficulty is None
+
+        removed = await exercises.remove_many(db, ids=ids[:2] + [ids[0]])
+        assert sorted(removed) == sorted(ids[:2])
+        assert [ex.exercise_id for ex in await exercises.get_multi(db)] == [ids[2]]
+
+async def test_get_many_and_exists_many():
+    """Test id lookups of many rows in one query each."""
+    async with AsyncSessionLocal() as db:
+        created = await exercises.create_many(
+            db, objs_in=[ExerciseCreate(name=f"Exercise {i}") for i in range(3)]
+        )
+        ids = [ex.exercise_id for ex in created]
+        unknown = [uuid4(), uuid4()]
+
+        before = query_counts["primary"]
+        found = await exercises.get_many(db, ids + unknown)
+        missing = await exercises.exists_many(db, [unknown[1], ids[0], unknown[0], unknown[1]])
+        assert query_counts["primary"] - before == 2
+        assert sorted(ex.exercise_id for ex in found) == sorted(ids)
+        assert missing == [unknown[1], unknown[0]]
+        assert await exercises.exists_many(db, ids) == []
+        assert await exercises.get_many(db, []) == []
+
+def _template(exercise_ids: list) -> dict:
+    return {
+        "name": "Full body",
+        "difficulty": "beginner",
+        "exercises": [
+            {"exercise_id": str(id), "sets": 3, "reps": 10, "rest_time": 60} for id in exercise_ids
+        ],
+    }
+
+async def test_workout_exercise_ids_checked_in_one_query(async_client: AsyncClient, auth_headers):
+    """Test that templates and logs check all their exercises in one query."""
+    async with AsyncSessionLocal() as db:
+        created = await exercises.create_many(
+            db, objs_in=[ExerciseCreate(name=f"Exercise {i}") for i in range(12)]
+        )
+        ids = [ex.exercise_id for ex in created]
+        await db.commit()
+
+    queries = []
+    for exercise_ids in (ids[:1], ids):
+        before = query_counts["primary"]
+        response = await async_client.post(
+            "/api/v1/workouts/templates/", json=_template(exercise_ids), headers=auth_headers
+        )
+        assert response.status_code == 201, response.text
+        queries.append(query_counts["primary"] - before)
+    assert queries[0] == queries[1]
+
+    unknown = [uuid4(), uuid4()]
+    response = await async_client.post(
+        "/api/v1/workouts/templates/", json=_template([unknown[0], ids[0], unknown[1]]),
+        headers=auth_headers
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Exercises with IDs {unknown[0]}, {unknown[1]} not found"
+
+    log = {"date": "2024-01-01", "exercises": [
+        {"exercise_id": str(id), "sets": [{"reps": 5}]} for id in (ids[0], unknown[0])
+    ]}
+    response = await async_client.post("/api/v1/workouts/logs/", json=log, headers=auth_headers)
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Exercise with ID {unknown[0]} not found"
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core.database import AsyncSessionLocal, query_counts
+from app.crud import exercises
+from app.schemas.exercise import ExerciseCreate, ExerciseUpdate
+
+pytestmark = pytest.mark.asyncio
+
+async def test_create_fills_server_defaults_in_one_statement():
+    """Test that create returns server defaults without a follow-up SELECT."""
+    async with AsyncSessionLocal() as db:
+        before = query_counts["primary"]
+        exercise = await exercises.create(db, obj_in=ExerciseCreate(name="Push Up"))
+        assert query_counts["primary"] - before == 1
+        assert exercise.created_at is not None
+        assert exercise.updated_at is not None
+        assert exercise.muscle_groups == []
+
+async def test_update_returns_new_updated_at_in_one_statement():
+    """Test that update fetches the onupdate timestamp through RETURNING."""
+    async with AsyncSessionLocal() as db:
+        exercise = await exercises.create(db, obj_in=ExerciseCreate(name="Push Up"))
+        await db.commit()
+        created_updated_at = exercise.updated_at
+
+    async with AsyncSessionLocal() as db:
+        exercise = await exercises.get(db, exercise.exercise_id)
+        before = query_counts["primary"]
+        exercise = await exercises.update(
+            db, db_obj=exercise, obj_in={"description": "Chest", "unknown": "ignored"}
+        )
+        assert query_counts["primary"] - before == 1
+        assert exercise.description == "Chest"
+        assert exercise.updated_at > created_updated_at
+
+        exercise = await exercises.update(db, db_obj=exercise, obj_in=ExerciseUpdate(difficulty="beginner"))
+        assert exercise.description == "Chest"
+        assert exercise.difficulty == "beginner"
@@ -0,0 +1,358 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from httpx import AsyncClient
+
+from app.core.database import AsyncSessionLocal, query_counts
+from app.crud import exercises
+from app.schemas.exercise import Exercise, ExerciseCreate
+from app.services.catalog import ExerciseCatalog, exercise_catalog
+from app.services.catalog.vectors import ExerciseVectors
+from app.services.exercise_service import ExerciseService
+
+def _exercise(name: str, muscle_groups=(), equipment=(), difficulty=None) -> Exercise:
+    now = datetime.now(timezone.utc)
+    return Exercise(
+        exercise_id=uuid.uuid4(),
+        name=name,
+        muscle_groups=list(muscle_groups),
+        equipment=list(equipment),
+        difficulty=difficulty,
+        created_at=now,
+        updated_at=now
+    )
+
+def _names(results) -> list:
+    return [exercise.name for exercise in results]
+
+def test_query_intersects_criteria():
+    """Test any-of matching within a criterion and all-of across criteria, oldest first."""
+    catalog = ExerciseCatalog()
+    catalog.replace([
+        _exercise("Push-up", ["chest", "triceps"], ["bodyweight"], "beginner"),
+        _exercise("Bench Press", ["chest"], ["barbell", "bench"], "intermediate"),
+        _exercise("Dumbbell Fly", ["chest"], ["dumbbell", "bench"], "intermediate"),
+        _exercise("Squat", ["legs"], ["barbell"], "intermediate"),
+        _exercise("Lunge", ["legs"], ["bodyweight", "dumbbell"], "beginner"),
+    ])
+
+    assert _names(catalog.query(muscle_groups=["chest"])) == ["Push-up", "Bench Press", "Dumbbell Fly"]
+    assert _names(catalog.query(equipment=["barbell", "dumbbell"], difficulty="intermediate")) == [
+        "Bench Press", "Dumbbell Fly", "Squat"
+    ]
+    assert _names(catalog.query(equipment=["bodyweight"], muscle_groups=["legs", "triceps"])) == [
+        "Push-up", "Lunge"
+    ]
+    assert catalog.query(equipment=["kettlebell"]) == []
+    assert catalog.query(muscle_groups=["chest"], difficulty="advanced") == []
+    assert _names(catalog.query(limit=2)) == ["Push-up", "Bench Press"]
+
+def test_query_order_and_limit_on_large_match_sets():
+    """Test both ordering strategies return the oldest matches first."""
+    catalog = ExerciseCatalog()
+    catalog.replace([
+        _exercise(f"Exercise {i}", ["core"], ["mat" if i % 3 else "ball"])
+        for i in range(3000)
+    ])
+    # 2000 matches: walks the catalog in order
+    assert _names(catalog.query(equipment=["mat"], limit=3)) == ["Exercise 1", "Exercise 2", "Exercise 4"]
+    # 1000 matches, limit 1000: sorts the matches
+    results = catalog.query(equipment=["ball"], muscle_groups=["core"], limit=1000)
+    assert _names(results[:3]) == ["Exercise 0", "Exercise 3", "Exercise 6"]
+    assert len(results) == 1000
+
+def test_updates_keep_their_place():
+    """Test that an updated exercise is re-indexed without moving."""
+    catalog = ExerciseCatalog()
+    first, second = _exercise("First", ["chest"]), _exercise("Second", ["chest"])
+    catalog.replace([first, second])
+    catalog.apply({first.exercise_id: first.model_copy(update={"muscle_groups": ["chest", "back"]})})
+
+    assert _names(catalog.query(muscle_groups=["chest"])) == ["First", "Second"]
+    assert _names(catalog.query(muscle_groups=["back"])) == ["First"]
+
+async def test_criteria_reach_past_first_hundred_rows():
+    """Test that criteria lookups see the whole catalog, not the first page."""
+    async with AsyncSessionLocal() as db:
+        await exercises.create_many(db, objs_in=[
+            ExerciseCreate(name=f"Filler {i}", equipment=["machine"]) for i in range(150)
+        ])
+        await exercises.create_many(db, objs_in=[ExerciseCreate(name="Kettlebell Swing", equipment=["kettlebell"])])
+        await db.commit()
+
+        found = await ExerciseService(db).get_exercises_by_criteria(equipment=["kettlebell"])
+        assert _names(found) == ["Kettlebell Swing"]
+
+async def test_catalog_follows_api_writes(async_client: AsyncClient, auth_headers):
+    """Test that creates, updates and deletes reach the loaded index after commit."""
+    async with AsyncSessionLocal() as db:
+        await exercise_catalog.sync(db)
+    response = await async_client.post(
+        "/api/v1/exercises/",
+        json={"name": "Deadlift", "muscle_groups": ["back"], "equipment": ["barbell"]},
+        headers=auth_headers
+    )
+    exercise_id = uuid.UUID(response.json()["exercise_id"])
+    assert _names(exercise_catalog.query(equipment=["barbell"])) == ["Deadlift"]
+
+    await async_client.put(
+        f"/api/v1/exercises/{exercise_id}",
+        json={"equipment": ["trap bar"]},
+        headers=auth_headers
+    )
+    assert exercise_catalog.query(equipment=["barbell"]) == []
+    assert _names(exercise_catalog.query(equipment=["trap bar"])) == ["Deadlift"]
+
+    await async_client.delete(f"/api/v1/exercises/{exercise_id}", headers=auth_headers)
+    assert exercise_catalog.get(exercise_id) is None
+    assert exercise_catalog.query(muscle_groups=["back"]) == []
+
+async def test_catalog_follows_bulk_writes_and_ignores_rollbacks():
+    """Test bulk insert, update and delete tracking, and that rolled back writes are dropped."""
+    async with AsyncSessionLocal() as db:
+        await exercise_catalog.sync(db)
+        created = await exercises.create_many(db, objs_in=[
+            ExerciseCreate(name="Row", equipment=["cable"]),
+            ExerciseCreate(name="Pulldown", equipment=["cable"]),
+        ])
+        await db.commit()
+        assert _names(exercise_catalog.query(equipment=["cable"])) == ["Row", "Pulldown"]
+
+        await exercises.update_many(db, objs_in={created[0].exercise_id: {"equipment": ["band"]}})
+        await exercises.remove_many(db, ids=[created[1].exercise_id])
+        await db.commit()
+        await exercise_catalog.sync(db)
+        assert exercise_catalog.query(equipment=["cable"]) == []
+        assert _names(exercise_catalog.query(equipment=["band"])) == ["Row"]
+
+        await exercises.create(db, obj_in=ExerciseCreate(name="Face Pull", equipment=["band"]))
+        await db.rollback()
+        assert _names(exercise_catalog.query(equipment=["band"])) == ["Row"]
+
+async def test_catalog_catches_up_with_other_processes():
+    """Test that sync picks up writes committed outside its process, checking once per session."""
+    # Another worker's index: commits here are applied to exercise_catalog only
+    worker = ExerciseCatalog()
+    async with AsyncSessionLocal() as db:
+        await worker.sync(db)
+        created = await exercises.create_many(db, objs_in=[
+            ExerciseCreate(name="Row", equipment=["cable"]),
+            ExerciseCreate(name="Pulldown", equipment=["cable"]),
+        ])
+        await db.commit()
+        await worker.sync(db)
+        assert worker.query(equipment=["cable"]) == []
+
+    async with AsyncSessionLocal() as db:
+        await worker.sync(db)
+        assert sorted(_names(worker.query(equipment=["cable"]))) == ["Pulldown", "Row"]
+        await exercises.update_many(db, objs_in={created[0].exercise_id: {"equipment": ["band"]}})
+        await exercises.remove_many(db, ids=[created[1].exercise_id])
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        await worker.sync(db)
+        assert worker.query(equipment=["cable"]) == []
+        assert _names(worker.query(equipment=["band"])) == ["Row"]
+        assert worker.get(created[1].exercise_id) is None
+
+    async with AsyncSessionLocal() as db:
+        before = query_counts["primary"]
+        await worker.sync(db)
+        assert query_counts["primary"] == before + 1
+
+async def test_concurrent_first_syncs_load_once():
+    """Test that sessions syncing an unloaded catalog at once share one load."""
+    async with AsyncSessionLocal() as db:
+        await exercises.create(db, obj_in=ExerciseCreate(name="Dip"))
+        await db.commit()
+    worker = ExerciseCatalog()
+    loads = []
+    load = worker._load
+
+    async def counted_load(db):
+        loads.append(db)
+        await load(db)
+
+    worker._load = counted_load
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        await asyncio.gather(worker.sync(first), worker.sync(second))
+    assert len(loads) == 1
+    assert _names(worker.query()) == ["Dip"]
+
+async def test_own_commits_advance_the_version():
+    """Test that a commit of this process leaves nothing to catch up with."""
+    async with AsyncSessionLocal() as db:
+        await exercise_catalog.sync(db)
+        version = exercise_catalog.catalog_version.version
+        await exercises.create(db, obj_in=ExerciseCreate(name="Plank"))
+        await db.commit()
+        assert exercise_catalog.catalog_version.version == version + 1
+        etag = exercise_catalog.etag
+
+    async with AsyncSessionLocal() as db:
+        await exercise_catalog.sync(db)
+        assert exercise_catalog.etag == etag
+        assert _names(exercise_catalog.query()) == ["Plank"]
+
+def test_resolve_name_normalized_and_fuzzy():
+    """Test that spelling variants resolve to one exercise and unrelated names do not."""
+    catalog = ExerciseCatalog()
+    catalog.replace([
+        _exercise("Push Up"),
+        _exercise("Pull Up"),
+        _exercise("Incline Dumbbell Press"),
+        _exercise("Plank"),
+    ])
+
+    for name in ("Push-ups", "pushups", "PUSH UP", "Push up!"):
+        assert catalog.resolve_name(name).name == "Push Up"
+    assert catalog.resolve_name("Incline DB Press").name == "Incline Dumbbell Press"
+    assert catalog.resolve_name("Side Plank") is None
+    assert catalog.resolve_name("Side Plank", threshold=0.3).name == "Plank"
+    assert catalog.resolve_name("Burpee") is None
+    assert catalog.resolve_name("!!") is None
+
+def test_resolve_name_follows_renames():
+    """Test that the name indexes drop an exercise's old name."""
+    catalog = ExerciseCatalog()
+    exercise = _exercise("Push Up")
+    catalog.replace([exercise])
+    catalog.apply({exercise.exercise_id: exercise.model_copy(update={"name": "Burpee"})})
+
+    assert catalog.resolve_name("Push-ups") is None
+    assert catalog.resolve_name("Burpees").exercise_id == exercise.exercise_id
+
+def test_similar_finds_near_duplicates_by_content():
+    """Test that abbreviations, reordered words and equipment match, and variants do not."""
+    catalog = ExerciseCatalog()
+    catalog.replace([
+        _exercise("Dumbbell Goblet Squat", ["legs", "glutes"], ["dumbbell"]),
+        _exercise("Barbell Back Squat", ["legs"], ["barbell"]),
+        _exercise("Dumbbell Bench Press", ["chest", "triceps"], ["dumbbell", "bench"]),
+        _exercise("Barbell Bench Press", ["chest", "triceps"], ["barbell", "bench"]),
+        _exercise("Incline Dumbbell Press", ["chest"], ["dumbbell", "bench"]),
+        _exercise("Kettlebell Swing", ["glutes", "hamstrings"], ["kettlebell"]),
+        _exercise("Push Up", ["chest"]),
+        _exercise("Plank", ["core"]),
+    ])
+    threshold = 0.8
+
+    def best(name, muscle_groups=(), equipment=()):
+        exercise, score = catalog.similar(name, muscle_groups, equipment, limit=1)[0]
+        return exercise.name if score >= threshold else None
+
+    assert best("DB Goblet Squat", ["legs"], ["dumbbell"]) == "Dumbbell Goblet Squat"
+    assert best("Goblet Squat", ["quads"], ["dumbbell"]) == "Dumbbell Goblet Squat"
+    assert best("Dumbbell Incline Press", ["chest"], ["dumbbells"]) == "Incline Dumbbell Press"
+    assert best("KB Swings", ["glutes"], ["kettlebell"]) == "Kettlebell Swing"
+    assert best("Barbell Bench Press", ["chest"], ["barbell"]) == "Barbell Bench Press"
+    assert best("Kneeling Push Up", ["chest"]) is None
+    assert best("Front Squat", ["legs"], ["barbell"]) is None
+
+    results = catalog.similar("Bench Press", ["chest"], ["bench"], limit=3)
+    assert _names(exercise for exercise, _ in results)[:2] == ["Dumbbell Bench Press", "Barbell Bench Press"]
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+def test_similar_follows_changes():
+    """Test that the vectors track inserts, renames and deletes once built."""
+    catalog = ExerciseCatalog()
+    squat = _exercise("Dumbbell Goblet Squat", ["legs"], ["dumbbell"])
+    catalog.replace([squat, _exercise("Plank", ["core"])])
+    assert catalog.similar("DB Goblet Squat", ["legs"], ["dumbbell"])[0][0] == squat
+
+    swing = _exercise("Kettlebell Swing", ["glutes"], ["kettlebell"])
+    catalog.apply({
+        swing.exercise_id: swing,
+        squat.exercise_id: squat.model_copy(update={"name": "Dumbbell Lunge"}),
+    })
+    assert catalog.similar("KB Swing", ["glutes"], ["kettlebell"])[0][0] == swing
+    assert catalog.similar("DB Goblet Squat", ["legs"], ["dumbbell"])[0][1] < 0.8
+
+    catalog.apply({swing.exercise_id: None})
+    assert swing not in [exercise for exercise, _ in catalog.similar("KB Swing", ["glutes"], ["kettlebell"])]
+    assert len(catalog.vectors) == 2
+
+def test_similar_after_compaction(monkeypatch):
+    """Test that vectors added one by one score as they did once folded into the postings."""
+    monkeypatch.setattr(ExerciseVectors, "COMPACT_SIZE", 3)
+    catalog = ExerciseCatalog()
+    plank = _exercise("Plank", ["core"])
+    catalog.replace([plank, _exercise("Barbell Back Squat", ["legs"], ["barbell"])])
+    catalog.similar("Plank")
+    added = [
+        _exercise("Dumbbell Goblet Squat", ["legs"], ["dumbbell"]),
+        _exercise("Kettlebell Swing", ["glutes"], ["kettlebell"]),
+    ]
+    catalog.apply({exercise.exercise_id: exercise for exercise in added})
+    before = catalog.similar("DB Goblet Squat", ["legs"], ["dumbbell"], limit=3)
+
+    # A third added vector, replacing a built one, folds them all in
+    catalog.apply({plank.exercise_id: plank.model_copy(update={"name": "Side Plank"})})
+    assert not catalog.vectors._added
+    assert catalog.similar("DB Goblet Squat", ["legs"], ["dumbbell"], limit=3) == before
+    assert catalog.similar("Side Planks", ["core"])[0][0].name == "Side Plank"
+    assert len(catalog.vectors) == 4
+
+def test_prefix_matches_names_then_words():
+    """Test that whole-name prefixes come before later-word prefixes, ignoring punctuation."""
+    catalog = ExerciseCatalog()
+    catalog.replace([
+        _exercise("Incline Press"),
+        _exercise("Push-Up"),
+        _exercise("Press Around"),
+        _exercise("Pull Up"),
+        _exercise("Bench Press"),
+    ])
+
+    assert _names(catalog.prefix_matches("pr")) == ["Press Around", "Incline Press", "Bench Press"]
+    assert _names(catalog.prefix_matches("PUSH u")) == ["Push-Up"]
+    assert _names(catalog.prefix_matches("pu", limit=1)) == ["Pull Up"]
+    assert _names(catalog.prefix_matches("up")) == ["Push-Up", "Pull Up"]
+    assert catalog.prefix_matches("squat") == []
+    assert catalog.prefix_matches("--") == []
+
+    pull_up = catalog.prefix_matches("pull")[0]
+    catalog.apply({pull_up.exercise_id: pull_up.model_copy(update={"name": "Chin Up"})})
+    catalog.apply({catalog.prefix_matches("bench")[0].exercise_id: None})
+    catalog.apply({uuid.uuid4(): _exercise("Pike Push-Up")})
+    assert catalog.prefix_matches("pull") == []
+    assert _names(catalog.prefix_matches("p")) == ["Pike Push-Up", "Press Around", "Push-Up", "Incline Press"]
+
+async def test_suggest_endpoint(async_client: AsyncClient, auth_headers):
+    """Test type-ahead suggestions, including an exercise created through the API."""
+    await async_client.post("/api/v1/exercises/", json={"name": "Romanian Deadlift"}, headers=auth_headers)
+    await async_client.post("/api/v1/exercises/", json={"name": "Deadlift"}, headers=auth_headers)
+
+    response = await async_client.get("/api/v1/exercises/suggest", params={"q": "dead"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["Deadlift", "Romanian Deadlift"]
+    assert set(response.json()[0]) == {"exercise_id", "name"}
+
+    response = await async_client.get("/api/v1/exercises/suggest", params={"q": ""}, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_bulk_changes_match_a_fresh_index():
+    """Test that large change sets leave the prefix arrays as a rebuild would."""
+    catalog = ExerciseCatalog()
+    originals = [_exercise(f"Press {i}") for i in range(60)]
+    catalog.replace(originals)
+
+    changes = {}
+    for exercise in originals[:20]:
+        changes[exercise.exercise_id] = exercise.model_copy(update={"name": f"Curl {exercise.name}"})
+    for exercise in originals[20:40]:
+        changes[exercise.exercise_id] = None
+    added = [_exercise(f"Row {i}") for i in range(20)]
+    changes.update({exercise.exercise_id: exercise for exercise in added})
+    # Added and removed again within one change set
+    changes[added[0].exercise_id] = None
+    assert len(changes) > ExerciseCatalog.BULK_CHANGES
+    catalog.apply(changes)
+
+    fresh = ExerciseCatalog()
+    fresh.replace([*(changes[e.exercise_id] for e in originals[:20]), *originals[40:], *added[1:]])
+    for prefix in ("press", "curl", "row", "1"):
+        assert _names(catalog.prefix_matches(prefix, limit=100)) == _names(fresh.prefix_matches(prefix, limit=100))
+    assert catalog.prefix_matches("row 0") == []
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud import exercises
+from app.models.exercise import Exercise
+from app.schemas.exercise import ExerciseCreate
+from app.services.catalog import exercise_catalog
+from app.services.exercise_import import _NameIndex
+
+pytestmark = pytest.mark.asyncio
+
+async def _chunks(data: bytes, size: int = 7):
+    # Small chunks split lines and multi-byte characters
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def _import(client: AsyncClient, headers: dict, data: bytes, content_type: str):
+    return await client.post(
+        "/api/v1/admin/exercises/import",
+        content=_chunks(data),
+        headers={**headers, "Content-Type": content_type}
+    )
+
+async def _all_exercises() -> dict:
+    async with AsyncSessionLocal() as db:
+        return {exercise.name: exercise for exercise in await db.scalars(select(Exercise))}
+
+async def test_csv_import_upserts_by_normalized_name(async_client: AsyncClient, superuser_headers):
+    """Test CSV parsing, list cells, row errors and updates of existing exercises."""
+    async with AsyncSessionLocal() as db:
+        await exercises.create(db, obj_in=ExerciseCreate(name="Push Up", description="old"))
+        await db.commit()
+
+    data = (
+        "name,description,muscle_groups,equipment,difficulty,instructions,notes\n"
+        'Push-ups,Classic,chest;triceps,,beginner,"Keep a straight line,\nlower slowly",ignored\n'
+        "Café Curl,,biceps,dumbbell,,,\n"
+        ",No name,,,,,\n"
+        "Squat,,legs,barbell,,,,extra\n"
+        "Goblet Squat,,legs,kettlebell,intermediate,,\n"
+        "goblet squats,,legs;glutes,,,,\n"
+    ).encode()
+    response = await _import(async_client, superuser_headers, data, "text/csv")
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["state"] == "completed"
+    assert (report["rows"], report["created"], report["updated"], report["rejected"]) == (6, 2, 1, 2)
+    assert [error["line"] for error in report["errors"]] == [5, 6]
+    assert report["bytes_read"] == len(data)
+
+    stored = await _all_exercises()
+    assert set(stored) == {"Push Up", "Café Curl", "Goblet Squat"}
+    assert stored["Push Up"].description == "Classic"
+    assert stored["Push Up"].muscle_groups == ["chest", "triceps"]
+    assert stored["Push Up"].instructions == "Keep a straight line,\nlower slowly"
+    # Repeats within the upload merge: later values win, the first spelling stays
+    assert stored["Goblet Squat"].muscle_groups == ["legs", "glutes"]
+    assert stored["Goblet Squat"].equipment == []
+    assert stored["Goblet Squat"].difficulty is None
+
+async def test_jsonl_import_across_batches(async_client: AsyncClient, superuser_headers, monkeypatch):
+    """Test that names repeated in later batches update instead of duplicating."""
+    monkeypatch.setattr(settings, "EXERCISE_IMPORT_BATCH_SIZE", 2)
+    lines = [
+        {"name": "Row", "equipment": ["cable"]},
+        {"name": "Plank"},
+        {"name": "Dip"},
+        {"name": "rows", "difficulty": "beginner"},
+        "not json",
+        {"name": 3},
+    ]
+    data = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines).encode()
+    response = await _import(async_client, superuser_headers, data, "application/x-ndjson")
+    report = response.json()
+    assert (report["created"], report["updated"], report["rejected"], report["batches"]) == (3, 1, 2, 2)
+
+    stored = await _all_exercises()
+    assert set(stored) == {"Row", "Plank", "Dip"}
+    assert stored["Row"].equipment == ["cable"]
+    assert stored["Row"].difficulty == "beginner"
+
+    response = await async_client.get("/api/v1/admin/exercises/imports", headers=superuser_headers)
+    assert response.json()[0]["import_id"] == report["import_id"]
+
+async def test_import_reloads_the_catalog_once(async_client: AsyncClient, superuser_headers, monkeypatch):
+    """Test that batches are not applied to the catalog one by one, and that it reloads at the end."""
+    monkeypatch.setattr(settings, "EXERCISE_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(_NameIndex, "MERGE_SIZE", 3)
+    async with AsyncSessionLocal() as db:
+        await exercise_catalog.load(db)
+    applied, loads = [], []
+    monkeypatch.setattr(exercise_catalog, "apply", lambda changes, version=None: applied.append(changes))
+    load = exercise_catalog.load
+    async def counted_load(db):
+        loads.append(db)
+        await load(db)
+    monkeypatch.setattr(exercise_catalog, "load", counted_load)
+
+    names = ["Row", "Plank", "Dip", "Lunge", "Crunch", "rows", "planks", "Dips"]
+    data = "\n".join(json.dumps({"name": name, "description": str(i)}) for i, name in enumerate(names)).encode()
+    response = await _import(async_client, superuser_headers, data, "application/x-ndjson")
+    report = response.json()
+    assert (report["created"], report["updated"], report["batches"]) == (5, 3, 4)
+    assert applied == [] and len(loads) == 1
+    assert len(exercise_catalog) == 5
+    assert exercise_catalog.resolve_name("planks").description == "6"
+
+async def test_import_rejects_other_formats_and_users(
+    async_client: AsyncClient, auth_headers, superuser_headers
+):
+    """Test the content type check and that only superusers may import."""
+    response = await _import(async_client, superuser_headers, b"[]", "application/json")
+    assert response.status_code == 415
+    response = await _import(async_client, auth_headers, b"name\nSquat\n", "text/csv")
+    assert response.status_code == 403
@@ -0,0 +1,78 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.database import AsyncSessionLocal
+from app.crud import exercises
+from app.schemas.exercise import ExerciseCreate
+
+pytestmark = pytest.mark.asyncio
+
+async def _seed(objs_in: list) -> None:
+    async with AsyncSessionLocal() as db:
+        await exercises.create_many(db, objs_in=objs_in)
+        await db.commit()
+
+async def _search(client: AsyncClient, headers: dict, body: dict, **params):
+    response = await client.post("/api/v1/exercises/search", json=body, params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+async def test_text_search_ranks_name_matches_first(async_client: AsyncClient, auth_headers):
+    """Test that matches in the name outrank matches in description or instructions."""
+    await _seed([
+        ExerciseCreate(name="Plank", instructions="Squeeze the glutes, do not let the hips squat down"),
+        ExerciseCreate(name="Goblet Squat", description="Front loaded squats with a dumbbell"),
+        ExerciseCreate(name="Lunge", description="Like a split squat, stepping forward"),
+        ExerciseCreate(name="Push Up", description="Bodyweight press"),
+    ])
+
+    response = await _search(async_client, auth_headers, {"query": "squatting"})
+    assert [ex["name"] for ex in response.json()] == ["Goblet Squat", "Lunge", "Plank"]
+
+    response = await _search(async_client, auth_headers, {"query": "squat -dumbbell"})
+    assert [ex["name"] for ex in response.json()] == ["Lunge", "Plank"]
+
+async def test_text_search_with_filters(async_client: AsyncClient, auth_headers):
+    """Test that muscle, equipment and difficulty filters narrow ranked results."""
+    await _seed([
+        ExerciseCreate(name="Barbell Row", muscle_groups=["back"], equipment=["barbell"], difficulty="intermediate"),
+        ExerciseCreate(name="Dumbbell Row", muscle_groups=["back"], equipment=["dumbbell"], difficulty="beginner"),
+        ExerciseCreate(name="Upright Row", muscle_groups=["shoulders"], equipment=["barbell"], difficulty="beginner"),
+    ])
+
+    response = await _search(async_client, auth_headers, {"query": "row", "equipment": ["barbell"]})
+    assert sorted(ex["name"] for ex in response.json()) == ["Barbell Row", "Upright Row"]
+    response = await _search(
+        async_client, auth_headers, {"query": "row", "muscle_groups": ["back"], "difficulty": "beginner"}
+    )
+    assert [ex["name"] for ex in response.json()] == ["Dumbbell Row"]
+
+async def test_ranked_search_cursor_pagination(async_client: AsyncClient, auth_headers):
+    """Test that cursors page through equally ranked results without gaps or repeats."""
+    await _seed([ExerciseCreate(name=f"Curl variation {i}") for i in range(7)] + [
+        ExerciseCreate(name="Hammer Hold", description="Finish a curl set with this")
+    ])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = await _search(async_client, auth_headers, {"query": "curl"}, **params)
+        seen += [ex["name"] for ex in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == 8
+    assert len(set(seen)) == 8
+    assert seen[-1] == "Hammer Hold"
+
+async def test_search_without_query_is_limited(async_client: AsyncClient, auth_headers):
+    """Test that filter-only searches are paged oldest first instead of returning everything."""
+    await _seed([ExerciseCreate(name=f"Exercise {i}", equipment=["mat"]) for i in range(5)])
+
+    first = await _search(async_client, auth_headers, {"equipment": ["mat"]}, limit=2)
+    second = await _search(
+        async_client, auth_headers, {"equipment": ["mat"]}, limit=2, cursor=first.headers["X-Next-Cursor"]
+    )
+    names = [ex["name"] for ex in first.json() + second.json()]
+    assert len(names) == 4
+    assert len(set(names)) == 4
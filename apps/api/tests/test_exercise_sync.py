@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, query_counts
+from app.crud import exercises
+from app.models.exercise import ExerciseTombstone
+from app.services.catalog import exercise_catalog
+
+pytestmark = pytest.mark.asyncio
+
+async def _create(client: AsyncClient, headers: dict, name: str, **fields) -> str:
+    response = await client.post("/api/v1/exercises/", json={"name": name, **fields}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["exercise_id"]
+
+async def test_snapshot_is_compressed_columnar_and_cached(async_client: AsyncClient, auth_headers):
+    """Test the snapshot layout, gzip encoding and revalidation by catalog version."""
+    ids = [await _create(async_client, auth_headers, name, equipment=["mat"]) for name in ("Plank", "Crunch")]
+    response = await async_client.get(
+        "/api/v1/exercises/snapshot", headers={**auth_headers, "Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    snapshot = response.json()
+    assert snapshot["count"] == 2
+    assert snapshot["exercises"]["exercise_id"] == ids
+    assert snapshot["exercises"]["name"] == ["Plank", "Crunch"]
+    assert snapshot["exercises"]["equipment"] == [["mat"], ["mat"]]
+    assert snapshot["version"] == response.headers["ETag"]
+
+    before = query_counts["primary"]
+    response = await async_client.get(
+        "/api/v1/exercises/snapshot", headers={**auth_headers, "If-None-Match": snapshot["version"]}
+    )
+    assert response.status_code == 304
+    assert query_counts["primary"] == before + 1
+
+    await _create(async_client, auth_headers, "Bridge")
+    response = await async_client.get(
+        "/api/v1/exercises/snapshot", headers={**auth_headers, "Accept-Encoding": "identity"}
+    )
+    assert "Content-Encoding" not in response.headers
+    assert response.json()["count"] == 3
+    assert response.headers["ETag"] != snapshot["version"]
+
+async def test_snapshot_follows_other_workers(async_client: AsyncClient, auth_headers, monkeypatch):
+    """Test that the snapshot is read from the database, not this worker's catalog index."""
+    # As if each write were committed by another worker
+    monkeypatch.setattr(exercise_catalog, "apply", lambda changes, version=None: None)
+    await _create(async_client, auth_headers, "Plank")
+    first = (await async_client.get("/api/v1/exercises/snapshot", headers=auth_headers)).json()
+    await _create(async_client, auth_headers, "Crunch")
+    second = (await async_client.get("/api/v1/exercises/snapshot", headers=auth_headers)).json()
+
+    assert second["exercises"]["name"] == ["Plank", "Crunch"]
+    assert second["version"] != first["version"]
+    assert second["since"] > first["since"]
+
+async def test_changes_since_snapshot(async_client: AsyncClient, auth_headers, monkeypatch):
+    """Test that changes after a snapshot come back as upserts and tombstones."""
+    monkeypatch.setattr(settings, "EXERCISE_SYNC_OVERLAP_SECONDS", 0)
+    row = await _create(async_client, auth_headers, "Row")
+    dip = await _create(async_client, auth_headers, "Dip")
+    since = (await async_client.get("/api/v1/exercises/snapshot", headers=auth_headers)).json()["since"]
+
+    await async_client.put(f"/api/v1/exercises/{row}", json={"equipment": ["cable"]}, headers=auth_headers)
+    await async_client.delete(f"/api/v1/exercises/{dip}", headers=auth_headers)
+    lunge = await _create(async_client, auth_headers, "Lunge")
+
+    response = await async_client.get("/api/v1/exercises/changes", params={"since": since}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    changes = response.json()
+    assert changes["count"] == 2
+    assert changes["upserts"]["exercise_id"] == [row, lunge]
+    assert changes["upserts"]["equipment"] == [["cable"], []]
+    assert changes["deletes"] == [dip]
+
+    response = await async_client.get(
+        "/api/v1/exercises/changes", params={"since": changes["next_since"]}, headers=auth_headers
+    )
+    assert response.json()["count"] == 0
+    assert response.json()["deletes"] == []
+
+async def test_old_cursors_and_tombstones_expire(async_client: AsyncClient, auth_headers):
+    """Test that old tombstones are pruned, and only cursors before pruned ones get 410."""
+    async def changes(since: datetime) -> int:
+        response = await async_client.get(
+            "/api/v1/exercises/changes", params={"since": since.isoformat()}, headers=auth_headers
+        )
+        return response.status_code
+
+    expired = datetime.now(timezone.utc) - timedelta(days=settings.EXERCISE_TOMBSTONE_RETENTION_DAYS + 1)
+    # Nothing was pruned, so however old, a cursor missed nothing
+    assert await changes(expired - timedelta(days=365)) == 200
+
+    async with AsyncSessionLocal() as db:
+        db.add(ExerciseTombstone(exercise_id=uuid4(), deleted_at=expired))
+        await db.commit()
+    exercise_ids = [await _create(async_client, auth_headers, name) for name in ("Curl", "Press")]
+    async with AsyncSessionLocal() as db:
+        assert sorted(await exercises.remove_many(db, ids=exercise_ids)) == sorted(map(UUID, exercise_ids))
+        await db.commit()
+        tombstones = await db.scalars(select(ExerciseTombstone.exercise_id))
+        assert sorted(map(str, tombstones)) == sorted(exercise_ids)
+        assert await db.scalar(select(func.min(ExerciseTombstone.deleted_at))) > expired
+    assert await changes(expired - timedelta(seconds=1)) == 410
+    assert await changes(expired) == 200
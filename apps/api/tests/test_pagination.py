@@ -0,0 +1,80 @@
+import pytest
+from datetime import date, timedelta
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.crud import exercises, workout_logs
+from app.models.user import User
+from app.schemas.exercise import ExerciseCreate
+from app.schemas.workout import WorkoutLogCreate
+
+pytestmark = pytest.mark.asyncio
+
+async def _pages(client: AsyncClient, url: str, headers: dict, limit: int) -> list:
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(url, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+async def test_workout_logs_cursor_pagination(async_client: AsyncClient, auth_headers):
+    """Test that cursors walk every log once, newest first, across equal dates."""
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.email == "user@example.com"))
+        # Three logs per day so pages split rows that share a date
+        await workout_logs.create_many_with_user(
+            db,
+            objs_in=[
+                WorkoutLogCreate(date=date(2024, 1, 1) + timedelta(days=i // 3), exercises=[])
+                for i in range(25)
+            ],
+            user_id=user.id
+        )
+        await db.commit()
+
+    pages = await _pages(async_client, "/api/v1/workouts/logs/", auth_headers, limit=10)
+    assert [len(page) for page in pages] == [10, 10, 5]
+
+    logs = [log for page in pages for log in page]
+    assert len({log["log_id"] for log in logs}) == 25
+    dates = [log["date"] for log in logs]
+    assert dates == sorted(dates, reverse=True)
+
+async def test_exercises_cursor_pagination(async_client: AsyncClient, auth_headers):
+    """Test that exercise pages continue where the previous page ended."""
+    async with AsyncSessionLocal() as db:
+        await exercises.create_many(
+            db, objs_in=[ExerciseCreate(name=f"Exercise {i}") for i in range(7)]
+        )
+        await db.commit()
+
+    pages = await _pages(async_client, "/api/v1/exercises/", auth_headers, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert len({ex["exercise_id"] for page in pages for ex in page}) == 7
+
+async def test_exact_last_page_has_empty_follow_up(async_client: AsyncClient, auth_headers):
+    """Test that a full last page yields a cursor to an empty page."""
+    async with AsyncSessionLocal() as db:
+        await exercises.create_many(
+            db, objs_in=[ExerciseCreate(name=f"Exercise {i}") for i in range(4)]
+        )
+        await db.commit()
+
+    pages = await _pages(async_client, "/api/v1/exercises/", auth_headers, limit=2)
+    assert [len(page) for page in pages] == [2, 2, 0]
+
+async def test_invalid_cursor(async_client: AsyncClient, auth_headers):
+    """Test that malformed cursors are rejected."""
+    for cursor in ["not-a-cursor", "WyJ4Il0"]:
+        response = await async_client.get(
+            "/api/v1/workouts/logs/", params={"cursor": cursor}, headers=auth_headers
+        )
+        assert response.status_code == 400
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.hashing import PasswordHasher, PasswordHasherBusy, password_hasher
+from app.core.security import get_password_hash
+
+pytestmark = pytest.mark.asyncio
+
+async def test_hashing_does_not_block_event_loop():
+    """Test that the loop keeps running while bcrypt hashes in the pool."""
+    hashed = get_password_hash("secret")
+    gaps = []
+
+    async def ticker(task):
+        last = time.perf_counter()
+        while not task.done():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.ensure_future(password_hasher.verify("secret", hashed))
+    await ticker(task)
+    assert await task is True
+    assert max(gaps) < 0.1
+
+async def test_full_queue_rejects():
+    """Test that calls beyond the queue limit fail fast and are counted."""
+    hasher = PasswordHasher(workers=1, max_queue=2)
+    release = threading.Event()
+
+    def block() -> bool:
+        return release.wait(5)
+
+    try:
+        # One call occupies the worker, the other two fill the queue
+        blocked = [asyncio.ensure_future(hasher._run(block)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["running"] == 1
+        assert hasher.stats()["queue_depth"] == 2
+
+        with pytest.raises(PasswordHasherBusy):
+            await hasher._run(block)
+        release.set()
+        await asyncio.gather(*blocked)
+        stats = hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["rejected"] == 1
+        assert stats["queue_depth_max"] == 2
+    finally:
+        release.set()
+        hasher.shutdown()
+
+async def test_cancelled_queued_call_leaves_queue():
+    """Test that cancelling a call still waiting for a worker frees its queue slot."""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    def block() -> bool:
+        return release.wait(5)
+
+    try:
+        running = asyncio.ensure_future(hasher._run(block))
+        queued = asyncio.ensure_future(hasher._run(block))
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["queue_depth"] == 1
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert hasher.stats()["queue_depth"] == 0
+
+        release.set()
+        assert await running is True
+        assert await hasher._run(block) is True
+        stats = hasher.stats()
+        assert stats["queue_depth"] == 0
+        assert stats["completed"] == 2
+    finally:
+        release.set()
+        hasher.shutdown()
+
+async def test_login_answers_503_when_queue_full(async_client: AsyncClient, auth_headers, monkeypatch):
+    """Test that an overloaded hasher turns into 503 with Retry-After."""
+    monkeypatch.setattr(password_hasher, "max_queue", 0)
+    response = await async_client.post(
+        "/api/v1/auth/login",
+        data={"username": "user@example.com", "password": "testpassword123", "grant_type": "password"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+async def test_password_hasher_status(async_client: AsyncClient, superuser_headers):
+    """Test that the admin endpoint reports the work done by register and login."""
+    response = await async_client.get(
+        "/api/v1/admin/security/password-hasher", headers=superuser_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["completed"] >= 2
+    assert data["queue_depth"] == 0
+    assert data["workers"] == password_hasher.workers
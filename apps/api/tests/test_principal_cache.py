@@ -0,0 +1,91 @@
+import time
+
+from httpx import AsyncClient
+from sqlalchemy import event, select
+
+from app.core.cache import TTLCache
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.principal import principal_cache
+from app.models.user import User
+
+async def _users_queries(client: AsyncClient, headers: dict) -> int:
+    """Number of statements against the users table made by GET /auth/me"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get("/api/v1/auth/me", headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200, response.text
+    return sum("FROM users" in statement for statement in statements)
+
+async def _update_user(email: str, **values) -> None:
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.email == email))
+        for key, value in values.items():
+            setattr(user, key, value)
+        await db.commit()
+
+async def test_repeat_requests_skip_users_lookup(async_client: AsyncClient, auth_headers):
+    """Test that only the first authenticated request reads the users table."""
+    assert await _users_queries(async_client, auth_headers) == 1
+    assert await _users_queries(async_client, auth_headers) == 0
+    assert principal_cache.hits >= 1
+
+async def test_deactivation_invalidates_principal(async_client: AsyncClient, auth_headers):
+    """Test that a deactivated user is rejected on the next request."""
+    await async_client.get("/api/v1/auth/me", headers=auth_headers)
+    await _update_user("user@example.com", is_active=False)
+
+    response = await async_client.get("/api/v1/auth/me", headers=auth_headers)
+    assert response.status_code == 400
+
+async def test_privilege_change_invalidates_principal(async_client: AsyncClient, auth_headers):
+    """Test that granting superuser takes effect without waiting for the TTL."""
+    response = await async_client.get("/api/v1/admin/db/pool", headers=auth_headers)
+    assert response.status_code == 403
+    await _update_user("user@example.com", is_superuser=True)
+
+    response = await async_client.get("/api/v1/admin/db/pool", headers=auth_headers)
+    assert response.status_code == 200
+
+async def test_deletion_invalidates_principal(async_client: AsyncClient, auth_headers):
+    """Test that a deleted user's token stops working."""
+    await async_client.get("/api/v1/auth/me", headers=auth_headers)
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.email == "user@example.com"))
+        await db.delete(user)
+        await db.commit()
+
+    response = await async_client.get("/api/v1/auth/me", headers=auth_headers)
+    assert response.status_code == 401
+
+async def test_principal_cache_status(async_client: AsyncClient, superuser_headers):
+    """Test the admin endpoint reports hits and misses."""
+    await async_client.get("/api/v1/admin/cache/principals", headers=superuser_headers)
+    response = await async_client.get("/api/v1/admin/cache/principals", headers=superuser_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["misses"] == 1
+    assert data["hits"] == 1
+    assert data["size"] == 1
+
+def test_ttl_cache_expiry_and_eviction():
+    """Test TTL expiry, per-entry TTL and least recently used eviction."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,140 @@
+import json
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.crud import exercises, user_measurement, user_profile, workout_logs, workout_templates
+from app.models.chat import ChatContext, ChatMessage, ChatSession
+from app.models.exercise import Exercise
+from app.models.user import User
+from app.models.user_measurement import UserMeasurement
+from app.models.user_profile import UserProfile
+from app.models.workout import WorkoutLog, WorkoutTemplate
+from app.services.chat.context import ChatContextService
+from app.services.chat.history import ChatHistoryService
+
+pytestmark = pytest.mark.asyncio
+
+ROWS = 2000
+
+@contextmanager
+def captured_statements():
+    """Record the SQL and parameters sent to the driver"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+def _node_types(plan: dict) -> set:
+    types = {plan["Node Type"]}
+    for child in plan.get("Plans", []):
+        types |= _node_types(child)
+    return types
+
+async def _seed(db) -> dict:
+    """Several users' worth of rows, so every predicate is selective"""
+    users = [User(email=f"user{i}@example.com", password="x") for i in range(4)]
+    db.add_all(users)
+    await db.flush()
+    profiles = [UserProfile(user_id=user.id) for user in users]
+    sessions = [ChatSession(user_id=user.id) for user in users]
+    db.add_all(profiles + sessions)
+    await db.flush()
+
+    start = date(2020, 1, 1)
+    for user, profile, session in zip(users, profiles, sessions):
+        await db.execute(insert(WorkoutLog), [
+            {"user_id": user.id, "date": start + timedelta(days=i), "exercises": []}
+            for i in range(ROWS)
+        ])
+        await db.execute(insert(WorkoutTemplate), [
+            {"created_by": user.id, "name": f"Template {i}", "difficulty": "beginner", "exercises": []}
+            for i in range(ROWS)
+        ])
+        await db.execute(insert(UserMeasurement), [
+            {"profile_id": profile.id, "date": start + timedelta(days=i), "weight": 80}
+            for i in range(ROWS)
+        ])
+        await db.execute(insert(ChatMessage), [
+            {"session_id": session.session_id, "role": "user", "content": f"Message {i}"}
+            for i in range(ROWS)
+        ])
+        await db.execute(insert(ChatContext), [
+            {"session_id": session.session_id, "context_type": f"type {i % 20}", "context_data": {}}
+            for i in range(ROWS)
+        ])
+    await db.execute(insert(Exercise), [
+        {
+            "name": f"Exercise {i}",
+            "muscle_groups": [f"muscle {i % 50}"],
+            "equipment": [f"equipment {i % 40}"]
+        }
+        for i in range(ROWS * 4)
+    ])
+    await db.commit()
+
+    return {
+        "user_id": users[0].id,
+        "profile_id": profiles[0].id,
+        "session_id": str(sessions[0].session_id),
+        "date": start + timedelta(days=100),
+    }
+
+async def test_crud_queries_use_indexes():
+    """Test that every hot CRUD query can be answered from an index."""
+    async with AsyncSessionLocal() as db:
+        keys = await _seed(db)
+        for table in ["workout_logs", "workout_templates", "user_measurements",
+                      "chat_messages", "chat_context", "chat_sessions", "exercises"]:
+            await db.execute(text(f"ANALYZE {table}"))
+
+    queries = {
+        "workout logs by user": lambda db: workout_logs.get_by_user(db, user_id=keys["user_id"]),
+        "workout logs by date range": lambda db: workout_logs.get_user_logs_by_date_range(
+            db, user_id=keys["user_id"], start_date=keys["date"], end_date=keys["date"] + timedelta(days=7)
+        ),
+        "templates by user": lambda db: workout_templates.get_by_user(db, user_id=keys["user_id"]),
+        "measurements by profile": lambda db: user_measurement.get_by_profile(db, profile_id=keys["profile_id"]),
+        "measurement by date": lambda db: user_measurement.get_by_date(
+            db, profile_id=keys["profile_id"], measurement_date=keys["date"]
+        ),
+        "profile by user": lambda db: user_profile.get_by_user_id(db, user_id=keys["user_id"]),
+        "exercises page": lambda db: exercises.get_multi(db),
+        "exercises by muscle group": lambda db: exercises.search(db, muscle_groups=["muscle 7"]),
+        "exercises by equipment": lambda db: exercises.search(db, equipment=["equipment 3"]),
+        "exercises by text": lambda db: exercises.search(db, query="exercise 12"),
+        "chat messages": lambda db: ChatHistoryService(db).get_messages(keys["session_id"]),
+        "chat context": lambda db: ChatContextService(db).get_context(keys["session_id"], "type 3"),
+        "active chat session": lambda db: ChatHistoryService(db).get_active_session(keys["user_id"]),
+    }
+
+    async with AsyncSessionLocal() as db:
+        trgm = await db.scalar(text("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'"))
+        if trgm:
+            queries["exercises by name"] = lambda db: exercises.search(db, name="cise 12")
+
+        # Any applicable index should win over a sequential scan
+        await db.execute(text("SET LOCAL enable_seqscan = off"))
+        connection = await db.connection()
+        for label, query in queries.items():
+            with captured_statements() as statements:
+                await query(db)
+            assert statements, label
+            for statement, parameters in statements:
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                nodes = _node_types(plan[0]["Plan"])
+                assert nodes & {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}, (label, nodes)
+        await db.rollback()
@@ -0,0 +1,91 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app.core.database import AsyncSessionLocal
+from app.core.hashing import password_hasher
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services.refresh_token import hash_refresh_token
+
+pytestmark = pytest.mark.asyncio
+
+async def _login(client: AsyncClient, email: str = "user@example.com") -> dict:
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": email, "password": "testpassword123", "grant_type": "password"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+async def _refresh(client: AsyncClient, refresh_token: str):
+    return await client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+
+async def test_refresh_rotates_without_password_check(async_client: AsyncClient, auth_headers):
+    """Test that refresh issues working tokens without running bcrypt."""
+    tokens = await _login(async_client)
+    assert tokens["refresh_token"]
+    verifications = password_hasher.stats()["completed"]
+
+    response = await _refresh(async_client, tokens["refresh_token"])
+    assert response.status_code == 200
+    renewed = response.json()
+    assert renewed["refresh_token"] != tokens["refresh_token"]
+    assert password_hasher.stats()["completed"] == verifications
+
+    response = await async_client.get(
+        "/api/v1/auth/me", headers={"Authorization": f"Bearer {renewed['access_token']}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == "user@example.com"
+
+async def test_refresh_tokens_stored_hashed(async_client: AsyncClient, auth_headers):
+    """Test that only the digest of a refresh token reaches the database."""
+    tokens = await _login(async_client)
+    async with AsyncSessionLocal() as db:
+        stored = await db.scalar(
+            select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(tokens["refresh_token"]))
+        )
+        assert stored is not None
+        assert tokens["refresh_token"] not in stored.token_hash
+
+async def test_reused_refresh_token_revokes_family(async_client: AsyncClient, auth_headers):
+    """Test that replaying a rotated token also kills the token it was rotated into."""
+    tokens = await _login(async_client)
+    renewed = (await _refresh(async_client, tokens["refresh_token"])).json()
+
+    response = await _refresh(async_client, tokens["refresh_token"])
+    assert response.status_code == 401
+    response = await _refresh(async_client, renewed["refresh_token"])
+    assert response.status_code == 401
+
+async def test_logout_revokes_refresh_token(async_client: AsyncClient, auth_headers):
+    """Test that a logged out refresh token no longer works, but other logins do."""
+    tokens = await _login(async_client)
+    other = await _login(async_client)
+
+    response = await async_client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 204
+    assert (await _refresh(async_client, tokens["refresh_token"])).status_code == 401
+    assert (await _refresh(async_client, other["refresh_token"])).status_code == 200
+
+async def test_expired_refresh_token_rejected(async_client: AsyncClient, auth_headers):
+    """Test that an expired refresh token is refused."""
+    tokens = await _login(async_client)
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(RefreshToken).values(expires_at=RefreshToken.created_at))
+        await db.commit()
+    assert (await _refresh(async_client, tokens["refresh_token"])).status_code == 401
+
+async def test_inactive_user_cannot_refresh(async_client: AsyncClient, auth_headers):
+    """Test that deactivating a user stops their refresh tokens."""
+    tokens = await _login(async_client)
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).values(is_active=False))
+        await db.commit()
+    assert (await _refresh(async_client, tokens["refresh_token"])).status_code == 401
+
+async def test_unknown_refresh_token_rejected(async_client: AsyncClient):
+    """Test that a made up refresh token is refused."""
+    assert (await _refresh(async_client, "not-a-token")).status_code == 401
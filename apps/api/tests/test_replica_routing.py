@@ -0,0 +1,56 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionRouter, _create_session_factory
+from sqlalchemy.ext.asyncio import create_async_engine
+
+pytestmark = pytest.mark.asyncio
+
+def _replica_factory(server: str):
+    url = settings.get_async_database_url.replace(settings.POSTGRES_SERVER, server, 1)
+    return _create_session_factory(create_async_engine(url))
+
+async def test_reads_use_primary_without_replica():
+    """Test that reads go to the primary when no replica is configured."""
+    router = SessionRouter(AsyncSessionLocal)
+    session = await router.read_session()
+    assert session.bind is AsyncSessionLocal.kw["bind"]
+    await session.close()
+
+async def test_reads_use_healthy_replica():
+    """Test that reads go to a reachable replica within the lag limit."""
+    # A second server that is not in recovery reports zero lag
+    replica = _replica_factory(settings.POSTGRES_SERVER)
+    router = SessionRouter(AsyncSessionLocal, replica, max_lag=5, check_interval=60)
+    session = await router.read_session()
+    assert session.bind is replica.kw["bind"]
+    assert router.replica_lag == 0
+    await session.close()
+    await replica.kw["bind"].dispose()
+
+async def test_reads_fall_back_when_replica_is_unreachable():
+    """Test that reads fall back to the primary when the replica is down."""
+    replica = _replica_factory("localhost:1")
+    router = SessionRouter(AsyncSessionLocal, replica, max_lag=5, check_interval=60)
+    session = await router.read_session()
+    assert session.bind is AsyncSessionLocal.kw["bind"]
+    assert router.replica_healthy is False
+    await session.close()
+
+async def test_reads_fall_back_when_replica_is_lagging():
+    """Test that reads fall back to the primary when lag exceeds the limit."""
+    replica = _replica_factory(settings.POSTGRES_SERVER)
+    router = SessionRouter(AsyncSessionLocal, replica, max_lag=-1, check_interval=60)
+    session = await router.read_session()
+    assert session.bind is AsyncSessionLocal.kw["bind"]
+    await session.close()
+    await replica.kw["bind"].dispose()
+
+async def test_engine_status_counts_queries(async_client: AsyncClient, superuser_headers):
+    """Test that per-engine query counts are exposed to admins."""
+    response = await async_client.get("/api/v1/admin/db/engines", headers=superuser_headers)
+    assert response.status_code == 200
+    primary = response.json()[0]
+    assert primary["name"] == "primary"
+    assert primary["queries"] > 0
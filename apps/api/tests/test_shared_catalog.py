@@ -0,0 +1,166 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.schemas.exercise import Exercise
+from app.services.catalog import ExerciseCatalog, SharedCatalog, exercise_catalog, shared_catalog
+from app.services.catalog.shared import write_catalog_file
+from app.services.exercise_service import ExerciseService
+
+pytestmark = pytest.mark.asyncio
+
+def _exercise(name: str, muscle_groups=(), equipment=(), difficulty=None, description=None) -> Exercise:
+    now = datetime.now(timezone.utc)
+    return Exercise(
+        exercise_id=uuid.uuid4(),
+        name=name,
+        description=description,
+        muscle_groups=list(muscle_groups),
+        equipment=list(equipment),
+        difficulty=difficulty,
+        created_at=now,
+        updated_at=now
+    )
+
+def _names(results) -> list:
+    return [exercise.name for exercise in results]
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch) -> str:
+    path = str(tmp_path / "catalog.bin")
+    monkeypatch.setattr(settings, "EXERCISE_CATALOG_FILE", path)
+    monkeypatch.setattr(settings, "EXERCISE_CATALOG_FILE_REBUILD_INTERVAL_SECONDS", 0)
+    return path
+
+async def test_mapped_lookups_match_the_index(catalog_file):
+    """Test that lookups over the file give what the in-process index gives."""
+    exercises = [
+        _exercise("Push-up", ["chest", "triceps"], ["bodyweight"], "beginner", "Hands under shoulders"),
+        _exercise("Bench Press", ["chest"], ["barbell", "bench"], "intermediate"),
+        _exercise("Dumbbell Goblet Squat", ["legs", "glutes"], ["dumbbell"], "beginner"),
+        _exercise("Squat", ["legs"], ["barbell"], "intermediate"),
+        _exercise("Lunge", ["legs"], ["bodyweight", "dumbbell"], "beginner"),
+        _exercise("Lunges", ["legs"], []),
+        _exercise("Überzug", ["lats"], ["dumbbell", "bench"], "advanced"),
+    ]
+    index = ExerciseCatalog()
+    index.replace(exercises)
+    assert write_catalog_file(catalog_file, exercises, datetime.now(timezone.utc))
+    shared = SharedCatalog()
+
+    for criteria in (
+        {},
+        {"limit": 2},
+        {"muscle_groups": ["chest"]},
+        {"equipment": ["barbell", "dumbbell"], "difficulty": "intermediate"},
+        {"equipment": ["bodyweight"], "muscle_groups": ["legs", "triceps"]},
+        {"equipment": ["kettlebell"]},
+        {"muscle_groups": ["chest"], "difficulty": "advanced"},
+    ):
+        assert await shared.search(**criteria) == index.query(**criteria), criteria
+    assert len(shared) == len(exercises)
+    assert await shared.search(equipment=["bench"]) == [exercises[1], exercises[6]]
+
+    for name in ("push ups", "LUNGES", "Bench Pres", "Uberzug", "Deadlift", "!!"):
+        assert await shared.find_by_name(None, name) == index.resolve_name(name), name
+    assert (await shared.find_by_name(None, "Lunges")).exercise_id == exercises[4].exercise_id
+
+    for prefix in ("", "s", "squ", "PRESS", "lunge", "ü", "zz"):
+        assert await shared.suggest(None, prefix) == index.prefix_matches(prefix), prefix
+    assert await shared.suggest(None, "l", limit=1) == index.prefix_matches("l", limit=1)
+
+    similar = await shared.find_similar(None, "DB Goblet Squat", ["legs"], ["dumbbell"])
+    assert similar == exercises[2]
+    assert index.similar("DB Goblet Squat", ["legs"], ["dumbbell"], limit=1)[0][0] == similar
+    assert await shared.find_similar(None, "Rowing Machine Sprint", ["back"], ["rower"]) is None
+    assert shared.vectors.stats()["lookups"] == 2
+    assert shared.vectors.stats()["matches"] == 1
+
+async def test_older_builds_do_not_replace_newer(catalog_file):
+    """Test that of builds finishing out of order, the latest read of the table is kept."""
+    now = datetime.now(timezone.utc)
+    assert write_catalog_file(catalog_file, [_exercise("Plank")], now)
+    assert not write_catalog_file(catalog_file, [_exercise("Crunch")], now - timedelta(seconds=1))
+    assert _names(await SharedCatalog().search()) == ["Plank"]
+    assert write_catalog_file(catalog_file, [_exercise("Bridge")], now + timedelta(seconds=1))
+    assert _names(await SharedCatalog().search()) == ["Bridge"]
+
+async def test_workers_see_each_others_writes(async_client: AsyncClient, auth_headers, catalog_file):
+    """Test that a committed write rebuilds the file and every worker's lookups see it."""
+    worker_a, worker_b = SharedCatalog(), SharedCatalog()
+    # The first lookup builds the missing file
+    assert await worker_a.search() == []
+
+    response = await async_client.post(
+        "/api/v1/exercises/",
+        json={"name": "Plank", "muscle_groups": ["core"], "equipment": ["mat"]},
+        headers=auth_headers
+    )
+    assert response.status_code == 201
+    await shared_catalog.wait_for_rebuild()
+
+    for worker in (worker_a, worker_b):
+        assert _names(await worker.search(equipment=["mat"])) == ["Plank"]
+        assert (await worker.find_by_name(None, "planks")).name == "Plank"
+
+    # A worker whose own index has not seen the write still finds it
+    exercise_catalog.clear()
+    async with AsyncSessionLocal() as db:
+        service = ExerciseService(db)
+        assert (await service.get_exercise_by_name("Plank")).name == "Plank"
+        assert _names(await service.get_exercises_by_criteria(muscle_groups=["core"])) == ["Plank"]
+    response = await async_client.get("/api/v1/exercises/suggest", params={"q": "pla"}, headers=auth_headers)
+    assert [exercise["name"] for exercise in response.json()] == ["Plank"]
+    assert len(exercise_catalog) == 0
+
+async def test_files_behind_the_database_are_rebuilt(async_client: AsyncClient, auth_headers, catalog_file):
+    """Test that the first lookup of a session rebuilds a file older than the catalog version."""
+    response = await async_client.post("/api/v1/exercises/", json={"name": "Plank"}, headers=auth_headers)
+    assert response.status_code == 201
+    await shared_catalog.wait_for_rebuild()
+    # As if written before the last exercise change
+    assert write_catalog_file(catalog_file, [], datetime.now(timezone.utc), version='W/"0"')
+
+    worker = SharedCatalog()
+    async with AsyncSessionLocal() as db:
+        # Served from the file there until the rebuild is done
+        assert await worker.search(db) == []
+        await worker.wait_for_rebuild()
+        assert _names(await worker.search(db)) == ["Plank"]
+
+async def test_builds_wait_for_each_other(async_client: AsyncClient, auth_headers, catalog_file):
+    """Test that concurrent builds of workers read the table once, the others finding the file current."""
+    response = await async_client.post("/api/v1/exercises/", json={"name": "Plank"}, headers=auth_headers)
+    assert response.status_code == 201
+    await shared_catalog.wait_for_rebuild()
+    os.unlink(catalog_file)
+
+    workers = [SharedCatalog() for _ in range(4)]
+    built = await asyncio.gather(*(worker.rebuild() for worker in workers))
+    assert sorted(built) == [False, False, False, True]
+    # Missing files are built once too, whichever worker looks first
+    os.unlink(catalog_file)
+    found = await asyncio.gather(*(worker.find_by_name(None, "plank") for worker in workers))
+    assert [exercise.name for exercise in found] == ["Plank"] * 4
+
+async def test_rebuilds_keep_an_interval(async_client: AsyncClient, auth_headers, catalog_file, monkeypatch):
+    """Test that writes soon after a build wait for the interval, and make one build."""
+    interval = 0.5
+    monkeypatch.setattr(settings, "EXERCISE_CATALOG_FILE_REBUILD_INTERVAL_SECONDS", interval)
+    assert await SharedCatalog().search() == []
+    built = os.stat(catalog_file).st_mtime
+
+    for name in ("Plank", "Crunch", "Bridge"):
+        response = await async_client.post("/api/v1/exercises/", json={"name": name}, headers=auth_headers)
+        assert response.status_code == 201
+    await asyncio.sleep(0.1)
+    assert os.stat(catalog_file).st_mtime == built
+    await shared_catalog.wait_for_rebuild()
+    assert os.stat(catalog_file).st_mtime >= built + interval
+    assert len(await SharedCatalog().search()) == 3
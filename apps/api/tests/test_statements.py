@@ -0,0 +1,37 @@
+from sqlalchemy import Select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.crud import statements
+from app.services.chat.history import ChatHistoryService
+from app.services.user import get_user_by_email
+
+async def test_cached_statements_bind_new_values(async_client, auth_headers, superuser_headers):
+    """Test that reused lambda statements pick up each call's parameters."""
+    async with AsyncSessionLocal() as db:
+        user = await get_user_by_email(db, "user@example.com")
+        admin = await get_user_by_email(db, "admin@example.com")
+        assert user.email == "user@example.com"
+        assert admin.email == "admin@example.com"
+        assert await get_user_by_email(db, "missing@example.com") is None
+
+async def test_cached_statements_bind_new_limits(async_client, auth_headers):
+    """Test that the limit of the cached chat history statement is not frozen."""
+    response = await async_client.post("/api/v1/chat/sessions", headers=auth_headers)
+    session_id = response.json()["session_id"]
+    async with AsyncSessionLocal() as db:
+        history = ChatHistoryService(db)
+        for i in range(5):
+            await history.add_message(session_id, "user", f"Message {i}")
+        await db.commit()
+
+        assert len(await history.get_messages(session_id, limit=2)) == 2
+        messages = await history.get_messages(session_id, limit=4)
+        assert [message.content for message in messages] == [f"Message {i}" for i in (4, 3, 2, 1)]
+
+def test_statement_cache_toggle(monkeypatch):
+    """Test that disabling the cache falls back to plain statements."""
+    assert isinstance(statements.user_by_email("a@example.com"), StatementLambdaElement)
+    monkeypatch.setattr(settings, "DB_STATEMENT_CACHE_ENABLED", False)
+    assert isinstance(statements.user_by_email("a@example.com"), Select)
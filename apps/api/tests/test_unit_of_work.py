@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, func, select
+
+from app.agents.workflows.chat.fitness_chat import FitnessChatWorkflow
+from app.core.database import AsyncSessionLocal, async_engine, release_connection
+from app.models.chat import ChatMessage
+from app.services.chat.history import ChatHistoryService
+
+pytestmark = pytest.mark.asyncio
+
+@contextmanager
+def counted_commits():
+    commits = []
+    listener = lambda conn: commits.append(conn)
+    event.listen(async_engine.sync_engine, "commit", listener)
+    try:
+        yield commits
+    finally:
+        event.remove(async_engine.sync_engine, "commit", listener)
+
+@pytest.fixture
+def chat_workflow(monkeypatch):
+    """Replace the LLM workflow with a canned reply"""
+    async def process_message(self, **kwargs):
+        return {"response": "Keep going!", "current_state": "motivation"}
+
+    monkeypatch.setattr(FitnessChatWorkflow, "__init__", lambda self, db: None)
+    monkeypatch.setattr(FitnessChatWorkflow, "process_message", process_message)
+
+async def _message_count() -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(ChatMessage))
+
+async def test_chat_turn_commits_once(async_client: AsyncClient, auth_headers, chat_workflow):
+    """Test that both messages of a chat turn are saved with a single commit."""
+    response = await async_client.post("/api/v1/chat/sessions", headers=auth_headers)
+    session_id = response.json()["session_id"]
+
+    with counted_commits() as commits:
+        response = await async_client.post(
+            f"/api/v1/chat/sessions/{session_id}/messages",
+            json={"content": "Hello"},
+            headers=auth_headers
+        )
+    assert response.status_code == 200, response.text
+    assert len(commits) == 1
+    assert await _message_count() == 2
+
+async def test_failed_chat_turn_saves_nothing(
+    async_client: AsyncClient, auth_headers, chat_workflow, monkeypatch
+):
+    """Test that a failure after the user message is saved rolls the turn back."""
+    response = await async_client.post("/api/v1/chat/sessions", headers=auth_headers)
+    session_id = response.json()["session_id"]
+
+    add_message = ChatHistoryService.add_message
+
+    async def fail_on_assistant(self, session_id, role, content, metadata=None):
+        if role == "assistant":
+            raise RuntimeError("Assistant message failed")
+        return await add_message(self, session_id, role, content, metadata)
+
+    monkeypatch.setattr(ChatHistoryService, "add_message", fail_on_assistant)
+    response = await async_client.post(
+        f"/api/v1/chat/sessions/{session_id}/messages",
+        json={"content": "Hello"},
+        headers=auth_headers
+    )
+    assert response.status_code == 500
+    assert await _message_count() == 0
+
+async def test_release_connection_refuses_flushed_writes(async_client: AsyncClient, auth_headers):
+    """Test that flushed but uncommitted writes are not silently dropped."""
+    response = await async_client.post("/api/v1/chat/sessions", headers=auth_headers)
+    session_id = response.json()["session_id"]
+
+    async with AsyncSessionLocal() as db:
+        await ChatHistoryService(db).add_message(session_id, "user", "Hello")
+        with pytest.raises(RuntimeError):
+            await release_connection(db)
+        await db.commit()
+        await release_connection(db)
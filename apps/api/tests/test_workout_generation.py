@@ -0,0 +1,207 @@
+import pytest
+from httpx import AsyncClient
+from langchain_core.runnables import RunnableLambda
+
+from app.core.database import async_engine
+from app.crud import workout_templates
+from app.schemas.exercise import ExerciseCreate
+from app.services.ai import workout_generator
+from app.services.ai.workout_generator import WorkoutExercise, WorkoutPlan
+
+pytestmark = pytest.mark.asyncio
+
+class FakeLLM:
+    """Stand-in for the chat model that records pool usage during the call."""
+
+    def __init__(self, checked_out: list, exercises: list = None):
+        self.checked_out = checked_out
+        self.exercises = exercises or [
+            WorkoutExercise(
+                name="Push Up",
+                sets=3,
+                reps=10,
+                rest_time=60,
+                target_muscles=["chest"],
+                equipment_needed=[]
+            ),
+            WorkoutExercise(
+                name="Air Squat",
+                sets=3,
+                reps=15,
+                rest_time=60,
+                target_muscles=["legs"],
+                equipment_needed=[]
+            ),
+        ]
+
+    def with_structured_output(self, schema):
+        async def plan(_):
+            self.checked_out.append(async_engine.pool.checkedout())
+            return WorkoutPlan(
+                name="Test Workout",
+                description="Generated in tests",
+                difficulty="beginner",
+                exercises=self.exercises
+            )
+        return RunnableLambda(plan)
+
+@pytest.fixture
+def llm_calls(monkeypatch) -> list:
+    """Patch every LLM call made during workout generation."""
+    checked_out = []
+
+    async def fake_generate_exercise(exercise_type, target_muscles, **kwargs):
+        checked_out.append(async_engine.pool.checkedout())
+        return ExerciseCreate(name=exercise_type, muscle_groups=target_muscles)
+
+    monkeypatch.setattr(workout_generator, "get_llm", lambda **kwargs: FakeLLM(checked_out))
+    monkeypatch.setattr(workout_generator, "generate_exercise_with_ai", fake_generate_exercise)
+    return checked_out
+
+async def test_generate_workout_releases_connection_during_llm_calls(
+    async_client: AsyncClient, auth_headers, llm_calls
+):
+    """Test that no pooled connection is held while the LLM is running."""
+    await async_client.post(
+        "/api/v1/profiles/me",
+        json={"fitness_goals": ["strength"]},
+        headers=auth_headers
+    )
+    # Push Up already exists, only Air Squat should be generated
+    await async_client.post(
+        "/api/v1/exercises/",
+        json={"name": "Push Up", "muscle_groups": ["chest"]},
+        headers=auth_headers
+    )
+
+    response = await async_client.post(
+        "/api/v1/workouts/generate",
+        json={
+            "duration": 30,
+            "location": "home",
+            "equipment": [],
+            "intensity": "light",
+            "focusAreas": ["chest"]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert len(response.json()["exercises"]) == 2
+
+    # One workout plan call plus one generated exercise
+    assert llm_calls == [0, 0]
+
+async def test_generate_workout_is_atomic(
+    async_client: AsyncClient, auth_headers, llm_calls, monkeypatch
+):
+    """Test that generated exercises are not kept if saving the template fails."""
+    await async_client.post(
+        "/api/v1/profiles/me",
+        json={"fitness_goals": ["strength"]},
+        headers=auth_headers
+    )
+
+    async def fail_create_with_user(**kwargs):
+        raise RuntimeError("Template insert failed")
+
+    monkeypatch.setattr(workout_templates, "create_with_user", fail_create_with_user)
+    response = await async_client.post(
+        "/api/v1/workouts/generate",
+        json={
+            "duration": 30,
+            "location": "home",
+            "equipment": [],
+            "intensity": "light",
+            "focusAreas": ["chest"]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 500
+
+    response = await async_client.get("/api/v1/exercises/", headers=auth_headers)
+    assert response.json() == []
+
+async def test_generate_workout_reuses_spelling_variants(
+    async_client: AsyncClient, auth_headers, llm_calls
+):
+    """Test that differently spelled names match existing exercises instead of being generated."""
+    await async_client.post(
+        "/api/v1/profiles/me",
+        json={"fitness_goals": ["strength"]},
+        headers=auth_headers
+    )
+    for name in ("Push-ups", "Air Squats"):
+        await async_client.post("/api/v1/exercises/", json={"name": name}, headers=auth_headers)
+
+    response = await async_client.post(
+        "/api/v1/workouts/generate",
+        json={
+            "duration": 30,
+            "location": "home",
+            "equipment": [],
+            "intensity": "light",
+            "focusAreas": ["chest"]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert len(response.json()["exercises"]) == 2
+
+    # Only the workout plan call
+    assert llm_calls == [0]
+    response = await async_client.get("/api/v1/exercises/", headers=auth_headers)
+    assert len(response.json()) == 2
+
+async def test_generate_workout_reuses_similar_exercises(
+    async_client: AsyncClient, auth_headers, superuser_headers, llm_calls, monkeypatch
+):
+    """Test that near-duplicates found by the similarity index are not generated."""
+    await async_client.post(
+        "/api/v1/profiles/me",
+        json={"fitness_goals": ["strength"]},
+        headers=auth_headers
+    )
+    response = await async_client.post(
+        "/api/v1/exercises/",
+        json={"name": "Dumbbell Goblet Squat", "muscle_groups": ["legs"], "equipment": ["dumbbell"]},
+        headers=auth_headers
+    )
+    squat_id = response.json()["exercise_id"]
+    plan = [
+        WorkoutExercise(
+            name=name,
+            sets=3,
+            reps=10,
+            rest_time=60,
+            target_muscles=["legs"],
+            equipment_needed=["dumbbell"]
+        )
+        for name in ("DB Goblet Squat", "DB Goblet Squats", "Box Jump")
+    ]
+    monkeypatch.setattr(workout_generator, "get_llm", lambda **kwargs: FakeLLM(llm_calls, plan))
+    url = "/api/v1/admin/exercises/similarity"
+    before = (await async_client.get(url, headers=superuser_headers)).json()
+
+    response = await async_client.post(
+        "/api/v1/workouts/generate",
+        json={
+            "duration": 30,
+            "location": "gym",
+            "equipment": ["dumbbell"],
+            "intensity": "moderate",
+            "focusAreas": ["legs"]
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    exercise_ids = [exercise["exercise_id"] for exercise in response.json()["exercises"]]
+    assert exercise_ids[:2] == [squat_id, squat_id]
+    assert exercise_ids[2] != squat_id
+
+    # The workout plan call plus Box Jump
+    assert llm_calls == [0, 0]
+    # Spelling variants are looked up once
+    status = (await async_client.get(url, headers=superuser_headers)).json()
+    assert status["lookups"] - before["lookups"] == 2
+    assert status["llm_calls_saved"] - before["llm_calls_saved"] == 1
+    assert status["indexed"] == 2